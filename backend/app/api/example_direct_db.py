@@ -1,6 +1,16 @@
-from fastapi import APIRouter, HTTPException, Body
-from app.core.db_client import get_records, insert_data, execute_query
+from fastapi import APIRouter, HTTPException, Body, Request
+from app.api.reg_intel import MockRegulation, regulation_diff_row
+from app.core import async_db, db_client, json_stream
+from app.core.bulk_ingest import FORMATS, bulk_insert, insert_rows, iter_records
+from app.core.chunk_search import check_search, decode_base64_vectors, decode_vectors, search_document_chunks
+from app.core.catalog_reader import fetch_postgres_page, projection
+from app.core.retention import normalize_retention
+from app.core.vector_index import index_catalog_entries
+from app.core.settings import CATALOG_PAGE_SIZE
 from datetime import datetime
+import asyncio
+import json
+import time
 from typing import List, Dict, Any, Optional
 from pydantic import BaseModel
 
@@ -18,12 +28,19 @@ class DataCatalogEntry(BaseModel):
     additional_metadata: Optional[Dict[str, Any]] = None
 
 @router.get("/regulation-diffs")
-async def get_regulation_diffs_direct():
-    """Get all regulation diffs using direct PostgreSQL connection"""
+async def get_regulation_diffs_direct(format: str = "json", limit: Optional[int] = None):
+    """
+    Get all regulation diffs using direct PostgreSQL connection
+
+    Rows are read from a server-side cursor DB_STREAM_FETCH_SIZE at a time and
+    streamed as a JSON array (or NDJSON with format=ndjson), so memory use does
+    not grow with the table.
+    """
+    if format not in json_stream.FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unknown format '{format}'. Use one of: {', '.join(json_stream.FORMATS)}")
     try:
-        # Example of using the direct database connection
-        results = get_records("regulation_diffs")
-        return results
+        batches = async_db.stream(db_client.stream_records("regulation_diffs", limit=limit))
+        return await json_stream.rows_response(batches, format)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
@@ -36,7 +53,7 @@ async def insert_regulation_direct(regulation: Dict[str, Any]):
             regulation["published_date"] = datetime.now().isoformat()
             
         # Insert into database directly
-        result = insert_data("regulation_diffs", regulation)
+        result = await async_db.insert_data("regulation_diffs", regulation)
         return {
             "status": "success",
             "message": "Regulation inserted directly",
@@ -49,18 +66,59 @@ async def insert_regulation_direct(regulation: Dict[str, Any]):
 async def vector_search_direct(embedding: str, limit: int = 5):
     """Perform vector search using direct PostgreSQL connection"""
     try:
-        # Example vector search query
-        query = """
-        SELECT id, content, (embedding <-> %s::vector) as distance
-        FROM document_chunks
-        ORDER BY distance
-        LIMIT %s
-        """
-        results = execute_query(query, (embedding, limit))
+        results = await async_db.run_db(db_client.get_document_chunks, embedding, limit)
         return results
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Vector search error: {str(e)}")
 
+class VectorSearchRequest(BaseModel):
+    embeddings: str  # base64 of n * dim little-endian float32 values
+    dim: int
+    k: int = 5
+    filters: Optional[List[Optional[Dict[str, Any]]]] = None
+
+async def run_vector_search(decode, k, filters):
+    """Decode the query vectors (400 on a bad payload) and search them all in one query"""
+    try:
+        vectors = decode()
+        check_search(len(vectors), k, filters)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        started = time.perf_counter()
+        results = await async_db.run_db(search_document_chunks, vectors, k, filters)
+        return {
+            "status": "success",
+            "query_count": len(vectors),
+            "results": [{"query_index": index, "matches": matches} for index, matches in enumerate(results)],
+            "search_ms": round((time.perf_counter() - started) * 1000, 3)
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Vector search error: {str(e)}")
+
+@router.post("/vector-search")
+async def batch_vector_search(request: VectorSearchRequest):
+    """
+    Nearest document chunks for many query vectors in one database round trip
+
+    embeddings holds every query vector packed as float32 and base64 encoded.
+    filters, if given, has one {column: value} filter (or null) per query.
+    Only id, content and distance come back.
+    """
+    return await run_vector_search(
+        lambda: decode_base64_vectors(request.embeddings, request.dim), request.k, request.filters
+    )
+
+@router.post("/vector-search/raw")
+async def batch_vector_search_raw(request: Request, dim: int, k: int = 5, filters: Optional[str] = None):
+    """/vector-search with the packed float32 vectors as the raw request body and filters as a JSON list"""
+    body = await request.body()
+    try:
+        query_filters = json.loads(filters) if filters else None
+    except json.JSONDecodeError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid filters JSON: {str(e)}")
+    return await run_vector_search(lambda: decode_vectors(body, dim), k, query_filters)
+
 @router.get("/complex-query")
 async def complex_query():
     """Example of a more complex SQL query that might be easier with direct DB access"""
@@ -91,17 +149,27 @@ async def complex_query():
         LEFT JOIN action_counts a ON r.id = a.regulation_diff_id
         ORDER BY r.published_date DESC
         """
-        results = execute_query(query)
+        results = await async_db.query(query)
         return results
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Query error: {str(e)}")
 
 @router.get("/data-catalog")
-async def get_data_catalog():
-    """Get all data catalog entries using direct DB access"""
+async def get_data_catalog(columns: Optional[str] = None, after_id: Optional[str] = None, limit: int = CATALOG_PAGE_SIZE):
+    """
+    Get one page of data catalog entries using direct DB access
+    
+    Pages are ordered by id; pass the returned next_after_id to get the next page.
+    columns is a comma-separated list of columns to return (default: all)
+    """
     try:
-        records = get_records("data_catalog")
-        return {"status": "success", "data": records}
+        selected = projection(columns.split(",")) if columns else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        records = await async_db.run_db(fetch_postgres_page, selected, after_id, limit)
+        next_after_id = records[-1]["id"] if len(records) == limit else None
+        return {"status": "success", "data": records, "next_after_id": next_after_id}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
@@ -109,10 +177,11 @@ async def get_data_catalog():
 async def add_data_catalog_entry(entry: DataCatalogEntry):
     """Add a new entry to the data catalog"""
     try:
-        data = entry.dict()
+        data = normalize_retention(entry.dict())
         data["created_at"] = datetime.now().isoformat()
         
-        result = insert_data("data_catalog", data)
+        result = await async_db.insert_data("data_catalog", data)
+        await asyncio.to_thread(index_catalog_entries, [{**data, "id": result[0]["id"]}])
         return {"status": "success", "id": result[0]["id"]}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
@@ -124,21 +193,75 @@ async def upload_mock_company_practices(entries: List[DataCatalogEntry]):
     This endpoint accepts a list of data catalog entries representing how the company handles data
     """
     try:
-        inserted_ids = []
-        for entry in entries:
-            data = entry.dict()
-            data["created_at"] = datetime.now().isoformat()
-            result = insert_data("data_catalog", data)
-            inserted_ids.append(result[0]["id"])
+        rows = [catalog_row(entry.dict()) for entry in entries]
+        # No executor timeout, as in bulk_insert: statement_timeout bounds each statement instead
+        inserted_ids, errors = await async_db.run_db(insert_rows, "data_catalog", rows, timeout=None) if rows else ([], {})
+        await asyncio.to_thread(
+            index_catalog_entries, [{**row, "id": row_id} for row, row_id in zip(rows, inserted_ids) if row_id is not None]
+        )
         
         return {
             "status": "success",
-            "message": f"Added {len(inserted_ids)} mock company data practices",
-            "inserted_ids": inserted_ids
+            "message": f"Added {len(inserted_ids) - len(errors)} mock company data practices",
+            "inserted_ids": inserted_ids,
+            "errors": [{"index": index, "error": error} for index, error in errors.items()]
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error uploading mock practices: {str(e)}")
 
+def catalog_row(record):
+    """data_catalog row for an uploaded record; raises on invalid records"""
+    if isinstance(record.get("additional_metadata"), str):
+        record = {**record, "additional_metadata": json.loads(record["additional_metadata"])}
+    data = normalize_retention(DataCatalogEntry(**record).dict())
+    data["created_at"] = datetime.now().isoformat()
+    return data
+
+def regulation_row(record):
+    """regulation_diffs row for an uploaded record; raises on invalid records"""
+    if isinstance(record.get("changes"), str):
+        record = {**record, "changes": json.loads(record["changes"])}
+    return regulation_diff_row(MockRegulation(**record))
+
+def index_inserted_entries(rows, ids):
+    """bulk_insert after_batch callback; bulk_insert runs it in a thread"""
+    index_catalog_entries([{**row, "id": row_id} for row, row_id in zip(rows, ids)])
+
+def request_body_format(request: Request, body_format: Optional[str]):
+    """Body format from the format query parameter, else the content type"""
+    body_format = (body_format or ("csv" if "csv" in request.headers.get("content-type", "") else "ndjson")).lower()
+    if body_format not in FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unknown format '{body_format}'. Use one of: {', '.join(FORMATS)}")
+    return body_format
+
+@router.post("/bulk/data-catalog")
+async def bulk_ingest_data_catalog(request: Request, format: Optional[str] = None):
+    """
+    Bulk load data catalog entries from an NDJSON or CSV request body
+
+    The body is read as a stream and inserted in multi-row batches of
+    BULK_INGEST_BATCH_SIZE, one transaction per batch. Invalid rows are
+    reported by line number without failing the rest.
+    """
+    body_format = request_body_format(request, format)
+    try:
+        result = await bulk_insert(
+            iter_records(request.stream(), body_format), "data_catalog", catalog_row, after_batch=index_inserted_entries
+        )
+        return {"status": "success", **result}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error bulk loading data catalog: {str(e)}")
+
+@router.post("/bulk/regulation-diffs")
+async def bulk_ingest_regulation_diffs(request: Request, format: Optional[str] = None):
+    """Bulk load regulations from an NDJSON or CSV request body (see /bulk/data-catalog)"""
+    body_format = request_body_format(request, format)
+    try:
+        result = await bulk_insert(iter_records(request.stream(), body_format), "regulation_diffs", regulation_row)
+        return {"status": "success", **result}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error bulk loading regulation diffs: {str(e)}")
+
 @router.get("/query-example")
 async def query_example():
     """Example of using the DB client to run a custom query"""
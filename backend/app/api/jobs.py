@@ -0,0 +1,89 @@
+from fastapi import APIRouter, HTTPException, Header
+from pydantic import BaseModel
+from typing import Dict, Any, Optional
+from app.api import impact, pipeline
+from app.core.jobs import job_manager, FINISHED_STATUSES
+
+router = APIRouter(prefix="/jobs")
+
+class JobRequest(BaseModel):
+    kind: str
+    payload: Dict[str, Any] = {}
+    priority: Optional[str] = None
+
+def job_request(model, payload, job):
+    """Endpoint request for a job's payload, carrying the priority the job was submitted with"""
+    return model(**{**payload, "priority": job["priority"]} if job["priority"] else payload)
+
+# Long-running work that can be queued instead of holding the HTTP connection open.
+# The pipeline endpoints set the LLM scheduling context themselves, so they get the job's tenant and priority.
+job_manager.register(
+    "run-pipeline",
+    lambda payload, job: pipeline.run_full_pipeline(
+        job_request(pipeline.PipelineRequest, payload, job), x_tenant_id=job["tenant"]
+    )
+)
+job_manager.register(
+    "run-pipeline-batch",
+    lambda payload, job: pipeline.run_pipeline_batch_endpoint(
+        job_request(pipeline.BatchPipelineRequest, payload, job), x_tenant_id=job["tenant"]
+    )
+)
+job_manager.register(
+    "test-compliance-pipeline",
+    lambda payload, job: pipeline.test_compliance_pipeline(pipeline.TestPipelineRequest(**payload))
+)
+job_manager.register(
+    "assess-compliance",
+    lambda payload, job: impact.assess_compliance(impact.ComplianceAssessmentRequest(**payload))
+)
+job_manager.register(
+    "assess-matrix",
+    lambda payload, job: impact.assess_matrix(impact.AssessmentMatrixRequest(**payload))
+)
+
+def job_summary(job):
+    """Job fields without the (possibly large) payload and result"""
+    return {key: value for key, value in job.items() if key not in ("payload", "result")}
+
+@router.post("")
+async def submit_job(request: JobRequest, x_tenant_id: Optional[str] = Header(None)):
+    """Queue long-running work and return a job id immediately"""
+    try:
+        job_id = await job_manager.submit(request.kind, request.payload, request.priority, x_tenant_id)
+        return {"status": "success", "message": "Job queued", "job_id": job_id}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error submitting job: {str(e)}")
+
+@router.get("/stats")
+async def get_job_stats():
+    """Worker pool and queue statistics"""
+    return {"status": "success", "jobs": job_manager.stats()}
+
+@router.get("/{job_id}")
+async def get_job_status(job_id: str):
+    """Get the status of a job"""
+    job = await job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return {"status": "success", "job": job_summary(job)}
+
+@router.get("/{job_id}/result")
+async def get_job_result(job_id: str):
+    """Get the result of a finished job"""
+    job = await job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job["status"] not in FINISHED_STATUSES:
+        raise HTTPException(status_code=409, detail=f"Job is still {job['status']}")
+    return {"status": "success", "job": job_summary(job), "result": job["result"]}
+
+@router.post("/{job_id}/cancel")
+async def cancel_job(job_id: str):
+    """Cancel a queued or running job"""
+    job = await job_manager.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return {"status": "success", "message": f"Job is {job['status']}", "job": job_summary(job)}
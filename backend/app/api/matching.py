@@ -0,0 +1,112 @@
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel
+import asyncio
+import time
+from app.core import async_db
+from app.core.catalog_reader import iter_catalog_pages
+from app.core.compliance import fetch_regulation_diffs, MOCK_DATA_CATALOG
+from app.core.embeddings import embed_texts, requirement_chunks, CATALOG_TEXT_FIELDS
+from app.core.vector_index import get_catalog_index, index_catalog_entries
+
+router = APIRouter(prefix="/matching")
+
+class IndexCatalogRequest(BaseModel):
+    use_mock_data: bool = False
+
+class MatchRequest(BaseModel):
+    regulation_diff_id: str
+    k: int = 5
+    min_score: float = 0.1
+    use_mock_data: bool = False
+
+async def index_catalog(use_mock_data):
+    """
+    Embed the whole data catalog page by page, then drop entries no longer in it
+
+    Stale entries are only dropped after every page was read, so a failed read
+    never empties the index. Returns the number of entries indexed.
+    """
+    entry_ids = set()
+    complete = True
+    try:
+        async for page in iter_catalog_pages(CATALOG_TEXT_FIELDS):
+            await asyncio.to_thread(index_catalog_entries, page)
+            entry_ids.update(str(entry["id"]) for entry in page)
+    except Exception as db_error:
+        complete = False
+        print(f"Database error fetching data catalog: {str(db_error)}")
+    if not entry_ids and use_mock_data:
+        await asyncio.to_thread(index_catalog_entries, MOCK_DATA_CATALOG)
+        entry_ids.update(str(entry["id"]) for entry in MOCK_DATA_CATALOG)
+        complete = True
+    if complete:
+        await asyncio.to_thread(get_catalog_index().retain, entry_ids)
+    return len(entry_ids)
+
+@router.post("/index-catalog")
+async def index_catalog_endpoint(request: IndexCatalogRequest):
+    """Rebuild the catalog side of the vector index from the data catalog, dropping deleted entries"""
+    try:
+        indexed = await index_catalog(request.use_mock_data)
+        catalog_index = await asyncio.to_thread(get_catalog_index)
+        return {"status": "success", "message": f"Indexed {indexed} catalog entries", "index": catalog_index.stats()}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error indexing data catalog: {str(e)}")
+
+@router.post("/match")
+async def match_requirements(request: MatchRequest):
+    """
+    Find the catalog entries each requirement of a regulation diff most likely touches
+
+    Requirement chunks are embedded locally and searched against the catalog
+    index in one batch. The catalog is indexed on first use if the index is empty.
+    """
+    try:
+        if request.k < 1:
+            raise HTTPException(status_code=400, detail="k must be at least 1")
+        regulation_diffs = await async_db.run_db(fetch_regulation_diffs, [request.regulation_diff_id])
+        regulation_diff = regulation_diffs[request.regulation_diff_id]
+        chunks = requirement_chunks(regulation_diff)
+        if not chunks:
+            raise HTTPException(status_code=404, detail="Regulation diff has no requirement text")
+        catalog_index = await asyncio.to_thread(get_catalog_index)
+        if len(catalog_index) == 0 and not await index_catalog(request.use_mock_data):
+            raise HTTPException(status_code=404, detail="No company data practices found in data catalog")
+
+        vectors = await asyncio.to_thread(embed_texts, [text for _, text in chunks])
+        start = time.perf_counter()
+        neighbours = await asyncio.to_thread(catalog_index.search, vectors, request.k)
+        search_ms = (time.perf_counter() - start) * 1000
+
+        requirements = []
+        entry_scores = {}
+        for (suffix, text), matches in zip(chunks, neighbours):
+            matches = [(entry_id, score) for entry_id, score in matches if score >= request.min_score]
+            requirements.append({
+                "chunk_id": f"{request.regulation_diff_id}:{suffix}",
+                "text": text,
+                "matches": [{"data_catalog_id": entry_id, "score": round(score, 4)} for entry_id, score in matches]
+            })
+            for entry_id, score in matches:
+                entry_scores[entry_id] = max(score, entry_scores.get(entry_id, 0.0))
+
+        return {
+            "status": "success",
+            "regulation_diff_id": request.regulation_diff_id,
+            "requirements": requirements,
+            "entries": [
+                {"data_catalog_id": entry_id, "score": round(score, 4)}
+                for entry_id, score in sorted(entry_scores.items(), key=lambda item: -item[1])
+            ],
+            "search_ms": round(search_ms, 3)
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error matching requirements: {str(e)}")
+
+@router.get("/stats")
+async def matching_stats():
+    """Size and layout of the catalog vector index"""
+    catalog_index = await asyncio.to_thread(get_catalog_index)
+    return {"status": "success", "catalog": catalog_index.stats()}
@@ -0,0 +1,284 @@
+import asyncio
+import json
+from fastapi import APIRouter, HTTPException, Header
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from typing import Dict, Any, List, Optional
+from app.api import reg_intel, impact, planner, report
+from app.api.reg_intel import MockRegulation
+from app.langgraph.pipeline import run_pipeline_coalesced, stream_pipeline, resume_pipeline, get_pipeline_run
+from app.langgraph.batch import run_pipeline_batch
+from app.langgraph.registry import graph_registry
+from app.core.llm import reset_llm_clients, llm_client_stats
+from app.core.llm_cache import llm_cache
+from app.core.llm_scheduler import llm_scheduler, llm_request_context
+from app.core.singleflight import request_coalescer
+from app.core.write_behind import write_behind
+from app.core.supabase_client import supabase
+from app.core import async_db
+
+router = APIRouter()
+
+class PipelineRequest(BaseModel):
+    regulation: Dict[str, Any]
+    source: Optional[str] = None
+    priority: Optional[str] = None
+
+class BatchPipelineRequest(BaseModel):
+    regulations: List[Dict[str, Any]] = []
+    regulation_diff_ids: List[str] = []
+    max_concurrency: Optional[int] = None
+    # Bulk runs queue behind interactive requests for LLM capacity by default
+    priority: Optional[str] = "low"
+
+class ResumePipelineRequest(BaseModel):
+    from_stage: Optional[str] = None
+    priority: Optional[str] = None
+
+class TestPipelineRequest(BaseModel):
+    mock_regulation: Dict[str, Any]
+    use_mock_company_data: bool = True
+
+async def compliance_pipeline_steps(request: TestPipelineRequest):
+    """
+    Run the mock compliance pipeline, yielding (step, result_key, result) as each step completes
+    """
+    # Step 1: Upload the mock regulation
+    # Create MockRegulation instance from the dictionary
+    mock_regulation = MockRegulation(**request.mock_regulation)
+    reg_response = await reg_intel.upload_mock_regulation(mock_regulation)
+    regulation_diff_id = reg_response.get("regulation_diff_id")
+    
+    if not regulation_diff_id:
+        raise HTTPException(status_code=500, detail="Failed to upload mock regulation")
+    yield "regulatory_intelligence", "regulation", reg_response
+        
+    # Step 2: Run compliance assessment with the uploaded regulation against mock company data
+    compliance_request = impact.ComplianceAssessmentRequest(
+        regulation_diff_id=regulation_diff_id,
+        use_mock_data=request.use_mock_company_data
+    )
+    impact_assessment = await impact.assess_compliance(compliance_request)
+    yield "impact_assessment", "impact_assessment", impact_assessment
+    
+    # Step 3: Generate implementation plan from the findings
+    implementation_plan = await planner.generate_plan(regulation_diff_id)
+    yield "implementation_planning", "implementation_plan", implementation_plan
+    
+    # Step 4: Generate a report (optional)
+    report_request = report.ReportRequest(
+        regulation_diff_id=regulation_diff_id,
+        include_findings=True,
+        include_action_items=True
+    )
+    compliance_report = await report.generate_report(report_request)
+    yield "report_generation", "report", compliance_report
+
+def sse_event(event: str, data: Any) -> str:
+    """Format one Server-Sent Events message"""
+    return f"event: {event}\ndata: {json.dumps(jsonable_encoder(data))}\n\n"
+
+def sse_response(events) -> StreamingResponse:
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        # Disable proxy buffering so each event reaches the client immediately
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.post("/test-compliance-pipeline")
+async def test_compliance_pipeline(request: TestPipelineRequest):
+    """
+    Test the full compliance pipeline with mock data
+    This endpoint uploads mock regulatory data, tests it against mock company data,
+    and returns the complete analysis
+    """
+    try:
+        steps_completed = []
+        results = {}
+        async for step, result_key, result in compliance_pipeline_steps(request):
+            steps_completed.append(step)
+            results[result_key] = result
+        
+        # Return the full pipeline results
+        return {
+            "status": "success",
+            "message": "Full compliance pipeline executed with mock data",
+            "steps_completed": steps_completed,
+            "results": results
+        }
+    except Exception as e:
+        return {"status": "error", "message": str(e)}
+
+@router.post("/test-compliance-pipeline/stream")
+async def test_compliance_pipeline_stream(request: TestPipelineRequest):
+    """Stream each step of the mock compliance pipeline as a Server-Sent Event as soon as it completes"""
+    async def events():
+        try:
+            async for step, result_key, result in compliance_pipeline_steps(request):
+                yield sse_event(step, result)
+            yield sse_event("done", {"status": "success"})
+        except Exception as e:
+            yield sse_event("error", {"status": "error", "message": str(e)})
+
+    return sse_response(events())
+
+@router.post("/run-pipeline")
+async def run_full_pipeline(request: PipelineRequest = None, x_tenant_id: Optional[str] = Header(None)):
+    """Run the complete compliance pipeline from regulatory scraping to report generation"""
+    try:
+        # Run the LangGraph pipeline, scheduling its LLM calls by request priority;
+        # concurrent identical requests share one run
+        with llm_request_context(request.priority if request else None, x_tenant_id):
+            result = await run_pipeline_coalesced(regulation=request.regulation if request else None)
+        
+        # Check for errors; the run id lets the caller resume from the checkpoint
+        if result.get("error"):
+            return {
+                "status": "error",
+                "message": "Pipeline completed with errors",
+                "run_id": result.get("run_id"),
+                "errors": [result["error"]],
+                "partial_results": result
+            }
+            
+        # Return successful result
+        return {
+            "status": "success",
+            "message": "Pipeline execution completed",
+            "run_id": result.get("run_id"),
+            "data": {
+                "regulation": result.get("regulation", {}),
+                "impact": result.get("impact", {}),
+                "action_items": result.get("action_plan", {}).get("action_items", []),
+                "final_report": result.get("final_report", {})
+            }
+        }
+    except Exception as e:
+        return {"status": "error", "message": f"Pipeline execution failed: {str(e)}"}
+
+@router.post("/run-pipeline/stream")
+async def run_full_pipeline_stream(request: PipelineRequest = None, x_tenant_id: Optional[str] = Header(None)):
+    """
+    Stream the compliance pipeline over Server-Sent Events
+
+    Emits analysis, impact, action_plan and final_report events as each node
+    completes, token events with partial LLM output, then done.
+    """
+    async def events():
+        try:
+            with llm_request_context(request.priority if request else None, x_tenant_id):
+                async for event, data in stream_pipeline(regulation=request.regulation if request else None):
+                    yield sse_event(event, data)
+            yield sse_event("done", {"status": "success"})
+        except Exception as e:
+            yield sse_event("error", {"status": "error", "message": f"Pipeline execution failed: {str(e)}"})
+
+    return sse_response(events())
+
+@router.post("/run-pipeline/batch")
+async def run_pipeline_batch_endpoint(request: BatchPipelineRequest, x_tenant_id: Optional[str] = Header(None)):
+    """Run the compliance pipeline over many regulations at once, with bounded concurrency"""
+    try:
+        entries = [{"regulation": regulation} for regulation in request.regulations]
+
+        if request.regulation_diff_ids:
+            if supabase is None:
+                raise HTTPException(status_code=503, detail="Supabase client is not initialized")
+            diffs_result = await async_db.execute(supabase.table("regulation_diffs")
+                                   .select("*")
+                                   .in_("id", request.regulation_diff_ids))
+            diffs = {str(diff["id"]): diff for diff in diffs_result.data}
+            entries.extend(
+                {"regulation_diff_id": diff_id, "regulation": diffs.get(diff_id)}
+                for diff_id in request.regulation_diff_ids
+            )
+
+        if not entries:
+            raise HTTPException(status_code=400, detail="Provide regulations or regulation_diff_ids")
+
+        with llm_request_context(request.priority, x_tenant_id):
+            batch = await run_pipeline_batch(entries, request.max_concurrency)
+        return {
+            "status": "success" if batch["failed"] == 0 else "partial",
+            "message": f"Batch completed: {batch['succeeded']} succeeded, {batch['failed']} failed",
+            **batch
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Batch pipeline execution failed: {str(e)}")
+
+@router.get("/run-pipeline/{run_id}")
+async def get_pipeline_run_state(run_id: str):
+    """Get the latest checkpointed state of a pipeline run"""
+    try:
+        return {"status": "success", **await get_pipeline_run(run_id)}
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.post("/run-pipeline/{run_id}/resume")
+async def resume_pipeline_run(run_id: str, request: ResumePipelineRequest = None, x_tenant_id: Optional[str] = Header(None)):
+    """Resume a failed or interrupted run from its last completed node, or rerun from a given stage"""
+    request = request or ResumePipelineRequest()
+    try:
+        with llm_request_context(request.priority, x_tenant_id):
+            result = await resume_pipeline(run_id, request.from_stage)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if result.get("error"):
+        return {
+            "status": "error",
+            "message": "Pipeline resumed with errors",
+            "run_id": run_id,
+            "error": result["error"],
+            "partial_results": result
+        }
+    return {
+        "status": "success",
+        "message": "Pipeline run resumed and completed",
+        "run_id": run_id,
+        "data": {
+            "regulation": result.get("regulation", {}),
+            "action_items": result.get("action_plan", {}).get("action_items", []),
+            "final_report": result.get("final_report", {})
+        }
+    }
+
+@router.get("/pipeline/stats")
+async def pipeline_stats():
+    """Compiled graph registry statistics, including setup time saved by reuse"""
+    return {
+        "status": "success",
+        "graphs": graph_registry.stats(),
+        "llm_cache": llm_cache.stats() if llm_cache else None,
+        "llm_scheduler": llm_scheduler.stats() if llm_scheduler else None,
+        "llm_clients": llm_client_stats(),
+        "write_behind": write_behind.stats(),
+        "database": async_db.stats(),
+        "request_coalescing": request_coalescer.stats()
+    }
+
+@router.delete("/pipeline/cache")
+async def clear_llm_cache():
+    """Clear the LLM response cache"""
+    if llm_cache is None:
+        return {"status": "success", "message": "LLM response cache is disabled"}
+    await asyncio.to_thread(llm_cache.clear)
+    return {"status": "success", "message": "LLM response cache cleared"}
+
+@router.post("/pipeline/reload")
+async def reload_pipeline():
+    """Hot swap compiled graphs and LLM clients after a configuration change"""
+    try:
+        reset_llm_clients()
+        graph_registry.swap_all()
+        return {"status": "success", "message": "Pipeline graphs and LLM clients reloaded", "graphs": graph_registry.stats()}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error reloading pipeline: {str(e)}")
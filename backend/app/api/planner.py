@@ -3,8 +3,9 @@ from pydantic import BaseModel
 from datetime import datetime, timedelta
 from typing import List, Dict, Any, Optional
 from app.core.supabase_client import supabase
-from app.core.settings import OPENAI_API_KEY
-from langchain_openai import ChatOpenAI
+from app.core import async_db
+from app.core.llm import get_llm
+from app.core.write_behind import write_behind
 
 router = APIRouter(prefix="/planner")
 
@@ -21,11 +22,11 @@ class ActionItem(BaseModel):
 async def create_implementation_plan(finding_id: str):
     """Create implementation plan for a specific finding"""
     try:
-        # Get the finding from Supabase
-        finding_result = supabase.table("findings") \
-                                .select("*") \
-                                .eq("id", finding_id) \
-                                .execute()
+        # Get the finding from Supabase, including one still queued for writing
+        await write_behind.flush("findings")
+        finding_result = await async_db.execute(supabase.table("findings")
+                                .select("*")
+                                .eq("id", finding_id))
         
         if not finding_result.data:
             raise HTTPException(status_code=404, detail="Finding not found")
@@ -36,7 +37,7 @@ async def create_implementation_plan(finding_id: str):
         # For now, we simulate the Implementation Planning agent
 
         # Initialize LLM (would be part of LangGraph in full implementation)
-        llm = ChatOpenAI(api_key=OPENAI_API_KEY, model="gpt-4o")
+        llm = get_llm("gpt-4o")
         
         # Calculate due dates based on current date
         today = datetime.now()
@@ -75,8 +76,8 @@ async def create_implementation_plan(finding_id: str):
             }
         ]
         
-        # Insert into Supabase
-        result = supabase.table("action_items").insert(action_items).execute()
+        # Insert into Supabase after the response is sent
+        await write_behind.put("action_items", action_items)
         
         return {
             "status": "success",
@@ -90,7 +91,8 @@ async def create_implementation_plan(finding_id: str):
 async def get_action_items():
     """Get all action items"""
     try:
-        result = supabase.table("action_items").select("*").execute()
+        await write_behind.flush("action_items")
+        result = await async_db.execute(supabase.table("action_items").select("*"))
         return result.data
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching action items: {str(e)}")
@@ -99,10 +101,10 @@ async def get_action_items():
 async def update_action_item(action_item_id: str, action_item: ActionItem):
     """Update an action item"""
     try:
-        result = supabase.table("action_items") \
-                       .update(action_item.dict()) \
-                       .eq("id", action_item_id) \
-                       .execute()
+        await write_behind.flush("action_items")
+        result = await async_db.execute(supabase.table("action_items")
+                       .update(action_item.dict())
+                       .eq("id", action_item_id))
         
         if not result.data:
             raise HTTPException(status_code=404, detail="Action item not found")
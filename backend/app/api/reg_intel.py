@@ -2,6 +2,7 @@ from fastapi import APIRouter, HTTPException, Body
 from pydantic import BaseModel
 from datetime import datetime
 from app.core.supabase_client import supabase
+from app.core import async_db
 import json
 from typing import List, Dict, Any, Optional
 
@@ -64,7 +65,7 @@ async def scrape_regulations():
         }
         
         # Insert into Supabase
-        result = supabase.table("regulation_diffs").insert(regulation_diff).execute()
+        result = await async_db.execute(supabase.table("regulation_diffs").insert(regulation_diff))
         
         return {
             "status": "success", 
@@ -74,6 +75,20 @@ async def scrape_regulations():
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error scraping regulations: {str(e)}")
 
+def regulation_diff_row(regulation: MockRegulation):
+    """regulation_diffs row for an uploaded regulation"""
+    return {
+        "source": regulation.source,
+        "title": regulation.title,
+        "summary": regulation.summary,
+        "url": regulation.url or f"https://example.com/{regulation.source.lower()}-mock",
+        "published_date": datetime.now().isoformat(),
+        "content": regulation.content,
+        "previous_version": regulation.previous_version,
+        "changes": regulation.changes,
+        "jurisdiction": regulation.jurisdiction
+    }
+
 @router.post("/upload-mock-regulation")
 async def upload_mock_regulation(regulation: MockRegulation):
     """
@@ -81,23 +96,12 @@ async def upload_mock_regulation(regulation: MockRegulation):
     This endpoint accepts mock regulatory data and stores it in the regulation_diffs table
     """
     try:
-        # Convert the model to a dict
-        regulation_diff = {
-            "source": regulation.source,
-            "title": regulation.title,
-            "summary": regulation.summary,
-            "url": regulation.url or f"https://example.com/{regulation.source.lower()}-mock",
-            "published_date": datetime.now().isoformat(),
-            "content": regulation.content,
-            "previous_version": regulation.previous_version,
-            "changes": regulation.changes,
-            "jurisdiction": regulation.jurisdiction
-        }
+        regulation_diff = regulation_diff_row(regulation)
         
         try:
             # Insert into Supabase if available
             if supabase:
-                result = supabase.table("regulation_diffs").insert(regulation_diff).execute()
+                result = await async_db.execute(supabase.table("regulation_diffs").insert(regulation_diff))
                 reg_id = result.data[0]["id"] if result.data else "mock-reg-id-123"
             else:
                 # Mock response for testing without Supabase
@@ -119,7 +123,7 @@ async def upload_mock_regulation(regulation: MockRegulation):
 async def get_regulation_diffs():
     """Get all regulation diffs"""
     try:
-        result = supabase.table("regulation_diffs").select("*").execute()
+        result = await async_db.execute(supabase.table("regulation_diffs").select("*"))
         return result.data
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching regulation diffs: {str(e)}") 
\ No newline at end of file
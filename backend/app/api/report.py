@@ -4,6 +4,8 @@ from datetime import datetime
 import json
 from typing import List, Dict, Any, Optional
 from app.core.supabase_client import supabase
+from app.core import async_db
+from app.core.write_behind import write_behind
 from fastapi.responses import FileResponse, JSONResponse
 import os
 import tempfile
@@ -20,23 +22,24 @@ async def generate_report(request: ReportRequest):
     """Generate a comprehensive compliance report"""
     try:
         # Get the regulation diff
-        reg_diff_result = supabase.table("regulation_diffs") \
-                                .select("*") \
-                                .eq("id", request.regulation_diff_id) \
-                                .execute()
+        reg_diff_result = await async_db.execute(supabase.table("regulation_diffs")
+                                .select("*")
+                                .eq("id", request.regulation_diff_id))
         
         if not reg_diff_result.data:
             raise HTTPException(status_code=404, detail="Regulation diff not found")
         
         regulation_diff = reg_diff_result.data[0]
         
+        # Findings and action items may still be queued from the assessment that just ran
+        await write_behind.flush("findings", "action_items")
+        
         # Get findings if requested
         findings = []
         if request.include_findings:
-            findings_result = supabase.table("findings") \
-                                   .select("*") \
-                                   .eq("regulation_diff_id", request.regulation_diff_id) \
-                                   .execute()
+            findings_result = await async_db.execute(supabase.table("findings")
+                                   .select("*")
+                                   .eq("regulation_diff_id", request.regulation_diff_id))
             findings = findings_result.data
         
         # Get action items if requested
@@ -46,10 +49,9 @@ async def generate_report(request: ReportRequest):
             finding_ids = [finding["id"] for finding in findings]
             
             # Get action items for these findings
-            action_items_result = supabase.table("action_items") \
-                                       .select("*") \
-                                       .in_("finding_id", finding_ids) \
-                                       .execute()
+            action_items_result = await async_db.execute(supabase.table("action_items")
+                                       .select("*")
+                                       .in_("finding_id", finding_ids))
             action_items = action_items_result.data
         
         # In a real implementation, we would:
@@ -0,0 +1,93 @@
+import asyncio
+import functools
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from app.core import db_client, query_builder
+from app.core.settings import DB_EXECUTOR_WORKERS, DB_QUERY_TIMEOUT_SECONDS
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Blocking database calls (psycopg2 and the Supabase client) run here, never on the event loop.
+# Sized to the connection pool so a burst of requests queues for a thread instead of
+# exhausting the pool.
+executor = ThreadPoolExecutor(max_workers=DB_EXECUTOR_WORKERS, thread_name_prefix="db")
+
+async def run_db(function, *args, timeout=DB_QUERY_TIMEOUT_SECONDS, **kwargs):
+    """
+    Run a blocking database call on the bounded database executor
+
+    Args:
+        function (callable): The blocking call
+        timeout (float): Seconds to wait for the result; None waits indefinitely
+        *args, **kwargs: Arguments for the call
+
+    Returns:
+        The call's result
+
+    Raises:
+        TimeoutError: The call did not finish in time (it is abandoned; server-side
+            timeouts make sure the query itself stops)
+    """
+    loop = asyncio.get_running_loop()
+    future = loop.run_in_executor(executor, functools.partial(function, *args, **kwargs))
+    try:
+        return await asyncio.wait_for(future, timeout)
+    except asyncio.TimeoutError:
+        raise TimeoutError(f"Database call {getattr(function, '__name__', function)} timed out after {timeout}s")
+
+async def execute(builder, timeout=DB_QUERY_TIMEOUT_SECONDS):
+    """Execute a Supabase query builder (supabase.table(...).select(...)...) off the event loop"""
+    return await run_db(builder.execute, timeout=timeout)
+
+async def query(sql, params=None, fetch=True, timeout=DB_QUERY_TIMEOUT_SECONDS):
+    """db_client.execute_query off the event loop, with the timeout also enforced by PostgreSQL"""
+    return await run_db(db_client.execute_query, sql, params, fetch, timeout=timeout, timeout_seconds=timeout)
+
+async def get_records(table, conditions=None, limit=None, timeout=DB_QUERY_TIMEOUT_SECONDS):
+    return await run_db(db_client.get_records, table, conditions, limit, timeout=timeout)
+
+async def insert_data(table, data, timeout=DB_QUERY_TIMEOUT_SECONDS):
+    return await run_db(db_client.insert_data, table, data, timeout=timeout)
+
+async def stream(batches, timeout=DB_QUERY_TIMEOUT_SECONDS):
+    """
+    Iterate a blocking batch generator (db_client.stream_query / stream_records) off the event loop
+
+    Each batch is fetched on the database executor. Closing the iterator early
+    (e.g. the client disconnected) closes the generator, which releases its connection.
+    """
+    try:
+        while True:
+            batch = await run_db(next, batches, None, timeout=timeout)
+            if batch is None:
+                break
+            yield batch
+    finally:
+        try:
+            await run_db(batches.close, timeout=timeout)
+        except ValueError:
+            # Still fetching after a timeout; the generator releases its connection when collected
+            logger.warning("Streamed query abandoned while a fetch was still running")
+
+def start_pool():
+    """Let the pool hand out connections again and open its minimum connections in the background"""
+    if db_client.pool is not None:
+        db_client.pool.open()
+        executor.submit(db_client.pool.warm)
+
+async def close_pool():
+    """Close the pool's idle connections; ones still checked out close as they are returned"""
+    if db_client.pool is not None:
+        await asyncio.to_thread(db_client.pool.closeall)
+
+def stats():
+    return {
+        "executor_workers": executor._max_workers,
+        "executor_threads": len(executor._threads),
+        "executor_queued": executor._work_queue.qsize(),
+        "query_timeout_seconds": DB_QUERY_TIMEOUT_SECONDS,
+        "query_cache": query_builder.stats(),
+        "pool": db_client.pool.stats() if db_client.pool is not None else None
+    }
@@ -0,0 +1,192 @@
+import asyncio
+import codecs
+import csv
+import json
+import time
+import logging
+import psycopg2
+from psycopg2 import sql
+from psycopg2.extras import execute_values
+from app.core import db_client
+from app.core.query_builder import adapt
+from app.core.async_db import run_db
+from app.core.settings import BULK_INGEST_BATCH_SIZE, DB_QUERY_TIMEOUT_SECONDS
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+FORMATS = ("ndjson", "csv")
+
+async def iter_lines(chunks):
+    """Decoded lines of a streamed UTF-8 body, with their 1-based line numbers"""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    number = 0
+    async for chunk in chunks:
+        buffer += decoder.decode(chunk)
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            number += 1
+            yield number, line.rstrip("\r")
+    buffer += decoder.decode(b"", final=True)
+    if buffer:
+        yield number + 1, buffer.rstrip("\r")
+
+async def iter_records(chunks, body_format):
+    """
+    Records of a streamed NDJSON or CSV body
+
+    CSV needs a header row; empty cells become None. Quoted CSV fields may
+    span lines.
+
+    Yields:
+        tuple: (line number, record dict), or (line number, error message) for lines that do not parse
+    """
+    if body_format not in FORMATS:
+        raise ValueError(f"Unknown format '{body_format}'. Use one of: {', '.join(FORMATS)}")
+    header = None
+    pending, pending_line = "", None
+    async for number, line in iter_lines(chunks):
+        if body_format == "ndjson":
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield number, f"Invalid JSON: {str(e)}"
+                continue
+            yield number, record if isinstance(record, dict) else "Each line must be a JSON object"
+            continue
+
+        # A CSV record is complete once its quotes are balanced
+        pending = f"{pending}\n{line}" if pending_line else line
+        pending_line = pending_line or number
+        if pending.count('"') % 2:
+            continue
+        values = next(csv.reader([pending]), [])
+        record_line, pending, pending_line = pending_line, "", None
+        if not any(values):
+            continue
+        if header is None:
+            header = [name.strip() for name in values]
+        elif len(values) != len(header):
+            yield record_line, f"Expected {len(header)} columns, got {len(values)}"
+        else:
+            yield record_line, {name: value if value != "" else None for name, value in zip(header, values)}
+    if pending_line:
+        yield pending_line, "Unterminated quoted field"
+
+def insert_rows(table, rows, timeout_seconds=DB_QUERY_TIMEOUT_SECONDS):
+    """
+    Insert rows with one multi-row INSERT in one transaction
+
+    If the batch fails (e.g. one row breaks a constraint), it is retried row
+    by row inside the same transaction with a savepoint per row, so the good
+    rows still go in and each bad row gets its own error. timeout_seconds is
+    enforced by PostgreSQL per statement, not for the batch as a whole.
+
+    Args:
+        table (str): Table to insert into
+        rows (list): Dicts with the same keys; dicts and lists are stored as JSON
+
+    Returns:
+        tuple: (ids, one per row and None where the row failed, {row index: error})
+    """
+    if db_client.pool is None:
+        raise ValueError("Database connection pool is not initialized. Check DATABASE_URL in your .env file")
+    columns = list(rows[0])
+    values = [
+        tuple(adapt(row.get(column)) for column in columns)
+        for row in rows
+    ]
+    insert = sql.SQL("INSERT INTO {table} ({columns}) VALUES %s RETURNING id").format(
+        table=sql.Identifier(table),
+        columns=sql.SQL(", ").join(sql.Identifier(column) for column in columns)
+    )
+    conn = db_client.pool.getconn()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SET LOCAL statement_timeout = %s", (int(timeout_seconds * 1000),))
+            try:
+                ids = [row[0] for row in execute_values(cur, insert, values, page_size=len(values), fetch=True)]
+                conn.commit()
+                return ids, {}
+            except psycopg2.Error:
+                conn.rollback()
+
+            cur.execute("SET LOCAL statement_timeout = %s", (int(timeout_seconds * 1000),))
+            ids, errors = [], {}
+            for index, row_values in enumerate(values):
+                cur.execute("SAVEPOINT bulk_row")
+                try:
+                    ids.append(execute_values(cur, insert, [row_values], fetch=True)[0][0])
+                    cur.execute("RELEASE SAVEPOINT bulk_row")
+                except psycopg2.Error as e:
+                    cur.execute("ROLLBACK TO SAVEPOINT bulk_row")
+                    ids.append(None)
+                    errors[index] = str(e).strip()
+            conn.commit()
+            return ids, errors
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        db_client.pool.putconn(conn)
+
+async def bulk_insert(records, table, prepare, batch_size=BULK_INGEST_BATCH_SIZE, after_batch=None):
+    """
+    Validate and insert streamed records in batches
+
+    Args:
+        records: Async iterable of (line number, record or error message), as from iter_records
+        table (str): Table to insert into
+        prepare (callable): Turns a record into the row to insert; raises on invalid records
+        after_batch (callable): Optional after_batch(rows, ids) for the inserted rows of each batch
+
+    Returns:
+        dict: Inserted count, ids (with line numbers), per-row errors and rows per second
+    """
+    started = time.perf_counter()
+    inserted, errors, batch, lines = [], [], [], []
+
+    async def flush():
+        # No executor timeout: abandoning the batch would leave it writing with an unknown result.
+        # statement_timeout bounds each statement, including every row of the fallback.
+        ids, batch_errors = await run_db(insert_rows, table, batch, timeout=None)
+        for index, (line, row_id) in enumerate(zip(lines, ids)):
+            if index in batch_errors:
+                errors.append({"line": line, "error": batch_errors[index]})
+            else:
+                inserted.append({"line": line, "id": row_id})
+        if after_batch:
+            written = [(row, row_id) for row, row_id in zip(batch, ids) if row_id is not None]
+            await asyncio.to_thread(after_batch, [row for row, _ in written], [row_id for _, row_id in written])
+        batch.clear()
+        lines.clear()
+
+    async for line, record in records:
+        if isinstance(record, str):
+            errors.append({"line": line, "error": record})
+            continue
+        try:
+            batch.append(prepare(record))
+            lines.append(line)
+        except Exception as e:
+            errors.append({"line": line, "error": str(e)})
+            continue
+        if len(batch) >= batch_size:
+            await flush()
+    if batch:
+        await flush()
+
+    seconds = time.perf_counter() - started
+    logger.info(f"Bulk ingest into {table}: {len(inserted)} rows, {len(errors)} errors in {seconds:.2f}s")
+    return {
+        "inserted": len(inserted),
+        "failed": len(errors),
+        "ids": inserted,
+        "errors": sorted(errors, key=lambda error: error["line"]),
+        "seconds": round(seconds, 3),
+        "rows_per_second": round(len(inserted) / seconds, 1) if seconds > 0 else None
+    }
@@ -0,0 +1,101 @@
+import logging
+from psycopg2 import sql
+from psycopg2.extras import RealDictCursor
+from app.core import db_client
+from app.core.supabase_client import supabase
+from app.core.async_db import run_db
+from app.core.query_builder import IDENTIFIER
+from app.core.settings import CATALOG_PAGE_SIZE
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+CATALOG_TABLE = "data_catalog"
+
+def projection(columns):
+    """Validated column list for a page query, always including the keyset column; None selects all columns"""
+    if columns is None:
+        return None
+    columns = list(dict.fromkeys(["id", *columns]))
+    invalid = [column for column in columns if not IDENTIFIER.match(column)]
+    if invalid:
+        raise ValueError(f"Invalid catalog column(s): {', '.join(invalid)}")
+    return columns
+
+def fetch_supabase_page(columns, after_id, page_size):
+    query = supabase.table(CATALOG_TABLE).select(",".join(columns) if columns else "*").order("id").limit(page_size)
+    if after_id is not None:
+        query = query.gt("id", after_id)
+    return query.execute().data
+
+def fetch_postgres_page(columns, after_id, page_size):
+    if db_client.pool is None:
+        raise ValueError("Database connection pool is not initialized. Check DATABASE_URL in your .env file")
+    query = sql.SQL("SELECT {columns} FROM {table} {where} ORDER BY id LIMIT %s").format(
+        columns=sql.SQL(", ").join(sql.Identifier(column) for column in columns) if columns else sql.SQL("*"),
+        table=sql.Identifier(CATALOG_TABLE),
+        where=sql.SQL("WHERE id > %s" if after_id is not None else "")
+    )
+    params = (after_id, page_size) if after_id is not None else (page_size,)
+    conn = db_client.pool.getconn()
+    try:
+        with conn.cursor(cursor_factory=RealDictCursor) as cur:
+            cur.execute(query, params)
+            return cur.fetchall()
+    finally:
+        # Read-only: end the transaction so the connection goes back clean
+        conn.rollback()
+        db_client.pool.putconn(conn)
+
+def page_fetcher():
+    """Supabase when it is configured, else the direct PostgreSQL pool"""
+    if supabase is not None:
+        return fetch_supabase_page
+    if db_client.pool is not None:
+        return fetch_postgres_page
+    raise ValueError("No data catalog source configured. Check SUPABASE_URL or DATABASE_URL in your .env file")
+
+def fetch_catalog_page(columns=None, after_id=None, page_size=CATALOG_PAGE_SIZE):
+    """
+    Fetch one page of the data catalog, ordered by id
+
+    Args:
+        columns (list): Columns to return (id is always included); None for all columns
+        after_id: Return entries with an id greater than this (keyset cursor)
+        page_size (int): Maximum number of entries
+
+    Returns:
+        list: Catalog entries as dicts
+    """
+    return page_fetcher()(projection(columns), after_id, page_size)
+
+async def iter_catalog_pages(columns=None, page_size=CATALOG_PAGE_SIZE):
+    """
+    Stream the data catalog page by page with keyset pagination
+
+    Each page is fetched only after the previous one has been consumed, so
+    at most one page of raw rows is held at a time. Queries run on the
+    database executor to keep the event loop free.
+
+    Args:
+        columns (list): Columns to return (id is always included); None for all columns
+        page_size (int): Entries per page
+
+    Yields:
+        list: Catalog entries as dicts
+    """
+    fetch = page_fetcher()
+    columns = projection(columns)
+    after_id = None
+    pages = 0
+    while True:
+        page = await run_db(fetch, columns, after_id, page_size)
+        if not page:
+            break
+        pages += 1
+        yield page
+        if len(page) < page_size:
+            break
+        after_id = page[-1]["id"]
+    logger.info(f"Read the data catalog in {pages} page(s) of up to {page_size} entries")
@@ -0,0 +1,114 @@
+import base64
+import binascii
+import logging
+from functools import lru_cache
+import numpy as np
+from psycopg2.extras import Json
+from app.core import db_client
+from app.core.query_builder import quote
+from app.core.settings import QUERY_CACHE_SIZE, VECTOR_SEARCH_MAX_QUERIES, VECTOR_SEARCH_MAX_K
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def decode_vectors(data, dim):
+    """
+    Query vectors from packed little-endian float32 bytes
+
+    Args:
+        data (bytes): n * dim float32 values, query after query
+        dim (int): Dimensions per vector
+
+    Returns:
+        numpy.ndarray: Array of shape (n, dim)
+
+    Raises:
+        ValueError: The payload is empty, not a whole number of vectors, too large or not finite
+    """
+    if dim < 1:
+        raise ValueError("dim must be at least 1")
+    if not data or len(data) % (4 * dim):
+        raise ValueError(f"Payload of {len(data)} bytes is not a whole number of {dim}-dimension float32 vectors")
+    vectors = np.frombuffer(data, dtype="<f4").reshape(-1, dim)
+    if len(vectors) > VECTOR_SEARCH_MAX_QUERIES:
+        raise ValueError(f"At most {VECTOR_SEARCH_MAX_QUERIES} query vectors per request, got {len(vectors)}")
+    if not np.isfinite(vectors).all():
+        raise ValueError("Query vectors must be finite")
+    return vectors
+
+def decode_base64_vectors(text, dim):
+    try:
+        return decode_vectors(base64.b64decode(text, validate=True), dim)
+    except binascii.Error as e:
+        raise ValueError(f"Invalid base64 payload: {str(e)}")
+
+def check_search(query_count, k, filters):
+    """Validated per-query filters (None for every query if not given); raises ValueError on bad arguments"""
+    if not 1 <= k <= VECTOR_SEARCH_MAX_K:
+        raise ValueError(f"k must be between 1 and {VECTOR_SEARCH_MAX_K}")
+    filters = filters if filters is not None else [None] * query_count
+    if len(filters) != query_count:
+        raise ValueError(f"Expected one filter per query vector ({query_count}), got {len(filters)}")
+    for query_filter in filters:
+        if query_filter is not None and not isinstance(query_filter, dict):
+            raise ValueError("Each filter must be an object of column: value pairs, or null")
+        for column in query_filter or {}:
+            quote(column)
+    return filters
+
+@lru_cache(maxsize=QUERY_CACHE_SIZE)
+def batch_search_sql(filter_columns):
+    """
+    One query running every search of a batch (one LATERAL nearest-neighbour scan per query vector)
+
+    The vectors travel as one flat real[] and each query slices out its own;
+    a query's filter only constrains the columns it names.
+    """
+    conditions = "".join(
+        f"\n          AND (NOT queries.filter ? '{column}' OR c.{quote(column)}::text = queries.filter ->> '{column}')"
+        for column in filter_columns
+    )
+    return f"""
+    WITH queries AS (
+        SELECT q.ordinality - 1 AS query_index, q.filter,
+               (%(vectors)s::real[])[(q.ordinality - 1) * %(dim)s + 1:q.ordinality * %(dim)s]::vector AS embedding
+        FROM unnest(%(filters)s::jsonb[]) WITH ORDINALITY AS q(filter, ordinality)
+    )
+    SELECT queries.query_index, hits.id, hits.content, hits.distance
+    FROM queries
+    CROSS JOIN LATERAL (
+        SELECT c.id, c.content, c.embedding <-> queries.embedding AS distance
+        FROM document_chunks c
+        WHERE TRUE{conditions}
+        ORDER BY c.embedding <-> queries.embedding
+        LIMIT %(k)s
+    ) hits
+    ORDER BY queries.query_index, hits.distance
+    """
+
+def search_document_chunks(vectors, k=5, filters=None):
+    """
+    Nearest document chunks for a batch of query vectors, in one round trip
+
+    Args:
+        vectors (numpy.ndarray): Array of shape (n, dim)
+        k (int): Matches per query
+        filters (list): Optional {column: value} equality filter per query (None for no filter)
+
+    Returns:
+        list: For each query, up to k {"id", "content", "distance"} dicts, nearest first
+    """
+    filters = check_search(len(vectors), k, filters)
+    filter_columns = tuple(sorted({column for query_filter in filters for column in (query_filter or {})}))
+
+    rows = db_client.execute_query(batch_search_sql(filter_columns), {
+        "vectors": vectors.ravel().tolist(),
+        "dim": vectors.shape[1],
+        "filters": [Json(query_filter or {}) for query_filter in filters],
+        "k": k
+    })
+    results = [[] for _ in vectors]
+    for row in rows:
+        results[row["query_index"]].append({"id": row["id"], "content": row["content"], "distance": row["distance"]})
+    return results
@@ -1,30 +1,38 @@
 import os
+import uuid
 import psycopg2
+from psycopg2 import errorcodes
 from psycopg2.extras import RealDictCursor
-from psycopg2.pool import ThreadedConnectionPool
-from app.core.settings import DATABASE_URL
+from app.core import query_builder
+from app.core.db_pool import ManagedPool
+from app.core.settings import (
+    DATABASE_URL, DB_POOL_MIN_CONNECTIONS, DB_POOL_MAX_CONNECTIONS, DB_QUERY_TIMEOUT_SECONDS, DB_STREAM_FETCH_SIZE,
+    DB_PREPARED_STATEMENTS, DB_POOL_WAIT_SECONDS, DB_POOL_VALIDATE_IDLE_SECONDS, DB_POOL_IDLE_TIMEOUT_SECONDS,
+    DB_POOL_MAX_LIFETIME_SECONDS
+)
 import logging
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Initialize connection pool if DATABASE_URL is available
+# Create the connection pool if DATABASE_URL is available. No connection is opened until
+# the first query (or the background warm-up the application starts).
 pool = None
 if DATABASE_URL:
-    try:
-        pool = ThreadedConnectionPool(
-            minconn=5,
-            maxconn=20,
-            dsn=DATABASE_URL
-        )
-        logger.info("Database connection pool initialized successfully")
-    except Exception as e:
-        logger.error(f"Error initializing database connection pool: {str(e)}")
+    pool = ManagedPool(
+        DATABASE_URL,
+        minconn=DB_POOL_MIN_CONNECTIONS,
+        maxconn=DB_POOL_MAX_CONNECTIONS,
+        wait_seconds=DB_POOL_WAIT_SECONDS,
+        validate_idle_seconds=DB_POOL_VALIDATE_IDLE_SECONDS,
+        idle_timeout_seconds=DB_POOL_IDLE_TIMEOUT_SECONDS,
+        max_lifetime_seconds=DB_POOL_MAX_LIFETIME_SECONDS
+    )
 else:
     logger.warning("DATABASE_URL is not set. Direct database access will not be available")
 
-def execute_query(query, params=None, fetch=True):
+def execute_query(query, params=None, fetch=True, timeout_seconds=DB_QUERY_TIMEOUT_SECONDS):
     """
     Execute a SQL query with connection pooling
     
@@ -32,6 +40,7 @@ def execute_query(query, params=None, fetch=True):
         query (str): SQL query to execute
         params (tuple|dict): Parameters for the query
         fetch (bool): Whether to fetch results or not
+        timeout_seconds (float): PostgreSQL cancels the query after this long; None for no limit
         
     Returns:
         list: Query results (if fetch=True)
@@ -42,6 +51,8 @@ def execute_query(query, params=None, fetch=True):
     conn = pool.getconn()
     try:
         with conn.cursor(cursor_factory=RealDictCursor) as cur:
+            if timeout_seconds:
+                cur.execute("SET LOCAL statement_timeout = %s", (int(timeout_seconds * 1000),))
             cur.execute(query, params)
             
             if fetch:
@@ -56,6 +67,68 @@ def execute_query(query, params=None, fetch=True):
     finally:
         pool.putconn(conn)
 
+def is_stale_plan(error):
+    """Whether PostgreSQL rejected a prepared statement because its table's columns changed"""
+    return (
+        getattr(error, "pgcode", None) == errorcodes.FEATURE_NOT_SUPPORTED
+        and "cached plan must not change result type" in str(error)
+    )
+
+def execute_statement(statement, params, fetch=True, timeout_seconds=DB_QUERY_TIMEOUT_SECONDS):
+    """
+    Execute a query_builder statement, as a server-side prepared statement when enabled
+    
+    Each pooled connection prepares a statement the first time it runs it and
+    reuses the plan afterwards, so repeated queries skip parsing and planning.
+    
+    Args:
+        statement (query_builder.Statement): Generated SQL
+        params (tuple): Parameters in statement order
+        fetch (bool): Whether to fetch results or not (a write is committed either way)
+        timeout_seconds (float): PostgreSQL cancels the query after this long; None for no limit
+        
+    Returns:
+        list: Query results (if fetch=True), else the number of rows affected
+    """
+    if pool is None:
+        raise ValueError("Database connection pool is not initialized. Check DATABASE_URL in your .env file")
+        
+    conn = pool.getconn()
+    try:
+        for attempt in range(2):
+            try:
+                with conn.cursor(cursor_factory=RealDictCursor) as cur:
+                    if timeout_seconds:
+                        cur.execute("SET LOCAL statement_timeout = %s", (int(timeout_seconds * 1000),))
+                    if not DB_PREPARED_STATEMENTS:
+                        cur.execute(statement.text, params)
+                    else:
+                        if statement.name not in conn.prepared:
+                            cur.execute(statement.prepare)
+                            conn.prepared.add(statement.name)
+                        cur.execute(statement.execute, params)
+                    results = cur.fetchall() if fetch else cur.rowcount
+                    conn.commit()
+                    return results
+            except Exception as e:
+                conn.rollback()
+                if not DB_PREPARED_STATEMENTS or not is_stale_plan(e):
+                    raise e
+                # A migration changed the columns behind a prepared SELECT *: drop the session's
+                # statements and run the rolled-back statement once more, freshly prepared
+                try:
+                    with conn.cursor() as cur:
+                        cur.execute("DEALLOCATE ALL")
+                    conn.commit()
+                except psycopg2.Error:
+                    conn.rollback()
+                conn.prepared.clear()
+                if attempt:
+                    raise e
+                logger.info(f"Re-preparing {statement.name} after a table changed shape")
+    finally:
+        pool.putconn(conn)
+
 def get_document_chunks(query_embedding, limit=5):
     """
     Perform vector similarity search on document_chunks
@@ -68,9 +141,9 @@ def get_document_chunks(query_embedding, limit=5):
         list: Matching documents
     """
     query = """
-    SELECT *
+    SELECT id, content, embedding <-> %s::vector AS distance
     FROM document_chunks
-    ORDER BY embedding <-> %s::vector
+    ORDER BY distance
     LIMIT %s
     """
     return execute_query(query, (query_embedding, limit))
@@ -86,16 +159,7 @@ def insert_data(table, data):
     Returns:
         int: Number of rows affected
     """
-    columns = ", ".join(data.keys())
-    placeholders = ", ".join([f"%({key})s" for key in data.keys()])
-    
-    query = f"""
-    INSERT INTO {table} ({columns})
-    VALUES ({placeholders})
-    RETURNING id
-    """
-    
-    return execute_query(query, data, fetch=True)
+    return execute_statement(*query_builder.insert_query(table, data))
 
 def get_records(table, conditions=None, limit=None):
     """
@@ -109,19 +173,45 @@ def get_records(table, conditions=None, limit=None):
     Returns:
         list: Query results
     """
-    query = f"SELECT * FROM {table}"
-    params = {}
-    
-    if conditions:
-        where_clauses = []
-        for i, (key, value) in enumerate(conditions.items()):
-            param_name = f"param_{i}"
-            where_clauses.append(f"{key} = %({param_name})s")
-            params[param_name] = value
-        
-        query += " WHERE " + " AND ".join(where_clauses)
+    return execute_statement(*query_builder.select_query(table, conditions, limit))
+
+def stream_query(query, params=None, fetch_size=DB_STREAM_FETCH_SIZE, timeout_seconds=DB_QUERY_TIMEOUT_SECONDS):
+    """
+    Run a query on a named server-side cursor and yield its rows in batches
     
-    if limit:
-        query += f" LIMIT {limit}"
+    Only fetch_size rows are held in memory at a time, however large the result.
+    The connection stays checked out until the generator is exhausted or closed.
     
-    return execute_query(query, params) 
\ No newline at end of file
+    Args:
+        query (str): SQL query to execute
+        params (tuple|dict): Parameters for the query
+        fetch_size (int): Rows fetched from the server per batch
+        timeout_seconds (float): PostgreSQL cancels any single fetch that runs longer; None for no limit
+        
+    Yields:
+        list: Up to fetch_size rows
+    """
+    if pool is None:
+        raise ValueError("Database connection pool is not initialized. Check DATABASE_URL in your .env file")
+        
+    conn = pool.getconn()
+    try:
+        if timeout_seconds:
+            with conn.cursor() as cur:
+                cur.execute("SET LOCAL statement_timeout = %s", (int(timeout_seconds * 1000),))
+        with conn.cursor(name=f"stream_{uuid.uuid4().hex}", cursor_factory=RealDictCursor) as cur:
+            cur.execute(query, params)
+            while True:
+                rows = cur.fetchmany(fetch_size)
+                if not rows:
+                    break
+                yield rows
+    finally:
+        # Read-only: ending the transaction also drops the cursor
+        conn.rollback()
+        pool.putconn(conn)
+
+def stream_records(table, conditions=None, limit=None, fetch_size=DB_STREAM_FETCH_SIZE):
+    """get_records as batches from a server-side cursor (see stream_query)"""
+    statement, params = query_builder.select_query(table, conditions, limit)
+    return stream_query(statement.text, params, fetch_size)
@@ -0,0 +1,233 @@
+import threading
+import time
+import logging
+from collections import deque
+import psycopg2
+from psycopg2 import extensions
+from psycopg2.pool import PoolError
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class PoolTimeout(PoolError):
+    """No connection became free within the pool's wait timeout"""
+
+class PreparingConnection(extensions.connection):
+    """Connection that remembers which query_builder statements it has prepared (they live per session)"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prepared = set()
+        self.opened_at = time.monotonic()
+
+class ManagedPool:
+    """
+    Thread-safe PostgreSQL connection pool, a drop-in for ThreadedConnectionPool
+
+    Nothing is opened until the first checkout (or warm()). When maxconn
+    connections are checked out, getconn waits up to wait_seconds for one to
+    come back instead of failing at once. Idle connections are pinged before
+    reuse once they have sat for validate_idle_seconds, and closed after
+    idle_timeout_seconds (above minconn) or max_lifetime_seconds.
+    """
+
+    def __init__(self, dsn, minconn, maxconn, wait_seconds, validate_idle_seconds, idle_timeout_seconds, max_lifetime_seconds):
+        self.dsn = dsn
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.wait_seconds = wait_seconds
+        self.validate_idle_seconds = validate_idle_seconds
+        self.idle_timeout_seconds = idle_timeout_seconds
+        self.max_lifetime_seconds = max_lifetime_seconds
+        self.closed = False
+        self._idle = deque()  # (connection, returned at), most recently returned last
+        self._in_use = set()
+        self._condition = threading.Condition()
+        # Checkouts that hold a slot but are not in use yet (opening or being pinged)
+        self._pending = 0
+        self._metrics = {
+            "opened": 0, "closed_stale": 0, "closed_idle": 0, "closed_broken": 0, "timeouts": 0,
+            "checkouts": 0, "waits": 0, "wait_seconds": 0.0, "max_wait_seconds": 0.0,
+            "checkout_seconds": 0.0, "max_checkout_seconds": 0.0
+        }
+
+    def getconn(self):
+        """
+        Check out a healthy connection
+
+        Raises:
+            PoolTimeout: Every connection stayed in use for wait_seconds
+            PoolError: The pool is closed
+            psycopg2.OperationalError: A new connection could not be opened
+        """
+        started = time.monotonic()
+        waited = False
+        while True:
+            with self._condition:
+                while True:
+                    if self.closed:
+                        raise PoolError("connection pool is closed")
+                    if self._idle:
+                        conn, returned_at = self._idle.pop()
+                        self._pending += 1
+                        break
+                    if len(self._in_use) + self._pending < self.maxconn:
+                        conn, returned_at = None, None
+                        self._pending += 1
+                        break
+                    remaining = self.wait_seconds - (time.monotonic() - started)
+                    if remaining <= 0:
+                        self._metrics["timeouts"] += 1
+                        raise PoolTimeout(f"No database connection free after {self.wait_seconds}s ({self.maxconn} in use)")
+                    waited = True
+                    self._condition.wait(remaining)
+
+            # Opening and pinging happen outside the lock so other threads are not held up
+            try:
+                if conn is None:
+                    conn = self._open()
+                elif not self._usable(conn, returned_at):
+                    conn = None
+            finally:
+                with self._condition:
+                    self._pending -= 1
+                    if conn is None:
+                        self._condition.notify()
+                    else:
+                        self._in_use.add(conn)
+                        self._record(time.monotonic() - started, waited)
+            if conn is not None:
+                return conn
+
+    def putconn(self, conn, close=False):
+        """Return a connection; it is rolled back to a clean state, or closed if broken or close=True"""
+        with self._condition:
+            self._in_use.discard(conn)
+        broken = conn.closed
+        if not close and not broken:
+            try:
+                if conn.info.transaction_status != extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+                broken = conn.info.transaction_status != extensions.TRANSACTION_STATUS_IDLE
+            except psycopg2.Error:
+                broken = True
+        if close or broken:
+            self._close(conn, "closed_broken" if broken else None)
+            with self._condition:
+                self._condition.notify()
+            return
+        with self._condition:
+            if self.closed:
+                conn.close()
+                return
+            self._idle.append((conn, time.monotonic()))
+            self._recycle_idle()
+            self._condition.notify()
+
+    def open(self):
+        """Accept checkouts again after closeall (e.g. a new application lifespan)"""
+        with self._condition:
+            self.closed = False
+
+    def warm(self):
+        """Open connections until minconn exist (e.g. in the background after startup); returns how many were opened"""
+        opened = 0
+        while True:
+            with self._condition:
+                if self.closed or len(self._idle) + len(self._in_use) + self._pending >= self.minconn:
+                    return opened
+                self._pending += 1
+            conn = None
+            try:
+                conn = self._open()
+            except Exception as e:
+                logger.error(f"Error warming database connection pool: {str(e)}")
+            finally:
+                with self._condition:
+                    self._pending -= 1
+                    if conn is not None:
+                        self._idle.append((conn, time.monotonic()))
+                    self._condition.notify()
+            if conn is None:
+                return opened
+            opened += 1
+
+    def closeall(self):
+        """Close idle connections and refuse checkouts until open(); checked-out connections close when returned"""
+        with self._condition:
+            self.closed = True
+            idle, self._idle = list(self._idle), deque()
+            self._condition.notify_all()
+        for conn, _ in idle:
+            conn.close()
+
+    def stats(self):
+        with self._condition:
+            metrics = dict(self._metrics)
+            in_use, idle = len(self._in_use), len(self._idle)
+        checkouts, waits = metrics.pop("checkouts"), metrics["waits"]
+        wait_seconds, checkout_seconds = metrics.pop("wait_seconds"), metrics.pop("checkout_seconds")
+        return {
+            "in_use": in_use,
+            "idle": idle,
+            "max_connections": self.maxconn,
+            "saturation": round(in_use / self.maxconn, 3),
+            "checkouts": checkouts,
+            "avg_wait_ms": round(wait_seconds / waits * 1000, 3) if waits else 0.0,
+            "max_wait_ms": round(metrics.pop("max_wait_seconds") * 1000, 3),
+            "avg_checkout_ms": round(checkout_seconds / checkouts * 1000, 3) if checkouts else 0.0,
+            "max_checkout_ms": round(metrics.pop("max_checkout_seconds") * 1000, 3),
+            **metrics
+        }
+
+    def _open(self):
+        conn = psycopg2.connect(self.dsn, connection_factory=PreparingConnection)
+        with self._condition:
+            self._metrics["opened"] += 1
+        return conn
+
+    def _usable(self, conn, returned_at):
+        """Closes and returns False for connections that are broken, too old or fail a ping"""
+        if conn.closed or time.monotonic() - conn.opened_at > self.max_lifetime_seconds:
+            self._close(conn, "closed_stale")
+            return False
+        if time.monotonic() - returned_at > self.validate_idle_seconds:
+            try:
+                with conn.cursor() as cur:
+                    cur.execute("SELECT 1")
+                conn.rollback()
+            except psycopg2.Error:
+                self._close(conn, "closed_stale")
+                return False
+        return True
+
+    def _recycle_idle(self):
+        """Close connections idle past idle_timeout_seconds, keeping minconn open (call with the lock held)"""
+        now = time.monotonic()
+        while (
+            self._idle and len(self._idle) + len(self._in_use) > self.minconn
+            and now - self._idle[0][1] > self.idle_timeout_seconds
+        ):
+            conn, _ = self._idle.popleft()
+            conn.close()
+            self._metrics["closed_idle"] += 1
+
+    def _close(self, conn, metric):
+        try:
+            conn.close()
+        except psycopg2.Error:
+            pass
+        if metric:
+            with self._condition:
+                self._metrics[metric] += 1
+
+    def _record(self, seconds, waited):
+        """Checkout latency metrics (call with the lock held)"""
+        self._metrics["checkouts"] += 1
+        self._metrics["checkout_seconds"] += seconds
+        self._metrics["max_checkout_seconds"] = max(self._metrics["max_checkout_seconds"], seconds)
+        if waited:
+            self._metrics["waits"] += 1
+            self._metrics["wait_seconds"] += seconds
+            self._metrics["max_wait_seconds"] = max(self._metrics["max_wait_seconds"], seconds)
@@ -0,0 +1,71 @@
+import hashlib
+import re
+from functools import lru_cache
+import numpy as np
+from app.core.settings import EMBEDDING_DIM
+
+WORD = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has in is it its of on or that the to was were will with "
+    "this these those their which all any each must shall may should".split()
+)
+
+# Catalog fields describing what an entry holds and how it is handled
+CATALOG_TEXT_FIELDS = ["name", "data_type", "description", "storage_location", "classification",
+                       "retention_period", "access_controls", "processing_purpose"]
+
+def tokens(text):
+    """Lowercased words without stopwords or plural s, plus adjacent word pairs"""
+    words = [word[:-1] if len(word) > 3 and word.endswith("s") else word
+             for word in WORD.findall(text.lower()) if word not in STOPWORDS]
+    return words + [f"{first} {second}" for first, second in zip(words, words[1:])]
+
+@lru_cache(maxsize=65536)
+def token_slot(token, dim):
+    """Dimension and sign a token hashes to"""
+    value = int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "little")
+    return value % dim, 1.0 if value >> 63 else -1.0
+
+def embed_texts(texts, dim=EMBEDDING_DIM):
+    """
+    Embed texts locally with signed feature hashing of words and word pairs
+
+    Needs no model or network access, and the same text always gets the same
+    vector, so indexes built offline stay valid across restarts.
+
+    Args:
+        texts (list): Texts to embed
+        dim (int): Embedding dimension
+
+    Returns:
+        numpy.ndarray: float32 array of shape (len(texts), dim) with unit-length rows
+            (all-zero for texts without words)
+    """
+    vectors = np.zeros((len(texts), dim), dtype=np.float32)
+    for row, text in enumerate(texts):
+        for token in tokens(text or ""):
+            column, sign = token_slot(token, dim)
+            vectors[row, column] += sign
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return np.divide(vectors, norms, out=vectors, where=norms > 0)
+
+def catalog_text(entry):
+    """Text embedded for a data catalog entry"""
+    return ". ".join(str(entry[field]) for field in CATALOG_TEXT_FIELDS if entry.get(field))
+
+def requirement_chunks(regulation_diff):
+    """
+    Requirement texts of a regulation diff: one per changed section, else one per sentence of its content
+
+    Returns:
+        list: (chunk id suffix, text) pairs
+    """
+    changes = regulation_diff.get("changes") or []
+    chunks = [
+        (f"change-{index}", f"{change.get('section', '')}: {change.get('new_text', '')}")
+        for index, change in enumerate(changes) if change.get("new_text")
+    ]
+    if not chunks:
+        sentences = re.split(r"(?<=[.!?])\s+", regulation_diff.get("content") or regulation_diff.get("summary") or "")
+        chunks = [(f"sentence-{index}", sentence) for index, sentence in enumerate(sentences) if sentence.strip()]
+    return chunks
@@ -0,0 +1,272 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import operator
+import logging
+from collections import OrderedDict
+from datetime import datetime
+from app.core.settings import ASSESSMENT_STORE_PATH, ASSESSMENT_MEMORY_SIZE
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def fingerprint(row):
+    """Content hash of an entry's values for the fields a rule set reads; other fields cannot change its findings"""
+    return hashlib.blake2b(repr(row).encode("utf-8"), digest_size=16).hexdigest()
+
+def field_rows(entries, fields):
+    """The values of the given fields for every entry, as one tuple per entry"""
+    if len(fields) == 1:
+        return [(entry.get(fields[0]),) for entry in entries]
+    try:
+        return list(map(operator.itemgetter(*fields), entries))
+    except KeyError:
+        return [tuple(entry.get(field) for field in fields) for entry in entries]
+
+class AssessmentState:
+    """
+    Result of the last assessment of one regulation diff
+
+    Keeps the fingerprint of every entry (by id, in catalog order) and the
+    findings of the entries that have any. Catalog rows themselves are not
+    kept, so a state costs a few dozen bytes per entry.
+    """
+
+    def __init__(self, rule_version, fingerprints, findings):
+        self.rule_version = rule_version
+        self.fingerprints = fingerprints
+        self.findings = findings
+
+class AssessmentStore:
+    """
+    Per-entry results of previous assessments
+
+    Recent assessments stay in memory as AssessmentState. SQLite keeps, for
+    every entry that produced findings, its fingerprint and findings under
+    the rule version that produced them, so results survive restarts.
+    Entries without findings are not stored; after a restart they are simply
+    evaluated again. Writes touch only the entries that changed.
+    """
+
+    def __init__(self, db_path, memory_size):
+        self.db_path = db_path
+        self.memory_size = memory_size
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def get(self, regulation_diff_id, regulation):
+        """The in-memory state of the last assessment, or None"""
+        key = (regulation_diff_id, regulation)
+        with self._lock:
+            state = self._memory.get(key)
+            if state is not None:
+                self._memory.move_to_end(key)
+            return state
+
+    def load(self, regulation_diff_id, regulation, rule_version):
+        """Entry id -> (fingerprint, findings) from disk; empty if nothing was stored for this rule version"""
+        key = (regulation_diff_id, regulation)
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute(
+                "SELECT rule_version FROM assessment_runs WHERE regulation_diff_id = ? AND regulation = ?", key
+            ).fetchone()
+            if row is None or row[0] != rule_version:
+                return {}
+            rows = conn.execute(
+                "SELECT entry_id, fingerprint, findings FROM assessment_entries "
+                "WHERE regulation_diff_id = ? AND regulation = ?", key
+            ).fetchall()
+        return {entry_id: (entry_fingerprint, json.loads(findings)) for entry_id, entry_fingerprint, findings in rows}
+
+    def save(self, regulation_diff_id, regulation, state, upserts, deletes, replace=False):
+        """
+        Keep a new assessment, writing only what changed to disk
+
+        Args:
+            state (AssessmentState): The assessment
+            upserts (list): (entry id, fingerprint, findings) of re-evaluated entries with findings
+            deletes (list): Ids of entries that were removed or no longer have findings
+            replace (bool): Drop everything stored before (e.g. the rule version changed)
+        """
+        key = (regulation_diff_id, regulation)
+        with self._lock:
+            self._memory[key] = state
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_size:
+                self._memory.popitem(last=False)
+
+            conn = self._connection()
+            if replace:
+                conn.execute("DELETE FROM assessment_entries WHERE regulation_diff_id = ? AND regulation = ?", key)
+            conn.executemany(
+                "INSERT OR REPLACE INTO assessment_entries "
+                "(regulation_diff_id, regulation, entry_id, fingerprint, findings) VALUES (?, ?, ?, ?, ?)",
+                [(*key, entry_id, entry_fingerprint, json.dumps(findings, default=str))
+                 for entry_id, entry_fingerprint, findings in upserts]
+            )
+            conn.executemany(
+                "DELETE FROM assessment_entries WHERE regulation_diff_id = ? AND regulation = ? AND entry_id = ?",
+                [(*key, entry_id) for entry_id in deletes]
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO assessment_runs (regulation_diff_id, regulation, rule_version, assessed_at) "
+                "VALUES (?, ?, ?, ?)",
+                (*key, state.rule_version, datetime.now().isoformat())
+            )
+            conn.commit()
+
+    def _connection(self):
+        if self._conn is None:
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=30)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS assessment_runs ("
+                "regulation_diff_id TEXT, regulation TEXT, rule_version TEXT, assessed_at TEXT, "
+                "PRIMARY KEY (regulation_diff_id, regulation))"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS assessment_entries ("
+                "regulation_diff_id TEXT, regulation TEXT, entry_id TEXT, fingerprint TEXT, findings TEXT, "
+                "PRIMARY KEY (regulation_diff_id, regulation, entry_id))"
+            )
+            self._conn.commit()
+        return self._conn
+
+def row_entries(rows, fields):
+    """Entries rebuilt from field rows; holds every field a rule set can read"""
+    return [dict(zip(fields, row)) for row in rows]
+
+class IncrementalAssessment:
+    """
+    Evaluate a rule set over the catalog page by page, re-running rules only
+    for entries that were added or changed since the last assessment of this diff
+
+    Each page is compared with the previous assessment by fingerprint, its
+    findings are collected, and the page is dropped, so memory holds the
+    fingerprints and findings but never the whole catalog. Findings of
+    unchanged entries are reused and findings of deleted entries are dropped;
+    the result is the same as evaluating the whole catalog.
+
+    Entries without an id, or repeating an earlier id, cannot be matched with
+    previous results: they are always evaluated, and the assessment is not
+    kept for next time.
+    """
+
+    def __init__(self, store, rule_set, regulation_diff_id):
+        self.store = store
+        self.rule_set = rule_set
+        self.regulation_diff_id = regulation_diff_id
+        self._id_index = rule_set.fields.index("id")
+        previous = store.get(regulation_diff_id, rule_set.regulation)
+        if previous is not None and previous.rule_version == rule_set.version:
+            # Only read: the stored state is shared with concurrent assessments of this diff
+            self._previous, self._previous_findings = previous.fingerprints, previous.findings
+            self._replace = False
+        else:
+            # Nothing in memory (e.g. after a restart): compare with what is on disk
+            stored = store.load(regulation_diff_id, rule_set.regulation, rule_set.version)
+            self._previous = {key: entry_fingerprint for key, (entry_fingerprint, _) in stored.items()}
+            self._previous_findings = {key: findings for key, (_, findings) in stored.items()}
+            self._replace = not stored
+        self._fingerprints = {}
+        self._findings_by_id = {}
+        self._findings = []
+        self._upserts, self._deletes = [], []
+        self._keyed = True
+        self.entries = 0
+        self.evaluated = 0
+
+    def add_page(self, rows):
+        """
+        Assess the next page of the catalog
+
+        Args:
+            rows (list): Entries of the page as field_rows(entries, rule_set.fields)
+        """
+        keys, changed, unkeyed = [], [], []
+        for index, row in enumerate(rows):
+            entry_id = row[self._id_index]
+            key = None if entry_id is None else str(entry_id)
+            if key is None or key in self._fingerprints:
+                self._keyed = False
+                keys.append(None)
+                unkeyed.append(index)
+                continue
+            entry_fingerprint = fingerprint(row)
+            self._fingerprints[key] = entry_fingerprint
+            keys.append(key)
+            if self._previous.get(key) != entry_fingerprint:
+                changed.append(index)
+
+        # Only the changed entries go through the rules
+        fields = self.rule_set.fields
+        evaluated = {}
+        for finding in self.rule_set.evaluate(row_entries([rows[index] for index in changed], fields)):
+            del finding["id"]
+            evaluated.setdefault(str(finding["data_catalog_id"]), []).append(finding)
+        for index in unkeyed:
+            evaluated[index] = self.rule_set.evaluate(row_entries([rows[index]], fields))
+            for finding in evaluated[index]:
+                del finding["id"]
+
+        changed = set(changed)
+        for index, key in enumerate(keys):
+            if key is None:
+                self._findings.extend(evaluated[index])
+                continue
+            entry_findings = evaluated.get(key, []) if index in changed else self._previous_findings.get(key, [])
+            if entry_findings:
+                self._findings_by_id[key] = entry_findings
+                self._findings.extend(entry_findings)
+            if index in changed:
+                if entry_findings:
+                    self._upserts.append((key, self._fingerprints[key], entry_findings))
+                elif not self._replace:
+                    self._deletes.append(key)
+        self.entries += len(rows)
+        self.evaluated += len(changed) + len(unkeyed)
+
+    def finish(self):
+        """
+        Keep the assessment for next time once the whole catalog was added
+
+        Returns:
+            tuple: (findings, summary of what was evaluated, reused and removed)
+        """
+        removed = [key for key in self._previous if key not in self._fingerprints]
+        if self._keyed:
+            self.store.save(
+                self.regulation_diff_id,
+                self.rule_set.regulation,
+                AssessmentState(self.rule_set.version, self._fingerprints, self._findings_by_id),
+                self._upserts,
+                self._deletes + removed,
+                self._replace
+            )
+
+        # Number findings across the catalog in entry order, as a full evaluation would
+        findings = [
+            {"id": f"finding-{number}", **finding}
+            for number, finding in enumerate(self._findings, start=1)
+        ]
+        logger.info(f"Assessed {self.regulation_diff_id} ({self.rule_set.regulation}): {self.evaluated} of "
+                    f"{self.entries} entries evaluated, {len(removed)} removed")
+        return findings, {"rule_version": self.rule_set.version, "entries": self.entries, "evaluated": self.evaluated,
+                          "reused": self.entries - self.evaluated, "removed": len(removed)}
+
+def assess_incrementally(store, rule_set, regulation_diff_id, rows):
+    """IncrementalAssessment over a catalog given as one list of field rows"""
+    assessment = IncrementalAssessment(store, rule_set, regulation_diff_id)
+    assessment.add_page(rows)
+    return assessment.finish()
+
+# Shared store of previous assessment results
+assessment_store = AssessmentStore(ASSESSMENT_STORE_PATH, ASSESSMENT_MEMORY_SIZE)
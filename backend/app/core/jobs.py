@@ -0,0 +1,293 @@
+import asyncio
+import itertools
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+import logging
+from datetime import datetime
+from fastapi.encoders import jsonable_encoder
+from app.core.llm_scheduler import llm_request_context, PRIORITY_LEVELS, DEFAULT_LEVEL
+from app.core.settings import JOB_WORKERS, JOB_STORE_PATH, JOB_LEASE_SECONDS
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+JOB_COLUMNS = ["id", "kind", "status", "priority", "tenant", "payload", "result", "error",
+               "created_at", "started_at", "finished_at", "owner", "heartbeat_at"]
+FINISHED_STATUSES = ("succeeded", "failed", "cancelled")
+
+class JobStore:
+    """SQLite table holding job state, so status survives worker restarts"""
+
+    def __init__(self, path):
+        self.path = path
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def insert(self, job):
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                f"INSERT INTO jobs ({', '.join(JOB_COLUMNS)}) VALUES ({', '.join('?' for _ in JOB_COLUMNS)})",
+                [job.get(column) for column in JOB_COLUMNS]
+            )
+            conn.commit()
+
+    def claim(self, job_id, owner):
+        """Atomically move a queued job to running under owner's lease; False if another worker got it first"""
+        with self._lock:
+            conn = self._connection()
+            cursor = conn.execute(
+                "UPDATE jobs SET status = 'running', owner = ?, heartbeat_at = ?, started_at = ? "
+                "WHERE id = ? AND status = 'queued'",
+                (owner, time.time(), datetime.now().isoformat(), job_id)
+            )
+            conn.commit()
+        return cursor.rowcount == 1
+
+    def finish(self, job_id, owner, **fields):
+        """Record the outcome of a job this owner runs; no-op if it was cancelled or recovered meanwhile"""
+        assignments = ", ".join(f"{column} = ?" for column in fields)
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                f"UPDATE jobs SET {assignments} WHERE id = ? AND owner = ? AND status = 'running'",
+                [*fields.values(), job_id, owner]
+            )
+            conn.commit()
+
+    def renew(self, owner):
+        """Extend the lease on every job this owner is running"""
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "UPDATE jobs SET heartbeat_at = ? WHERE owner = ? AND status = 'running'", (time.time(), owner)
+            )
+            conn.commit()
+
+    def expire_leases(self, lease_seconds):
+        """Fail running jobs whose owner stopped renewing its lease; returns how many"""
+        with self._lock:
+            conn = self._connection()
+            cursor = conn.execute(
+                "UPDATE jobs SET status = 'failed', error = 'Interrupted: the worker running it stopped', "
+                "finished_at = ? WHERE status = 'running' AND (heartbeat_at IS NULL OR heartbeat_at < ?)",
+                (datetime.now().isoformat(), time.time() - lease_seconds)
+            )
+            conn.commit()
+        return cursor.rowcount
+
+    def update(self, job_id, **fields):
+        assignments = ", ".join(f"{column} = ?" for column in fields)
+        with self._lock:
+            conn = self._connection()
+            conn.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", [*fields.values(), job_id])
+            conn.commit()
+
+    def get(self, job_id):
+        with self._lock:
+            row = self._connection().execute(
+                f"SELECT {', '.join(JOB_COLUMNS)} FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        job = dict(zip(JOB_COLUMNS, row))
+        for column in ("payload", "result"):
+            if job[column] is not None:
+                job[column] = json.loads(job[column])
+        return job
+
+    def list_queued(self):
+        with self._lock:
+            return self._connection().execute(
+                "SELECT id, priority FROM jobs WHERE status = 'queued' ORDER BY created_at"
+            ).fetchall()
+
+    def _connection(self):
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id TEXT PRIMARY KEY, kind TEXT, status TEXT, priority TEXT, tenant TEXT, "
+                "payload TEXT, result TEXT, error TEXT, "
+                "created_at TEXT, started_at TEXT, finished_at TEXT, owner TEXT, heartbeat_at REAL)"
+            )
+            # Stores created before job leases existed
+            existing = {row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+            for column, column_type in (("owner", "TEXT"), ("heartbeat_at", "REAL")):
+                if column not in existing:
+                    self._conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {column_type}")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status)")
+            self._conn.commit()
+        return self._conn
+
+class JobManager:
+    """
+    Background job queue with a fixed-size worker pool
+
+    Submitting returns a job id immediately. Workers pick jobs in priority
+    order and run the handler registered for the job's kind. A handler fails
+    the job by raising or by returning {"status": "error", ...}.
+
+    Several worker processes can share one store. A worker claims a job
+    atomically before running it, so a job queued in more than one process
+    still runs once, and holds a lease on it that it renews while running.
+    Queued jobs in the store are picked up on start. Running jobs are only
+    marked failed once their lease has expired, i.e. their process is gone.
+    """
+
+    def __init__(self, store, workers, lease_seconds=JOB_LEASE_SECONDS):
+        self.store = store
+        self.worker_count = workers
+        self.lease_seconds = lease_seconds
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._lease_task = None
+        self._handlers = {}
+        self._queue = None
+        self._workers = []
+        self._running = {}
+        self._sequence = itertools.count()
+
+    def register(self, kind, handler):
+        """Register an async handler(payload, job) that runs jobs of this kind"""
+        self._handlers[kind] = handler
+
+    @property
+    def kinds(self):
+        return sorted(self._handlers)
+
+    async def start(self):
+        self._queue = asyncio.PriorityQueue()
+        await asyncio.to_thread(self.store.expire_leases, self.lease_seconds)
+        for job_id, priority in await asyncio.to_thread(self.store.list_queued):
+            self._enqueue(job_id, priority)
+        self._workers = [asyncio.create_task(self._work(index)) for index in range(self.worker_count)]
+        self._lease_task = asyncio.create_task(self._keep_leases())
+        logger.info(f"Started {self.worker_count} background job workers")
+
+    async def stop(self):
+        tasks = [*self._workers, *([self._lease_task] if self._lease_task else [])]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._workers = []
+        self._lease_task = None
+
+    async def submit(self, kind, payload, priority=None, tenant=None):
+        """Queue a job and return its id"""
+        if kind not in self._handlers:
+            raise ValueError(f"Unknown job kind '{kind}'. Use one of: {', '.join(self.kinds)}")
+        if self._queue is None:
+            raise RuntimeError("Job workers are not running")
+
+        job = {
+            "id": str(uuid.uuid4()),
+            "kind": kind,
+            "status": "queued",
+            "priority": priority,
+            "tenant": tenant,
+            "payload": json.dumps(jsonable_encoder(payload)),
+            "created_at": datetime.now().isoformat()
+        }
+        await asyncio.to_thread(self.store.insert, job)
+        self._enqueue(job["id"], priority)
+        return job["id"]
+
+    async def get(self, job_id):
+        return await asyncio.to_thread(self.store.get, job_id)
+
+    async def cancel(self, job_id):
+        """Cancel a queued or running job; returns the job, or None if it does not exist"""
+        job = await self.get(job_id)
+        if job is None or job["status"] in FINISHED_STATUSES:
+            return job
+        task = self._running.get(job_id)
+        if task is not None:
+            task.cancel()
+        await asyncio.to_thread(
+            self.store.update, job_id, status="cancelled", finished_at=datetime.now().isoformat()
+        )
+        return await self.get(job_id)
+
+    def stats(self):
+        return {
+            "workers": len(self._workers),
+            "queued": self._queue.qsize() if self._queue else 0,
+            "running": len(self._running),
+            "kinds": self.kinds
+        }
+
+    def _enqueue(self, job_id, priority):
+        level = PRIORITY_LEVELS.get(str(priority).lower(), DEFAULT_LEVEL) if priority else DEFAULT_LEVEL
+        self._queue.put_nowait((level, next(self._sequence), job_id))
+
+    async def _work(self, index):
+        while True:
+            _, _, job_id = await self._queue.get()
+            try:
+                await self._run(job_id)
+            except Exception as e:
+                logger.error(f"Job worker {index} failed on job {job_id}: {str(e)}")
+            finally:
+                self._queue.task_done()
+
+    async def _keep_leases(self):
+        """Renew this process's leases, and fail jobs of processes that stopped renewing theirs"""
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                await asyncio.to_thread(self.store.renew, self.owner)
+                expired = await asyncio.to_thread(self.store.expire_leases, self.lease_seconds)
+                if expired:
+                    logger.warning(f"Marked {expired} jobs failed after their worker's lease expired")
+            except Exception as e:
+                logger.error(f"Error renewing job leases: {str(e)}")
+
+    async def _run(self, job_id):
+        job = await self.get(job_id)
+        if job is None or job["kind"] not in self._handlers:
+            return
+        if not await asyncio.to_thread(self.store.claim, job_id, self.owner):
+            # Cancelled while waiting in the queue, or claimed by another worker process
+            return
+
+        handler = self._handlers[job["kind"]]
+
+        async def run():
+            # Awaited inside the task, so a payload the handler rejects fails the job instead of the worker
+            return await handler(job["payload"], job)
+
+        with llm_request_context(job["priority"], job["tenant"]):
+            task = asyncio.create_task(run())
+        self._running[job_id] = task
+        try:
+            result = await task
+            fields = {"status": "succeeded", "result": json.dumps(jsonable_encoder(result))}
+            # Some endpoints report failure in the response body instead of raising
+            if isinstance(result, dict) and result.get("status") == "error":
+                fields.update(status="failed", error=result.get("message") or "Job returned an error")
+        except asyncio.CancelledError:
+            if not task.cancelled():
+                # The worker itself is being stopped
+                task.cancel()
+                raise
+            fields = {"status": "cancelled"}
+        except Exception as e:
+            detail = getattr(e, "detail", None) or str(e)
+            fields = {"status": "failed", "error": detail}
+        finally:
+            self._running.pop(job_id, None)
+
+        await asyncio.to_thread(self.store.finish, job_id, self.owner, finished_at=datetime.now().isoformat(), **fields)
+
+# Shared job manager, started in the app lifespan
+job_manager = JobManager(JobStore(JOB_STORE_PATH), JOB_WORKERS)
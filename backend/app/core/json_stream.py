@@ -0,0 +1,62 @@
+import json
+import logging
+from datetime import date, datetime
+from decimal import Decimal
+from fastapi.responses import StreamingResponse
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+FORMATS = {"json": "application/json", "ndjson": "application/x-ndjson"}
+
+def json_default(value):
+    """Encode the database types json cannot: dates as ISO 8601, decimals as numbers, anything else as text"""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return str(value)
+
+def dumps(row):
+    return json.dumps(row, default=json_default)
+
+async def encode(first, batches, body_format):
+    """Body chunks (one per batch) of a JSON array or NDJSON document"""
+    separator = "," if body_format == "json" else "\n"
+    if body_format == "json":
+        yield "["
+    started = False
+    try:
+        batch = first
+        while batch is not None:
+            if batch:
+                chunk = separator.join(dumps(row) for row in batch)
+                yield (separator if started and body_format == "json" else "") + chunk + ("\n" if body_format == "ndjson" else "")
+                started = True
+            batch = await anext(batches, None)
+    except Exception as e:
+        # Headers are already sent, so the body is cut short instead (an unterminated array for JSON)
+        logger.error(f"Error streaming rows: {str(e)}")
+        return
+    finally:
+        await batches.aclose()
+    if body_format == "json":
+        yield "]"
+
+async def rows_response(batches, body_format="json"):
+    """
+    Stream batches of rows as a JSON array or NDJSON response
+
+    The first batch is fetched before the response starts, so errors such as
+    a missing connection pool or a bad query still surface as exceptions
+    the endpoint can turn into an HTTP error.
+
+    Args:
+        batches: Async iterator of row batches, as from async_db.stream
+        body_format (str): "json" for one array, "ndjson" for one object per line
+    """
+    if body_format not in FORMATS:
+        raise ValueError(f"Unknown format '{body_format}'. Use one of: {', '.join(FORMATS)}")
+    first = await anext(batches, None)
+    return StreamingResponse(encode(first, batches, body_format), media_type=FORMATS[body_format])
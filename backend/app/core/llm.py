@@ -0,0 +1,111 @@
+import os
+import threading
+import logging
+from langchain_core.messages import AIMessage
+from app.core.llm_cache import llm_cache, cache_key
+from app.core.llm_http import llm_http_pool
+from app.core.llm_providers import create_chat_model, UNCACHED_PROVIDERS
+from app.core.llm_scheduler import llm_scheduler, estimate_tokens
+from app.core.settings import LLM_PROVIDER
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL = "gpt-4o-mini"
+
+# Shared LLM clients, keyed by (provider, model, api key, extra params)
+_clients = {}
+_clients_lock = threading.Lock()
+
+def current_provider():
+    """The configured LLM provider, read at call time"""
+    return os.environ.get("LLM_PROVIDER", LLM_PROVIDER)
+
+def get_llm(model=DEFAULT_MODEL, **params):
+    """
+    Get the shared chat model client for a model, creating it on first use
+
+    The provider and API key are read at call time, so changing LLM_PROVIDER
+    or OPENAI_API_KEY in the environment transparently produces a fresh
+    client on the next call.
+
+    Args:
+        model (str): Model name
+        **params: Extra ChatOpenAI parameters (temperature, max_tokens, ...)
+
+    Returns:
+        BaseChatModel: Shared client instance
+    """
+    provider = current_provider()
+    api_key = os.environ.get("OPENAI_API_KEY")
+
+    key = (provider, model, api_key, tuple(sorted(params.items())))
+    client = _clients.get(key)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(key)
+            if client is None:
+                client = create_chat_model(provider, model, api_key, params)
+                _clients[key] = client
+                logger.info(f"Created shared {provider} LLM client for model {model}")
+    return client
+
+def reset_llm_clients():
+    """Drop all shared clients so the next call rebuilds them from current settings"""
+    with _clients_lock:
+        _clients.clear()
+
+async def close_llm_clients():
+    """Drop all shared clients and close their connection pools; called on app shutdown"""
+    reset_llm_clients()
+    await llm_http_pool.aclose()
+
+def llm_client_stats():
+    """Shared chat clients and the state of their connection pools"""
+    with _clients_lock:
+        models = sorted({(provider, model) for provider, model, _, _ in _clients})
+    return {
+        "clients": [{"provider": provider, "model": model} for provider, model in models],
+        "connection_pools": llm_http_pool.stats()
+    }
+
+async def ainvoke_llm(prompt, model=DEFAULT_MODEL, **params):
+    """
+    Run a completion through the shared client, serving repeats from the cache
+
+    Cache entries are keyed by provider as well as model, prompt and params;
+    the record, replay and fake providers bypass the cache entirely.
+
+    Cache misses wait for the shared scheduler, which admits calls by request
+    priority within the provider's request and token rate limits.
+
+    Args:
+        prompt (str): Prompt text
+        model (str): Model name
+        **params: Extra model parameters; part of the cache key
+
+    Returns:
+        AIMessage: The model response
+    """
+    provider = current_provider()
+    cache = llm_cache if provider not in UNCACHED_PROVIDERS else None
+    key = cache_key(model, prompt, params, provider)
+    if cache is not None:
+        cached = await cache.aget(key)
+        if cached is not None:
+            return AIMessage(content=cached)
+
+    client = get_llm(model, **params)
+    if llm_scheduler is not None:
+        estimated = estimate_tokens(prompt)
+        await llm_scheduler.acquire(estimated)
+        response = await client.ainvoke(prompt)
+        usage = getattr(response, "usage_metadata", None) or {}
+        llm_scheduler.record_usage(estimated, usage.get("total_tokens"))
+    else:
+        response = await client.ainvoke(prompt)
+
+    if cache is not None:
+        await cache.aset(key, model, response.content)
+    return response
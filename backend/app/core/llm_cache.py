@@ -0,0 +1,182 @@
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import logging
+from collections import OrderedDict
+from app.core.settings import (
+    LLM_CACHE_ENABLED,
+    LLM_CACHE_PATH,
+    LLM_CACHE_TTL_SECONDS,
+    LLM_CACHE_MEMORY_SIZE,
+    LLM_CACHE_MAX_ENTRIES,
+)
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Run disk eviction after this many writes rather than on every write
+EVICTION_INTERVAL = 100
+
+def cache_key(model, prompt, params=None, provider=None):
+    """Content address for a completion: hash of model, prompt, parameters and (if given) provider"""
+    key = {"model": model, "prompt": prompt, "params": params or {}}
+    if provider is not None:
+        key["provider"] = provider
+    payload = json.dumps(key, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class LLMResponseCache:
+    """
+    Two-tier cache for LLM completions
+
+    An in-memory LRU sits in front of a SQLite table. The SQLite file runs in
+    WAL mode so every uvicorn worker on the host shares the same entries.
+    Entries expire after ttl_seconds, and the disk tier is trimmed to
+    max_entries by least recent access.
+    """
+
+    def __init__(self, db_path, ttl_seconds, memory_size, max_entries):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.memory_size = memory_size
+        self.max_entries = max_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+        self._writes = 0
+        self._counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+
+    def get(self, key):
+        """Get a cached completion, or None on a miss"""
+        value = self._memory_get(key)
+        if value is not None:
+            self._counters["memory_hits"] += 1
+            return value
+
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT response, expires_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row and row[1] > time.time():
+                self._connection().execute(
+                    "UPDATE llm_cache SET last_access = ? WHERE key = ?", (time.time(), key)
+                )
+                self._connection().commit()
+            else:
+                row = None
+
+        if row is None:
+            self._counters["misses"] += 1
+            return None
+
+        self._counters["disk_hits"] += 1
+        self._memory_set(key, row[0], row[1])
+        return row[0]
+
+    def set(self, key, model, response):
+        """Store a completion in both tiers"""
+        now = time.time()
+        expires_at = now + self.ttl_seconds
+        self._memory_set(key, response, expires_at)
+
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, model, response, created_at, expires_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model, response, now, expires_at, now)
+            )
+            conn.commit()
+            self._counters["writes"] += 1
+            self._writes += 1
+            if self._writes % EVICTION_INTERVAL == 0:
+                self._evict(conn)
+
+    async def aget(self, key):
+        """Async get: memory hits return immediately, disk lookups run in a thread"""
+        value = self._memory_get(key)
+        if value is not None:
+            self._counters["memory_hits"] += 1
+            return value
+        return await asyncio.to_thread(self.get, key)
+
+    async def aset(self, key, model, response):
+        await asyncio.to_thread(self.set, key, model, response)
+
+    def clear(self):
+        """Remove every entry from both tiers"""
+        with self._lock:
+            self._memory.clear()
+            self._connection().execute("DELETE FROM llm_cache")
+            self._connection().commit()
+
+    def stats(self):
+        lookups = self._counters["memory_hits"] + self._counters["disk_hits"] + self._counters["misses"]
+        hits = self._counters["memory_hits"] + self._counters["disk_hits"]
+        return {
+            **self._counters,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "memory_entries": len(self._memory)
+        }
+
+    def _memory_get(self, key):
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= time.time():
+                del self._memory[key]
+                return None
+            self._memory.move_to_end(key)
+            return value
+
+    def _memory_set(self, key, value, expires_at):
+        with self._lock:
+            self._memory[key] = (value, expires_at)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_size:
+                self._memory.popitem(last=False)
+
+    def _evict(self, conn):
+        """Drop expired rows, then the least recently used rows above max_entries"""
+        expired = conn.execute("DELETE FROM llm_cache WHERE expires_at <= ?", (time.time(),)).rowcount
+        overflow = conn.execute(
+            "DELETE FROM llm_cache WHERE key IN ("
+            "SELECT key FROM llm_cache ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,)
+        ).rowcount
+        conn.commit()
+        self._counters["evictions"] += expired + overflow
+
+    def _connection(self):
+        if self._conn is None:
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=30)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                "key TEXT PRIMARY KEY, model TEXT, response TEXT, "
+                "created_at REAL, expires_at REAL, last_access REAL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_last_access ON llm_cache (last_access)")
+            self._conn.commit()
+            logger.info(f"LLM response cache opened at {self.db_path}")
+        return self._conn
+
+# Shared cache instance (None when caching is disabled)
+llm_cache = None
+if LLM_CACHE_ENABLED:
+    llm_cache = LLMResponseCache(
+        db_path=LLM_CACHE_PATH,
+        ttl_seconds=LLM_CACHE_TTL_SECONDS,
+        memory_size=LLM_CACHE_MEMORY_SIZE,
+        max_entries=LLM_CACHE_MAX_ENTRIES
+    )
@@ -0,0 +1,102 @@
+import threading
+import logging
+import httpx
+from app.core.settings import (
+    LLM_TIMEOUT_SECONDS, LLM_CONNECT_TIMEOUT_SECONDS, LLM_MAX_CONNECTIONS,
+    LLM_MAX_KEEPALIVE_CONNECTIONS, LLM_KEEPALIVE_EXPIRY_SECONDS
+)
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class ModelConnections:
+    """Keep-alive HTTP clients (sync and async) used by every chat client of one model"""
+
+    def __init__(self, limits, timeout):
+        self.requests = 0
+        self.errors = 0
+        hooks = {"request": [self._on_request], "response": [self._on_response]}
+        async_hooks = {"request": [self._aon_request], "response": [self._aon_response]}
+        self.client = httpx.Client(limits=limits, timeout=timeout, event_hooks=hooks)
+        self.async_client = httpx.AsyncClient(limits=limits, timeout=timeout, event_hooks=async_hooks)
+
+    def _on_request(self, request):
+        self.requests += 1
+
+    def _on_response(self, response):
+        if response.status_code >= 400:
+            self.errors += 1
+
+    async def _aon_request(self, request):
+        self._on_request(request)
+
+    async def _aon_response(self, response):
+        self._on_response(response)
+
+    def stats(self):
+        connections = pool_connections(self.client) + pool_connections(self.async_client)
+        return {
+            "requests": self.requests,
+            "error_responses": self.errors,
+            "open_connections": len(connections),
+            "idle_connections": sum(1 for connection in connections if connection.is_idle())
+        }
+
+def pool_connections(client):
+    """Connections currently held by an httpx client's pool (empty if the transport has no pool)"""
+    pool = getattr(getattr(client, "_transport", None), "_pool", None)
+    return list(getattr(pool, "connections", []))
+
+class LLMHttpPool:
+    """
+    Connection pools for LLM provider calls, one per model
+
+    Chat clients are cheap to rebuild (e.g. on /pipeline/reload), but their
+    HTTP connections are not: reusing these pools keeps TLS sessions alive
+    across requests and client rebuilds. Closed in the app lifespan.
+    """
+
+    def __init__(self, limits, timeout):
+        self.limits = limits
+        self.timeout = timeout
+        self._models = {}
+        self._lock = threading.Lock()
+
+    def clients(self, model):
+        """(httpx.Client, httpx.AsyncClient) for a model, created on first use"""
+        with self._lock:
+            connections = self._models.get(model)
+            if connections is None:
+                connections = ModelConnections(self.limits, self.timeout)
+                self._models[model] = connections
+                logger.info(f"Opened LLM connection pool for model {model}")
+        return connections.client, connections.async_client
+
+    def stats(self):
+        with self._lock:
+            models = dict(self._models)
+        return {
+            "max_connections": self.limits.max_connections,
+            "max_keepalive_connections": self.limits.max_keepalive_connections,
+            "timeout_seconds": self.timeout.read,
+            "models": {model: connections.stats() for model, connections in models.items()}
+        }
+
+    async def aclose(self):
+        """Close every pool; the next call opens fresh ones"""
+        with self._lock:
+            models, self._models = self._models, {}
+        for connections in models.values():
+            connections.client.close()
+            await connections.async_client.aclose()
+
+# Shared connection pools for LLM provider calls
+llm_http_pool = LLMHttpPool(
+    httpx.Limits(
+        max_connections=LLM_MAX_CONNECTIONS,
+        max_keepalive_connections=LLM_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=LLM_KEEPALIVE_EXPIRY_SECONDS
+    ),
+    httpx.Timeout(LLM_TIMEOUT_SECONDS, connect=LLM_CONNECT_TIMEOUT_SECONDS)
+)
@@ -0,0 +1,211 @@
+import asyncio
+import time
+import logging
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from app.core.settings import (
+    LLM_SCHEDULER_ENABLED,
+    LLM_REQUESTS_PER_MINUTE,
+    LLM_TOKENS_PER_MINUTE,
+    LLM_COMPLETION_TOKEN_ESTIMATE,
+)
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Request priority names (as used by PipelineRequest.priority) to queue levels
+PRIORITY_LEVELS = {"urgent": 0, "critical": 0, "high": 0, "medium": 1, "normal": 1, "low": 2, "bulk": 2}
+DEFAULT_LEVEL = 1
+DEFAULT_TENANT = "default"
+
+# Priority and tenant of the request an LLM call is made on behalf of
+_request_context = ContextVar("llm_request_context", default=(DEFAULT_LEVEL, DEFAULT_TENANT))
+
+@contextmanager
+def llm_request_context(priority=None, tenant=None):
+    """
+    Tag LLM calls made inside this block (including tasks started from it)
+    with a priority and tenant for the scheduler
+    """
+    level = PRIORITY_LEVELS.get(str(priority).lower(), DEFAULT_LEVEL) if priority else DEFAULT_LEVEL
+    token = _request_context.set((level, tenant or DEFAULT_TENANT))
+    try:
+        yield
+    finally:
+        _request_context.reset(token)
+
+def current_request_context():
+    """(priority level, tenant) that LLM calls made here are scheduled under"""
+    return _request_context.get()
+
+def estimate_tokens(prompt):
+    """Rough token estimate for a prompt plus the expected completion"""
+    return len(prompt) // 4 + LLM_COMPLETION_TOKEN_ESTIMATE
+
+class TokenBucket:
+    """Token bucket refilled continuously at capacity per minute"""
+
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount):
+        """Seconds until amount can be taken (0 if available now)"""
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def consume(self, amount):
+        # May go negative when correcting an estimate; later requests wait it off
+        self._refill()
+        self.tokens -= min(amount, self.capacity)
+
+class _Waiter:
+    __slots__ = ("future", "tokens", "level", "tenant", "enqueued_at")
+
+    def __init__(self, future, tokens, level, tenant):
+        self.future = future
+        self.tokens = tokens
+        self.level = level
+        self.tenant = tenant
+        self.enqueued_at = time.monotonic()
+
+class LLMScheduler:
+    """
+    Process-wide admission control for LLM calls
+
+    Calls wait in one queue per priority level. Within a level, tenants are
+    served round-robin, so one tenant's bulk re-run cannot starve another's.
+    The head of the highest non-empty level is admitted once both the
+    requests-per-minute and tokens-per-minute buckets have room.
+    """
+
+    def __init__(self, requests_per_minute, tokens_per_minute):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self._loop = None
+        self._queues = {}
+        self._wakeup = None
+        self._dispatcher = None
+        self._wait_times = deque(maxlen=1000)
+        self._counters = {"admitted": 0, "cancelled": 0}
+
+    async def acquire(self, tokens):
+        """Wait until the current request may call the LLM with about this many tokens"""
+        self._bind_loop()
+        level, tenant = _request_context.get()
+        waiter = _Waiter(self._loop.create_future(), tokens, level, tenant)
+        self._queues.setdefault(level, OrderedDict()).setdefault(tenant, deque()).append(waiter)
+        self._wakeup.set()
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            self._counters["cancelled"] += 1
+            raise
+
+    async def close(self):
+        """Stop the dispatcher and cancel calls still waiting; the next call starts it again"""
+        dispatcher, self._dispatcher, self._loop = self._dispatcher, None, None
+        for tenants in self._queues.values():
+            for queue in tenants.values():
+                for waiter in queue:
+                    waiter.future.cancel()
+        self._queues = {}
+        if dispatcher is not None and dispatcher.get_loop() is asyncio.get_running_loop():
+            dispatcher.cancel()
+            try:
+                await dispatcher
+            except asyncio.CancelledError:
+                pass
+
+    def record_usage(self, estimated, actual):
+        """Correct the token bucket once the real usage of a call is known"""
+        if actual:
+            self.tokens.consume(actual - estimated)
+
+    def stats(self):
+        waits = sorted(self._wait_times)
+        return {
+            **self._counters,
+            "queue_depth": sum(len(queue) for tenants in self._queues.values() for queue in tenants.values()),
+            "queue_depth_by_priority": {
+                level: sum(len(queue) for queue in tenants.values())
+                for level, tenants in sorted(self._queues.items())
+            },
+            "wait_ms_avg": round(sum(waits) / len(waits) * 1000, 1) if waits else 0.0,
+            "wait_ms_p95": round(waits[round(0.95 * (len(waits) - 1))] * 1000, 1) if waits else 0.0,
+            "wait_ms_max": round(waits[-1] * 1000, 1) if waits else 0.0,
+            "requests_available": round(self.requests.tokens, 1),
+            "tokens_available": round(self.tokens.tokens, 1)
+        }
+
+    def _bind_loop(self):
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # First use, or a new event loop (e.g. a fresh asyncio.run in a script)
+            self._loop = loop
+            self._queues = {}
+            self._wakeup = asyncio.Event()
+            self._dispatcher = loop.create_task(self._dispatch())
+
+    def _next_waiter(self):
+        """Head of the highest-priority level, rotating between its tenants"""
+        for level in sorted(self._queues):
+            tenants = self._queues[level]
+            while tenants:
+                tenant, queue = next(iter(tenants.items()))
+                while queue and queue[0].future.done():
+                    queue.popleft()
+                if queue:
+                    return tenant, queue
+                del tenants[tenant]
+        return None
+
+    async def _dispatch(self):
+        while True:
+            head = self._next_waiter()
+            if head is None:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            tenant, queue = head
+            waiter = queue[0]
+            delay = max(self.requests.wait_time(1), self.tokens.wait_time(waiter.tokens))
+            if delay > 0:
+                # Sleep until there is capacity, or until a new (maybe more urgent) call arrives
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            queue.popleft()
+            tenants = self._queues[waiter.level]
+            # Rotate the tenant to the back of its level for fairness
+            tenants.move_to_end(tenant)
+            if not queue:
+                del tenants[tenant]
+
+            self.requests.consume(1)
+            self.tokens.consume(waiter.tokens)
+            self._wait_times.append(time.monotonic() - waiter.enqueued_at)
+            self._counters["admitted"] += 1
+            waiter.future.set_result(None)
+
+# Shared scheduler instance (None when scheduling is disabled)
+llm_scheduler = None
+if LLM_SCHEDULER_ENABLED:
+    llm_scheduler = LLMScheduler(LLM_REQUESTS_PER_MINUTE, LLM_TOKENS_PER_MINUTE)
@@ -0,0 +1,86 @@
+import hashlib
+import re
+import logging
+from functools import lru_cache
+from typing import NamedTuple
+from psycopg2.extras import Json
+from app.core.settings import QUERY_CACHE_SIZE
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Tables the dynamic builders may touch; anything else is rejected before SQL is generated
+TABLES = frozenset({
+    "regulation_diffs", "data_catalog", "document_chunks", "impact_assessments", "findings", "action_items"
+})
+IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+class Statement(NamedTuple):
+    """
+    Generated SQL for one query shape
+
+    text uses %s placeholders for a plain psycopg2 execute; prepare and
+    execute are the same query as a named server-side prepared statement.
+    """
+    name: str
+    text: str
+    prepare: str
+    execute: str
+
+def quote(identifier):
+    """Double-quoted identifier; only names matching IDENTIFIER are accepted, so no escaping is needed"""
+    if not IDENTIFIER.match(identifier):
+        raise ValueError(f"Invalid identifier: {identifier!r}")
+    return f'"{identifier}"'
+
+def quote_table(table):
+    if table not in TABLES:
+        raise ValueError(f"Unknown table: {table!r}")
+    return quote(table)
+
+def statement(sql_template, param_count):
+    """Statement from SQL written with {0}, {1}, ... where the parameters go"""
+    text = sql_template.format(*["%s"] * param_count)
+    prepare_body = sql_template.format(*[f"${index}" for index in range(1, param_count + 1)])
+    name = "qb_" + hashlib.sha1(prepare_body.encode()).hexdigest()[:16]
+    arguments = f" ({', '.join(['%s'] * param_count)})" if param_count else ""
+    return Statement(name, text, f"PREPARE {name} AS {prepare_body}", f"EXECUTE {name}{arguments}")
+
+@lru_cache(maxsize=QUERY_CACHE_SIZE)
+def insert_statement(table, columns):
+    """INSERT ... RETURNING id for a table and a tuple of columns"""
+    placeholders = ", ".join(f"{{{index}}}" for index in range(len(columns)))
+    return statement(
+        f"INSERT INTO {quote_table(table)} ({', '.join(quote(column) for column in columns)}) "
+        f"VALUES ({placeholders}) RETURNING id",
+        len(columns)
+    )
+
+@lru_cache(maxsize=QUERY_CACHE_SIZE)
+def select_statement(table, condition_columns):
+    """SELECT * with an equality condition per column and the limit as the last parameter (NULL for none)"""
+    where = " AND ".join(f"{quote(column)} = {{{index}}}" for index, column in enumerate(condition_columns))
+    return statement(
+        f"SELECT * FROM {quote_table(table)}{' WHERE ' + where if where else ''} LIMIT {{{len(condition_columns)}}}",
+        len(condition_columns) + 1
+    )
+
+def adapt(value):
+    """Query parameter for a value; dicts and lists are stored as JSON"""
+    return Json(value) if isinstance(value, (dict, list)) else value
+
+def insert_query(table, data):
+    """Statement and parameters inserting one row"""
+    return insert_statement(table, tuple(data)), tuple(map(adapt, data.values()))
+
+def select_query(table, conditions=None, limit=None):
+    """Statement and parameters for get_records"""
+    conditions = conditions or {}
+    return select_statement(table, tuple(conditions)), (*map(adapt, conditions.values()), limit)
+
+def stats():
+    return {
+        name: {"hits": info.hits, "misses": info.misses, "size": info.currsize}
+        for name, info in (("insert", insert_statement.cache_info()), ("select", select_statement.cache_info()))
+    }
@@ -0,0 +1,61 @@
+import re
+from functools import lru_cache
+
+# Structured retention columns derived from the free-text retention_period
+RETENTION_FIELDS = ("retention_days", "retention_anchor", "retention_indefinite")
+
+# A month is a twelfth of a year, so "60 months" and "5 years" are the same period
+UNIT_DAYS = {"day": 1, "week": 7, "month": 365 / 12, "year": 365}
+NUMBER_WORDS = {"one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6,
+                "seven": 7, "eight": 8, "nine": 9, "ten": 10, "twelve": 12}
+
+INDEFINITE = re.compile(r"\b(indefinite(ly)?|permanent(ly)?|forever|unlimited|no (time )?limit)\b", re.IGNORECASE)
+DURATION = re.compile(
+    r"(\d+(?:\.\d+)?|" + "|".join(NUMBER_WORDS) + r")[\s-]*(day|week|month|year|yr)s?\b", re.IGNORECASE
+)
+ANCHOR = re.compile(r"\b(?:after|from|following|since)\s+(?:the\s+)?([a-z][a-z ]*?)\s*(?:[(,;.]|$)", re.IGNORECASE)
+
+@lru_cache(maxsize=4096)
+def parse_retention(text):
+    """
+    Parse a free-text retention period such as "7 years after last activity"
+
+    When several durations are mentioned, the longest is the retention period:
+    ranges ("3 to 5 years", "6 months to 2 years") count as their upper bound,
+    restatements ("7 years (2555 days)") as one period, and secondary limits
+    ("up to 2 years; backups 90 days") do not add up.
+
+    Args:
+        text (str): The retention_period value
+
+    Returns:
+        tuple: (retention_days, retention_anchor, retention_indefinite); days
+            and anchor are None when the text does not state them
+    """
+    if not text:
+        return None, None, False
+    indefinite = INDEFINITE.search(text) is not None
+    days = max((
+        round((NUMBER_WORDS.get(amount.lower()) or float(amount)) * UNIT_DAYS["year" if unit.lower() == "yr" else unit.lower()])
+        for amount, unit in DURATION.findall(text)
+    ), default=None)
+    anchor = ANCHOR.search(text)
+    return days, anchor.group(1).lower() if anchor else None, indefinite
+
+def normalize_retention(entry):
+    """Set the structured retention fields of a catalog entry from its retention_period; returns the entry"""
+    entry.update(zip(RETENTION_FIELDS, parse_retention(entry.get("retention_period"))))
+    return entry
+
+def fill_retention(entries):
+    """
+    Normalize entries that were stored before retention was parsed at ingest
+
+    Entries that already carry a duration or the indefinite flag are left as
+    they are. Parsing is cached per distinct text, so this stays cheap for
+    catalogs that repeat a handful of retention periods.
+    """
+    for entry in entries:
+        if entry.get("retention_days") is None and not entry.get("retention_indefinite"):
+            normalize_retention(entry)
+    return entries
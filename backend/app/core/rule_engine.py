@@ -0,0 +1,260 @@
+import glob
+import hashlib
+import itertools
+import json
+import os
+import re
+import string
+import logging
+from app.core.settings import COMPLIANCE_RULES_DIR
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Template keys of a finding definition rendered before data_catalog_id
+FINDING_FIELDS = ["title", "description", "regulation_section", "confidence"]
+
+class CatalogColumns:
+    """
+    Column view of the data catalog for one evaluation
+
+    Each field is read out of the entries once and shared by every rule that
+    looks at it. Predicates run once per distinct value of a column, since
+    catalog columns such as retention_period repeat a handful of values.
+    """
+
+    def __init__(self, entries):
+        self.entries = entries
+        self._columns = {}
+
+    def column(self, field):
+        if field not in self._columns:
+            column = [entry.get(field) for entry in self.entries]
+            try:
+                set(column)
+            except TypeError:
+                # JSON columns hold lists or objects; compare them by their serialized form
+                column = [column_value(value) for value in column]
+            self._columns[field] = column
+        return self._columns[field]
+
+    def evaluate(self, field, predicate):
+        """predicate(value) for every entry, computed once per distinct value"""
+        column = self.column(field)
+        results = {value: predicate(value) for value in set(column)}
+        return [results[value] for value in column]
+
+def column_value(value):
+    """Hashable form of a catalog value; empty containers count as missing"""
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    if not value:
+        return ""
+    return json.dumps(value, sort_keys=True, default=str)
+
+def contains_any(condition):
+    flags = 0 if condition.get("case_sensitive") else re.IGNORECASE
+    pattern = re.compile("|".join(re.escape(value) for value in condition["values"]), flags)
+    return lambda value: bool(value) and pattern.search(str(value)) is not None
+
+def missing(condition):
+    return lambda value: not value
+
+def in_range(condition):
+    """Numeric range with inclusive "min" and/or "max"; entries without a number never match"""
+    low, high = condition.get("min"), condition.get("max")
+    return lambda value: (
+        isinstance(value, (int, float)) and not isinstance(value, bool)
+        and (low is None or value >= low) and (high is None or value <= high)
+    )
+
+def is_true(condition):
+    return lambda value: value is True
+
+# Field operators, keyed by a condition's "op"; each builds a test for one value
+OPERATORS = {
+    "contains_any": contains_any,
+    "missing": missing,
+    "in_range": in_range,
+    "is_true": is_true,
+}
+
+class Condition:
+    """
+    A compiled condition
+
+    mask(columns) gives one bool per catalog entry. Conditions on a single
+    field also keep their per-value test, so combinations over the same field
+    fuse into one test that runs once per distinct value.
+    """
+
+    def __init__(self, mask, field=None, test=None):
+        self.mask = mask
+        self.field = field
+        self.test = test
+
+def field_condition(field, test):
+    return Condition(lambda columns: columns.evaluate(field, test), field, test)
+
+def combine(parts, combiner):
+    fields = {part.field for part in parts}
+    if len(fields) == 1 and None not in fields:
+        tests = [part.test for part in parts]
+        return field_condition(fields.pop(), lambda value: combiner(test(value) for test in tests))
+    return Condition(lambda columns: list(map(combiner, zip(*(part.mask(columns) for part in parts)))))
+
+def compile_condition(condition):
+    """
+    Compile a declarative condition
+
+    Args:
+        condition (dict): {"any": [...]}, {"all": [...]}, {"not": {...}} or
+            {"field": ..., "op": ..., ...} with op one of OPERATORS
+
+    Returns:
+        Condition: The compiled condition
+    """
+    if "any" in condition:
+        return combine([compile_condition(part) for part in condition["any"]], any)
+    if "all" in condition:
+        return combine([compile_condition(part) for part in condition["all"]], all)
+    if "not" in condition:
+        part = compile_condition(condition["not"])
+        if part.field is not None:
+            return field_condition(part.field, lambda value: not part.test(value))
+        return Condition(lambda columns: [not matched for matched in part.mask(columns)])
+    if condition.get("op") not in OPERATORS:
+        raise ValueError(f"Unknown rule operator '{condition.get('op')}'. Use one of: {', '.join(OPERATORS)}")
+    return field_condition(condition["field"], OPERATORS[condition["op"]](condition))
+
+def compile_template(value):
+    """
+    Compile a finding template such as "Excessive retention period for {name}"
+
+    Returns:
+        callable: Takes the matching entries and returns the rendered value for
+            each; missing fields render as None, like entry.get() would
+    """
+    if not isinstance(value, str):
+        return lambda entries: itertools.repeat(value, len(entries))
+    pieces = list(string.Formatter().parse(value))
+    fields = [field for _, field, _, _ in pieces if field is not None]
+    if not fields:
+        return lambda entries: itertools.repeat(value, len(entries))
+    if len(fields) == 1 and len(pieces) <= 2 and not pieces[0][2] and not pieces[0][3]:
+        # "prefix {field} suffix": plain concatenation is several times faster than str.format
+        prefix, field = pieces[0][0], pieces[0][1]
+        suffix = pieces[1][0] if len(pieces) == 2 else ""
+        return lambda entries: [prefix + str(entry.get(field)) + suffix for entry in entries]
+    return lambda entries: [value.format_map(FindingFields(entry)) for entry in entries]
+
+class FindingFields(dict):
+    """Catalog entry for str.format_map; missing fields render as None"""
+
+    def __missing__(self, key):
+        return None
+
+def referenced_fields(definition):
+    """Catalog fields a rule definition reads, in its conditions or its finding templates"""
+    if isinstance(definition, dict):
+        fields = {definition["field"]} if isinstance(definition.get("field"), str) else set()
+        for value in definition.values():
+            fields |= referenced_fields(value)
+        return fields
+    if isinstance(definition, list):
+        return set().union(*(referenced_fields(value) for value in definition))
+    if isinstance(definition, str):
+        return {field for _, field, _, _ in string.Formatter().parse(definition) if field}
+    return set()
+
+class CompiledRule:
+    def __init__(self, definition):
+        self.id = definition["id"]
+        self.condition = compile_condition(definition["when"])
+        finding = definition["finding"]
+        self.render = [compile_template(finding[key]) for key in FINDING_FIELDS + ["remediation"]]
+        self.fields = referenced_fields(definition["when"]) | referenced_fields(finding)
+
+    def findings(self, entries):
+        """Findings for the matching entries in the API's key order; ids are numbered by the caller"""
+        title, description, section, confidence, remediation = (render(entries) for render in self.render)
+        return [
+            {
+                "id": None,
+                "title": title_text,
+                "description": description_text,
+                "regulation_section": section_text,
+                "confidence": confidence_value,
+                "data_catalog_id": entry.get("id"),
+                "remediation": remediation_text
+            }
+            for entry, title_text, description_text, section_text, confidence_value, remediation_text
+            in zip(entries, title, description, section, confidence, remediation)
+        ]
+
+class RuleSet:
+    """Compiled rules for one regulation source"""
+
+    def __init__(self, definition, version):
+        self.regulation = definition["regulation"]
+        self.version = version
+        self.penalty_exposure = definition.get("penalty_exposure")
+        self.rules = [CompiledRule(rule) for rule in definition["rules"]]
+        # Everything the findings of an entry depend on
+        self.fields = sorted(set().union({"id"}, *(rule.fields for rule in self.rules)))
+
+    def evaluate(self, entries):
+        """
+        Run every rule over the catalog
+
+        Findings come out entry by entry, in rule order within an entry, and
+        are numbered finding-1, finding-2, ... across the whole result.
+        """
+        columns = CatalogColumns(entries)
+        rule_count = len(self.rules)
+        positions = []
+        findings = []
+        for rule_index, rule in enumerate(self.rules):
+            indices = list(itertools.compress(range(len(entries)), rule.condition.mask(columns)))
+            positions.extend(index * rule_count + rule_index for index in indices)
+            findings.extend(rule.findings([entries[index] for index in indices]))
+
+        # Interleave the per-rule results back into entry order
+        order = sorted(range(len(positions)), key=positions.__getitem__)
+        findings = [findings[position] for position in order]
+        for number, finding in enumerate(findings, start=1):
+            finding["id"] = f"finding-{number}"
+        return findings
+
+class RuleEngine:
+    """Rule sets for every regulation with a definition file, compiled once at load"""
+
+    def __init__(self, rule_sets):
+        self.rule_sets = {rule_set.regulation: rule_set for rule_set in rule_sets}
+
+    @classmethod
+    def from_directory(cls, directory):
+        rule_sets = []
+        for path in sorted(glob.glob(os.path.join(directory, "*.json"))):
+            with open(path, "rb") as rules_file:
+                raw = rules_file.read()
+            rule_sets.append(RuleSet(json.loads(raw), hashlib.sha256(raw).hexdigest()[:12]))
+        logger.info(f"Loaded compliance rules for {', '.join(rule_set.regulation for rule_set in rule_sets) or 'no regulations'}")
+        return cls(rule_sets)
+
+    def evaluate(self, regulation, entries):
+        """Findings for a regulation source; sources without rules have none"""
+        rule_set = self.rule_sets.get(regulation)
+        return rule_set.evaluate(entries) if rule_set else []
+
+    def penalty_exposure(self, regulation):
+        rule_set = self.rule_sets.get(regulation)
+        return rule_set.penalty_exposure if rule_set else None
+
+    def version(self, regulation):
+        rule_set = self.rule_sets.get(regulation)
+        return rule_set.version if rule_set else None
+
+# Shared engine loaded from COMPLIANCE_RULES_DIR
+rule_engine = RuleEngine.from_directory(COMPLIANCE_RULES_DIR)
@@ -16,4 +16,108 @@ SUPABASE_SERVICE_ROLE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
 DATABASE_URL = os.getenv("DATABASE_URL")
 
 # Application settings
-DEBUG = os.getenv("DEBUG", "False").lower() == "true" 
\ No newline at end of file
+DEBUG = os.getenv("DEBUG", "False").lower() == "true" 
+
+# Local storage for caches, checkpoints and job state
+DATA_DIR = os.getenv("DATA_DIR", "data")
+
+# LLM response cache settings
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "True").lower() == "true"
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", os.path.join(DATA_DIR, "llm_cache.sqlite"))
+LLM_CACHE_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+LLM_CACHE_MEMORY_SIZE = int(os.getenv("LLM_CACHE_MEMORY_SIZE", "512"))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "10000"))
+
+# Batch pipeline settings
+PIPELINE_BATCH_CONCURRENCY = int(os.getenv("PIPELINE_BATCH_CONCURRENCY", "4"))
+PIPELINE_BATCH_MAX_CONCURRENCY = int(os.getenv("PIPELINE_BATCH_MAX_CONCURRENCY", "32"))
+
+# Maximum parallel requirement branches per pipeline run
+PIPELINE_MAX_BRANCHES = int(os.getenv("PIPELINE_MAX_BRANCHES", "8"))
+
+# Pipeline checkpoint settings
+PIPELINE_CHECKPOINTS_ENABLED = os.getenv("PIPELINE_CHECKPOINTS_ENABLED", "True").lower() == "true"
+PIPELINE_CHECKPOINT_PATH = os.getenv("PIPELINE_CHECKPOINT_PATH", os.path.join(DATA_DIR, "pipeline_checkpoints.sqlite"))
+# Runs whose checkpoints are kept; older runs are pruned at startup and as new runs finish
+PIPELINE_CHECKPOINT_MAX_RUNS = int(os.getenv("PIPELINE_CHECKPOINT_MAX_RUNS", "1000"))
+
+# LLM provider: "openai", "record" (call OpenAI and save fixtures),
+# "replay" (serve saved fixtures) or "fake" (deterministic canned responses)
+LLM_PROVIDER = os.getenv("LLM_PROVIDER", "openai")
+LLM_FIXTURES_DIR = os.getenv("LLM_FIXTURES_DIR", os.path.join("fixtures", "llm"))
+LLM_REPLAY_LATENCY_MS = float(os.getenv("LLM_REPLAY_LATENCY_MS", "0"))
+LLM_REPLAY_JITTER_MS = float(os.getenv("LLM_REPLAY_JITTER_MS", "0"))
+
+# LLM rate limiting and scheduling
+LLM_SCHEDULER_ENABLED = os.getenv("LLM_SCHEDULER_ENABLED", "True").lower() == "true"
+LLM_REQUESTS_PER_MINUTE = int(os.getenv("LLM_REQUESTS_PER_MINUTE", "500"))
+LLM_TOKENS_PER_MINUTE = int(os.getenv("LLM_TOKENS_PER_MINUTE", "200000"))
+LLM_COMPLETION_TOKEN_ESTIMATE = int(os.getenv("LLM_COMPLETION_TOKEN_ESTIMATE", "500"))
+
+# Seconds to keep results of coalesced requests for identical follow-ups (0 disables)
+SINGLEFLIGHT_MEMO_SECONDS = float(os.getenv("SINGLEFLIGHT_MEMO_SECONDS", "0"))
+
+# Background job settings
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOB_STORE_PATH = os.getenv("JOB_STORE_PATH", os.path.join(DATA_DIR, "jobs.sqlite"))
+# A running job belongs to the worker process holding its lease; the owner renews it every
+# third of this, and other processes recover the job only once it has expired
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "60"))
+
+# Directory of declarative compliance rule definitions (one JSON file per regulation)
+COMPLIANCE_RULES_DIR = os.getenv("COMPLIANCE_RULES_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "rules"))
+
+# Incremental compliance assessment: re-evaluate only catalog entries that changed
+INCREMENTAL_ASSESSMENT_ENABLED = os.getenv("INCREMENTAL_ASSESSMENT_ENABLED", "True").lower() == "true"
+ASSESSMENT_STORE_PATH = os.getenv("ASSESSMENT_STORE_PATH", os.path.join(DATA_DIR, "assessments.sqlite"))
+ASSESSMENT_MEMORY_SIZE = int(os.getenv("ASSESSMENT_MEMORY_SIZE", "32"))
+
+# Entries per page when streaming the data catalog
+CATALOG_PAGE_SIZE = int(os.getenv("CATALOG_PAGE_SIZE", "1000"))
+
+# HTTP connection pools and timeouts for LLM provider calls (one pool per model)
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "60"))
+LLM_CONNECT_TIMEOUT_SECONDS = float(os.getenv("LLM_CONNECT_TIMEOUT_SECONDS", "10"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "100"))
+LLM_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("LLM_MAX_KEEPALIVE_CONNECTIONS", "20"))
+LLM_KEEPALIVE_EXPIRY_SECONDS = float(os.getenv("LLM_KEEPALIVE_EXPIRY_SECONDS", "30"))
+
+# Write-behind persistence of findings and action items (batched after the response is sent)
+WRITE_BEHIND_ENABLED = os.getenv("WRITE_BEHIND_ENABLED", "True").lower() == "true"
+WRITE_BEHIND_BATCH_SIZE = int(os.getenv("WRITE_BEHIND_BATCH_SIZE", "500"))
+WRITE_BEHIND_FLUSH_SECONDS = float(os.getenv("WRITE_BEHIND_FLUSH_SECONDS", "1.0"))
+WRITE_BEHIND_MAX_PENDING = int(os.getenv("WRITE_BEHIND_MAX_PENDING", "10000"))
+WRITE_BEHIND_MAX_RETRIES = int(os.getenv("WRITE_BEHIND_MAX_RETRIES", "5"))
+
+# In-process vector index for matching regulation requirements to catalog entries
+VECTOR_INDEX_DIR = os.getenv("VECTOR_INDEX_DIR", os.path.join(DATA_DIR, "vector_index"))
+EMBEDDING_DIM = int(os.getenv("EMBEDDING_DIM", "256"))
+VECTOR_INDEX_NPROBE = int(os.getenv("VECTOR_INDEX_NPROBE", "8"))
+VECTOR_INDEX_TRAIN_SIZE = int(os.getenv("VECTOR_INDEX_TRAIN_SIZE", "4096"))
+
+# Direct PostgreSQL pool sizing, and the bounded executor blocking database calls run on
+DB_POOL_MIN_CONNECTIONS = int(os.getenv("DB_POOL_MIN_CONNECTIONS", "5"))
+DB_POOL_MAX_CONNECTIONS = int(os.getenv("DB_POOL_MAX_CONNECTIONS", "20"))
+DB_EXECUTOR_WORKERS = int(os.getenv("DB_EXECUTOR_WORKERS", str(DB_POOL_MAX_CONNECTIONS)))
+DB_QUERY_TIMEOUT_SECONDS = float(os.getenv("DB_QUERY_TIMEOUT_SECONDS", "30"))
+DB_STREAM_FETCH_SIZE = int(os.getenv("DB_STREAM_FETCH_SIZE", "500"))
+
+# Rows per multi-row INSERT (and transaction) when bulk ingesting NDJSON or CSV
+BULK_INGEST_BATCH_SIZE = int(os.getenv("BULK_INGEST_BATCH_SIZE", "1000"))
+
+# Generated SQL kept per query shape, and whether pooled connections PREPARE it server-side
+# (turn off behind a transaction-mode pooler such as PgBouncer, which cannot keep prepared statements)
+QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", "256"))
+DB_PREPARED_STATEMENTS = os.getenv("DB_PREPARED_STATEMENTS", "True").lower() == "true"
+
+# Limits of one batched document chunk vector search request
+VECTOR_SEARCH_MAX_QUERIES = int(os.getenv("VECTOR_SEARCH_MAX_QUERIES", "256"))
+VECTOR_SEARCH_MAX_K = int(os.getenv("VECTOR_SEARCH_MAX_K", "100"))
+
+# Connection pool behaviour: how long checkout waits when every connection is in use, when idle
+# connections are pinged before reuse or closed, and the maximum age of any connection
+DB_POOL_WAIT_SECONDS = float(os.getenv("DB_POOL_WAIT_SECONDS", "10"))
+DB_POOL_VALIDATE_IDLE_SECONDS = float(os.getenv("DB_POOL_VALIDATE_IDLE_SECONDS", "30"))
+DB_POOL_IDLE_TIMEOUT_SECONDS = float(os.getenv("DB_POOL_IDLE_TIMEOUT_SECONDS", "300"))
+DB_POOL_MAX_LIFETIME_SECONDS = float(os.getenv("DB_POOL_MAX_LIFETIME_SECONDS", "1800"))
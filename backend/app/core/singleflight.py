@@ -0,0 +1,88 @@
+import asyncio
+import copy
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from app.core.llm_scheduler import current_request_context
+from app.core.settings import SINGLEFLIGHT_MEMO_SECONDS
+
+# Upper bound on memoized results kept at once
+MAX_MEMO_ENTRIES = 256
+
+def request_key(namespace, **inputs):
+    """
+    Stable key for a request: namespace plus a hash of its normalized inputs
+
+    The caller's tenant and priority level are part of the key, so one
+    tenant's run is never shared with another, and an urgent request never
+    waits on a run that is being scheduled at a lower priority.
+    """
+    level, tenant = current_request_context()
+    payload = json.dumps({**inputs, "_tenant": tenant, "_level": level}, sort_keys=True, default=str)
+    return f"{namespace}:{hashlib.sha256(payload.encode('utf-8')).hexdigest()}"
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical requests into one execution
+
+    The first caller for a key starts the work as its own task; callers that
+    arrive while it is in flight await the same task and share its result or
+    exception. Because the work runs in a separate task, a disconnecting
+    caller does not cancel it for the others. Successful results can also be
+    memoized for memo_ttl_seconds. Every caller gets its own copy of the
+    result, so one caller changing it cannot affect the others.
+    """
+
+    def __init__(self, memo_ttl_seconds=0.0):
+        self.memo_ttl_seconds = memo_ttl_seconds
+        self._inflight = {}
+        self._memo = OrderedDict()
+        self._counters = {"executions": 0, "coalesced": 0, "memo_hits": 0}
+
+    async def do(self, key, fn, memoize=None):
+        """
+        Run fn() once per key among concurrent callers
+
+        Args:
+            key (str): Request key, see request_key()
+            fn: Zero-argument coroutine function doing the work
+            memoize: Optional predicate deciding whether a result may be memoized
+
+        Returns:
+            A copy of the shared result of fn()
+        """
+        memo = self._memo.get(key)
+        if memo is not None:
+            expires_at, result = memo
+            if expires_at > time.monotonic():
+                self._counters["memo_hits"] += 1
+                return copy.deepcopy(result)
+            del self._memo[key]
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self._counters["coalesced"] += 1
+            return copy.deepcopy(await asyncio.shield(task))
+
+        task = asyncio.ensure_future(fn())
+        self._inflight[key] = task
+        self._counters["executions"] += 1
+        task.add_done_callback(lambda done: self._finish(key, done, memoize))
+        return copy.deepcopy(await asyncio.shield(task))
+
+    def stats(self):
+        return {**self._counters, "in_flight": len(self._inflight), "memo_entries": len(self._memo)}
+
+    def _finish(self, key, task, memoize):
+        self._inflight.pop(key, None)
+        if task.cancelled() or task.exception() is not None or self.memo_ttl_seconds <= 0:
+            return
+        result = task.result()
+        if memoize is None or memoize(result):
+            self._memo[key] = (time.monotonic() + self.memo_ttl_seconds, result)
+            while len(self._memo) > MAX_MEMO_ENTRIES:
+                self._memo.popitem(last=False)
+
+# Shared coalescer for API requests
+request_coalescer = SingleFlight(memo_ttl_seconds=SINGLEFLIGHT_MEMO_SECONDS)
@@ -1,5 +1,5 @@
-from supabase import create_client
-from app.core.settings import SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY
+from supabase import create_client, ClientOptions
+from app.core.settings import SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY, DB_QUERY_TIMEOUT_SECONDS
 import logging
 
 # Set up logging
@@ -11,7 +11,10 @@ supabase = None
 if SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY:
     try:
         # Now passing both required arguments
-        supabase = create_client(SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY)
+        supabase = create_client(
+            SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY,
+            options=ClientOptions(postgrest_client_timeout=DB_QUERY_TIMEOUT_SECONDS)
+        )
         logger.info("Supabase client initialized successfully")
     except Exception as e:
         logger.error(f"Error initializing Supabase client: {str(e)}")
@@ -30,7 +33,7 @@ def get_document_chunks(query_embedding, limit=5):
     if supabase is None:
         raise ValueError("Supabase client is not initialized. Check SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY in your .env file")
         
-    response = supabase.table("document_chunks").select("*") \
+    response = supabase.table("document_chunks").select("id, content") \
                       .order(f"embedding <-> '{query_embedding}'::vector") \
                       .limit(limit) \
                       .execute()
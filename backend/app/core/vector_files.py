@@ -0,0 +1,165 @@
+import fcntl
+import json
+import os
+import logging
+from contextlib import contextmanager
+import numpy as np
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Rows the vector and assignment files are first created with
+MIN_CAPACITY = 1024
+INDEX_FILES = ("meta.json", "ids.log", "vectors.f32", "assignments.i32", "centroids.npy")
+
+class VectorFiles:
+    """
+    On-disk state of a vector index, shared between processes
+
+    ids.log holds one JSON-encoded id per line and only grows, except when
+    the index is compacted. Vectors (float32) and cluster assignments (int32)
+    are memory-mapped files written in place, grown by doubling. centroids.npy
+    is rewritten when clusters are retrained, and meta.json holds the counts
+    and a generation number that every write increments.
+
+    Writers hold an exclusive flock on the directory's lock file, readers a
+    shared one. Reading (_refresh) never modifies the files; anything that
+    does runs under the exclusive lock.
+    """
+
+    def __init__(self, directory, dim):
+        self.directory = directory
+        self.dim = dim
+        os.makedirs(directory, exist_ok=True)
+        self._lock_file = open(self._path("lock"), "a")
+        self.ids, self._rows, self._vectors, self._assignments = [], {}, None, None
+        self._centroids, self._trained_size, self._generation, self._ids_bytes = None, 0, None, 0
+        with self._file_lock(exclusive=True):
+            self._repair()
+            self._refresh()
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    @contextmanager
+    def _file_lock(self, exclusive):
+        """Lock the index directory against writers in other processes"""
+        fcntl.flock(self._lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+
+    def _read_meta(self):
+        if not os.path.exists(self._path("meta.json")):
+            return None
+        with open(self._path("meta.json")) as meta_file:
+            return json.load(meta_file)
+
+    def _refresh(self):
+        """Reload the index if another process (or nobody yet) has written it since we last read it"""
+        meta = self._read_meta() or {"count": 0, "trained_size": 0, "generation": 0}
+        if meta["generation"] == self._generation:
+            return
+        self.ids, self._ids_bytes = [], 0
+        if os.path.exists(self._path("ids.log")):
+            # Lines past count were appended by a writer that died before updating meta.json
+            with open(self._path("ids.log")) as ids_file:
+                for _, line in zip(range(meta["count"]), ids_file):
+                    self.ids.append(json.loads(line))
+                    self._ids_bytes += len(line)
+        self._rows = {entry_id: row for row, entry_id in enumerate(self.ids)}
+        self._map()
+        self._trained_size = meta["trained_size"]
+        self._centroids = np.load(self._path("centroids.npy")) if self._trained_size else None
+        self._generation = meta["generation"]
+        self._loaded()
+
+    def _loaded(self):
+        """Hook for state derived from the files, called after they are (re)loaded"""
+
+    def _map(self, capacity=0):
+        """Memory-map the vector and assignment files, first extending them to capacity rows"""
+        self._vectors, self._assignments = None, None
+        for name, width in (("vectors.f32", self.dim * 4), ("assignments.i32", 4)):
+            if capacity and (not os.path.exists(self._path(name)) or os.path.getsize(self._path(name)) < capacity * width):
+                with open(self._path(name), "ab") as data_file:
+                    data_file.truncate(capacity * width)
+        if not os.path.exists(self._path("vectors.f32")) or not os.path.getsize(self._path("vectors.f32")):
+            return
+        capacity = os.path.getsize(self._path("vectors.f32")) // (self.dim * 4)
+        self._vectors = np.memmap(self._path("vectors.f32"), dtype=np.float32, mode="r+", shape=(capacity, self.dim))
+        self._assignments = np.memmap(self._path("assignments.i32"), dtype=np.int32, mode="r+", shape=(capacity,))
+
+    def _reserve(self, count):
+        """Grow the vector and assignment files (doubling) so they hold at least count rows"""
+        capacity = len(self._vectors) if self._vectors is not None else 0
+        if count > capacity:
+            self._map(max(MIN_CAPACITY, capacity * 2, count))
+
+    def _append_ids(self, new_ids):
+        """Append ids to ids.log after dropping any lines a crashed writer left past the last count"""
+        if os.path.exists(self._path("ids.log")) and os.path.getsize(self._path("ids.log")) > self._ids_bytes:
+            os.truncate(self._path("ids.log"), self._ids_bytes)
+        lines = [json.dumps(entry_id) + "\n" for entry_id in new_ids]
+        with open(self._path("ids.log"), "a") as ids_file:
+            ids_file.writelines(lines)
+        self._ids_bytes += sum(len(line) for line in lines)
+
+    def _rewrite_ids(self):
+        lines = [json.dumps(entry_id) + "\n" for entry_id in self.ids]
+        with open(self._path("ids.log.tmp"), "w") as ids_file:
+            ids_file.writelines(lines)
+        os.replace(self._path("ids.log.tmp"), self._path("ids.log"))
+        self._ids_bytes = sum(len(line) for line in lines)
+
+    def _save_centroids(self):
+        np.save(self._path("centroids.tmp.npy"), self._centroids)
+        os.replace(self._path("centroids.tmp.npy"), self._path("centroids.npy"))
+
+    def _save_meta(self):
+        """Publish a write: flush the mapped files, then bump the generation in meta.json"""
+        if self._vectors is not None:
+            self._vectors.flush()
+            self._assignments.flush()
+        if self._centroids is None and os.path.exists(self._path("centroids.npy")):
+            os.remove(self._path("centroids.npy"))
+        self._generation = (self._generation or 0) + 1
+        with open(self._path("meta.json.tmp"), "w") as meta_file:
+            json.dump({
+                "dim": self.dim, "count": len(self.ids),
+                "trained_size": self._trained_size, "generation": self._generation
+            }, meta_file)
+        os.replace(self._path("meta.json.tmp"), self._path("meta.json"))
+
+    def _repair(self):
+        """
+        Bring the files to the current layout before first use (exclusive lock held)
+
+        An index with a different dimension is discarded. One saved with every
+        id in meta.json and assignments.npy is converted to the append-only files.
+        """
+        meta = self._read_meta()
+        if meta is None:
+            return
+        if meta["dim"] != self.dim:
+            logger.warning(f"Vector index {self.directory} has dimension {meta['dim']}, expected {self.dim}; starting empty")
+            for name in INDEX_FILES:
+                if os.path.exists(self._path(name)):
+                    os.remove(self._path(name))
+            return
+        if "ids" not in meta:
+            return
+        self.ids = meta["ids"]
+        self._rewrite_ids()
+        self._map(max(MIN_CAPACITY, len(self.ids)))
+        trained = os.path.exists(self._path("assignments.npy"))
+        if trained:
+            self._assignments[:len(self.ids)] = np.load(self._path("assignments.npy"))
+            os.remove(self._path("assignments.npy"))
+        self._trained_size = meta.get("trained_size", len(self.ids)) if trained else 0
+        self._centroids = np.load(self._path("centroids.npy")) if trained else None
+        self._save_meta()
+        # Let _refresh load the converted files
+        self._generation = None
@@ -0,0 +1,237 @@
+import os
+import threading
+import logging
+import numpy as np
+from app.core.embeddings import embed_texts, catalog_text
+from app.core.vector_files import VectorFiles
+from app.core.settings import (
+    VECTOR_INDEX_DIR, EMBEDDING_DIM, VECTOR_INDEX_NPROBE, VECTOR_INDEX_TRAIN_SIZE
+)
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Rows assigned to clusters per matrix product, to bound temporary memory
+ASSIGN_CHUNK = 8192
+KMEANS_ITERATIONS = 10
+# Clusters are retrained once the index has grown this many times past its last training
+RETRAIN_GROWTH = 4
+
+class VectorIndex(VectorFiles):
+    """
+    Approximate nearest-neighbour index over unit vectors (cosine similarity)
+
+    Vectors live in a float32 file that is memory-mapped, so the index opens
+    instantly and the OS pages in only what searches touch. Small indexes are
+    searched exhaustively. Once train_size vectors are stored, k-means splits
+    them into about sqrt(n) clusters (inverted file) and a query scans only
+    the nprobe clusters whose centroids are closest. Vectors added later join
+    their nearest cluster, and clusters are retrained as the index grows, so
+    lists stay around sqrt(n) long. Adding an existing id replaces its vector.
+
+    Writes are append-only (see VectorFiles) and inverted lists are rebuilt
+    lazily on the next search. Writers hold an exclusive file lock and first
+    pick up what other processes wrote, so several workers can share one index.
+    """
+
+    def __init__(self, directory, dim, nprobe, train_size):
+        self.nprobe = nprobe
+        self.train_size = train_size
+        self._lock = threading.Lock()
+        self._lists = None
+        super().__init__(directory, dim)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def add(self, ids, vectors):
+        """
+        Insert or replace vectors
+
+        Args:
+            ids (list): One id per vector
+            vectors (numpy.ndarray): Array of shape (len(ids), dim)
+        """
+        if not len(ids):
+            return
+        vectors = np.asarray(vectors, dtype=np.float32)
+        with self._lock, self._file_lock(exclusive=True):
+            self._refresh()
+            rows, new_ids = [], []
+            for entry_id in ids:
+                entry_id = str(entry_id)
+                row = self._rows.get(entry_id)
+                if row is None:
+                    row = len(self.ids)
+                    self._rows[entry_id] = row
+                    self.ids.append(entry_id)
+                    new_ids.append(entry_id)
+                rows.append(row)
+            self._reserve(len(self.ids))
+            rows = np.asarray(rows, dtype=np.int64)
+            self._vectors[rows] = vectors
+
+            if len(self.ids) >= max(self.train_size, self._trained_size * RETRAIN_GROWTH):
+                self._train()
+            elif self._centroids is not None:
+                self._assignments[rows] = self._assign(vectors)
+            self._lists = None
+            self._append_ids(new_ids)
+            self._save_meta()
+
+    def retain(self, keep_ids):
+        """
+        Drop every vector whose id is not in keep_ids, compacting the files
+
+        Returns:
+            int: Number of vectors removed
+        """
+        keep_ids = {str(entry_id) for entry_id in keep_ids}
+        with self._lock, self._file_lock(exclusive=True):
+            self._refresh()
+            keep = np.asarray([row for row, entry_id in enumerate(self.ids) if entry_id in keep_ids], dtype=np.int64)
+            removed = len(self.ids) - len(keep)
+            if not removed:
+                return 0
+            self._vectors[:len(keep)] = self._vectors[keep]
+            self._assignments[:len(keep)] = self._assignments[keep]
+            self.ids = [self.ids[row] for row in keep]
+            self._rows = {entry_id: row for row, entry_id in enumerate(self.ids)}
+            if len(self.ids) < self.train_size:
+                self._centroids, self._trained_size = None, 0
+            self._lists = None
+            self._rewrite_ids()
+            self._save_meta()
+            logger.info(f"Removed {removed} stale vectors from {self.directory}")
+            return removed
+
+    def search(self, queries, k=5):
+        """
+        Nearest stored vectors for a batch of queries
+
+        Args:
+            queries (numpy.ndarray): Array of shape (m, dim)
+            k (int): Neighbours per query
+
+        Returns:
+            list: For each query, up to k (id, cosine similarity) pairs, best first
+        """
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        with self._lock:
+            with self._file_lock(exclusive=False):
+                self._refresh()
+            count = len(self.ids)
+            if count == 0:
+                return [[] for _ in queries]
+            vectors = self._vectors[:count]
+            if self._centroids is None:
+                return [self._top(np.arange(count), scores, k) for scores in queries @ vectors.T]
+            if self._lists is None:
+                self._build_lists()
+
+            nprobe = min(self.nprobe, len(self._centroids))
+            probes = np.argpartition(-(queries @ self._centroids.T), nprobe - 1, axis=1)[:, :nprobe]
+
+            # Visit each probed cluster once for the whole batch, so its vectors are
+            # read once and scored against every query that probes it in one product
+            candidates = [[] for _ in queries]
+            scores = [[] for _ in queries]
+            query_rows, probe_clusters = np.nonzero(probes >= 0)[0], probes.ravel()
+            order = np.argsort(probe_clusters, kind="stable")
+            clusters, starts = np.unique(probe_clusters[order], return_index=True)
+            for cluster, members in zip(clusters, np.split(query_rows[order], starts[1:])):
+                rows = self._lists[cluster]
+                if not len(rows):
+                    continue
+                block = vectors[rows] @ queries[members].T
+                if len(rows) > k:
+                    best = np.argpartition(-block, k - 1, axis=0)[:k]
+                    block = np.take_along_axis(block, best, axis=0)
+                    rows = rows[best]
+                else:
+                    rows = np.repeat(rows[:, None], len(members), axis=1)
+                for column, query in enumerate(members):
+                    candidates[query].append(rows[:, column])
+                    scores[query].append(block[:, column])
+            return [
+                self._top(np.concatenate(query_candidates), np.concatenate(query_scores), k) if query_candidates else []
+                for query_candidates, query_scores in zip(candidates, scores)
+            ]
+
+    def stats(self):
+        return {
+            "vectors": len(self.ids),
+            "dim": self.dim,
+            "clusters": 0 if self._centroids is None else len(self._centroids),
+            "nprobe": self.nprobe
+        }
+
+    def _top(self, candidates, scores, k):
+        if len(candidates) > k:
+            best = np.argpartition(-scores, k - 1)[:k]
+            candidates, scores = candidates[best], scores[best]
+        order = np.argsort(-scores)
+        return [(self.ids[candidates[index]], float(scores[index])) for index in order]
+
+    def _train(self):
+        """Spherical k-means over all stored vectors, then assign every vector to a cluster"""
+        vectors = self._vectors[:len(self.ids)]
+        clusters = max(1, int(np.sqrt(len(vectors))))
+        rng = np.random.default_rng(0)
+        centroids = np.array(vectors[rng.choice(len(vectors), clusters, replace=False)])
+        sample = np.array(vectors[rng.choice(len(vectors), min(len(vectors), clusters * 64), replace=False)])
+        for _ in range(KMEANS_ITERATIONS):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            order = np.argsort(labels, kind="stable")
+            members, starts = np.unique(labels[order], return_index=True)
+            sums = np.zeros_like(centroids)
+            sums[members] = np.add.reduceat(sample[order], starts)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            # Clusters that lost every sample keep their previous centroid
+            centroids = np.where(norms > 0, sums / np.maximum(norms, 1e-12), centroids).astype(np.float32)
+        self._centroids = centroids
+        self._trained_size = len(vectors)
+        self._assignments[:len(vectors)] = self._assign(vectors)
+        self._save_centroids()
+        logger.info(f"Trained vector index {self.directory}: {clusters} clusters over {len(vectors)} vectors")
+
+    def _assign(self, vectors):
+        return np.concatenate([
+            np.argmax(vectors[start:start + ASSIGN_CHUNK] @ self._centroids.T, axis=1)
+            for start in range(0, len(vectors), ASSIGN_CHUNK)
+        ]).astype(np.int32) if len(vectors) else np.zeros(0, dtype=np.int32)
+
+    def _build_lists(self):
+        assignments = self._assignments[:len(self.ids)]
+        order = np.argsort(assignments, kind="stable")
+        bounds = np.searchsorted(assignments[order], np.arange(len(self._centroids) + 1))
+        self._lists = [order[bounds[cluster]:bounds[cluster + 1]] for cluster in range(len(self._centroids))]
+
+    def _loaded(self):
+        self._lists = None
+
+def open_index(name):
+    """Index stored under VECTOR_INDEX_DIR/name"""
+    return VectorIndex(os.path.join(VECTOR_INDEX_DIR, name), EMBEDDING_DIM, VECTOR_INDEX_NPROBE, VECTOR_INDEX_TRAIN_SIZE)
+
+# Shared indexes by name, opened on first use rather than at import
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+def get_index(name):
+    """Get the shared index stored under VECTOR_INDEX_DIR/name, opening it on first use"""
+    with _indexes_lock:
+        if name not in _indexes:
+            _indexes[name] = open_index(name)
+        return _indexes[name]
+
+def get_catalog_index():
+    """Shared index of data catalog entries"""
+    return get_index("catalog")
+
+def index_catalog_entries(entries):
+    """Embed data catalog entries and add them to the catalog index; returns how many were added"""
+    if entries:
+        get_catalog_index().add([entry["id"] for entry in entries], embed_texts([catalog_text(entry) for entry in entries]))
+    return len(entries)
@@ -0,0 +1,202 @@
+import asyncio
+import uuid
+import logging
+from app.core import db_client
+from app.core.supabase_client import supabase
+from app.core.async_db import run_db
+from app.core.settings import (
+    WRITE_BEHIND_BATCH_SIZE, WRITE_BEHIND_FLUSH_SECONDS,
+    WRITE_BEHIND_MAX_PENDING, WRITE_BEHIND_MAX_RETRIES
+)
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Unique column that makes a retried batch overwrite its first attempt instead of duplicating it
+IDEMPOTENCY_KEY = "idempotency_key"
+
+# Tables written through the buffer; migration 002 gives each a unique idempotency key
+TABLES = ("findings", "action_items")
+
+def idempotency_keys_ready(tables=TABLES):
+    """
+    Whether every table has the unique idempotency_key index from migration 002
+
+    The index is looked up in the catalog over the direct connection when
+    there is one. Through Supabase only the column can be checked; migration
+    002 adds it together with the index.
+    """
+    if db_client.pool is not None:
+        rows = db_client.execute_query(
+            "SELECT t.relname FROM pg_index i "
+            "JOIN pg_class t ON t.oid = i.indrelid "
+            "JOIN pg_attribute a ON a.attrelid = t.oid AND a.attnum = i.indkey[0] "
+            "WHERE i.indisunique AND i.indnatts = 1 AND a.attname = %s AND t.relname = ANY(%s)",
+            (IDEMPOTENCY_KEY, list(tables))
+        )
+        return {row["relname"] for row in rows} >= set(tables)
+    if supabase is None:
+        return True
+    for table in tables:
+        # Fails if the column does not exist
+        supabase.table(table).select(IDEMPOTENCY_KEY).limit(1).execute()
+    return True
+
+def upsert_rows(table, rows):
+    """Write a batch to Supabase in one call; rows already written are matched by idempotency key"""
+    if supabase is None:
+        return
+    supabase.table(table).upsert(rows, on_conflict=IDEMPOTENCY_KEY).execute()
+
+class WriteBehindBuffer:
+    """
+    Buffers inserts and writes them in batches after the response is sent
+
+    Rows are flushed per table when a table reaches batch_size rows or every
+    flush_seconds. Each row gets an idempotency key when it is queued, so a
+    batch that failed part way can be retried without duplicating rows.
+    Callers wait only when max_pending rows are already waiting, which bounds
+    memory if the database falls behind. Everything left is flushed on stop.
+    Code that reads a buffered table back calls flush(table) first. When the
+    buffer is not running, rows are written immediately in one attempt and
+    errors go to the caller.
+
+    Retried batches are only safe when the tables have the unique key, so
+    start() runs check() first and leaves the buffer off (writing inline)
+    if it fails.
+    """
+
+    def __init__(self, write, batch_size, flush_seconds, max_pending, max_retries, check=None):
+        self.write = write
+        self.check = check
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.max_pending = max_pending
+        self.max_retries = max_retries
+        self._pending = {}
+        self._size = 0
+        self._task = None
+        self._wakeup = None
+        self._space = None
+        self._flush_lock = None
+        self._closing = False
+        self._counts = {"queued": 0, "written": 0, "batches": 0, "retries": 0, "dropped": 0}
+
+    async def start(self):
+        """Start flushing in the background; returns whether the buffer is running"""
+        if self.check is not None:
+            try:
+                ready = await run_db(self.check)
+            except Exception as e:
+                logger.error(f"Error checking write-behind idempotency keys: {str(e)}")
+                ready = False
+            if not ready:
+                logger.error(
+                    "Write-behind disabled: the unique idempotency_key index is missing "
+                    "(run migrations/002_write_behind_idempotency.sql); rows are written inline"
+                )
+                return False
+        self._wakeup = asyncio.Event()
+        self._space = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._closing = False
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"Started write-behind buffer (batches of {self.batch_size}, every {self.flush_seconds}s)")
+        return True
+
+    async def stop(self):
+        """Flush everything still pending, then stop"""
+        if self._task is None:
+            return
+        self._closing = True
+        self._wakeup.set()
+        await self._task
+        self._task = None
+
+    async def put(self, table, rows):
+        """
+        Queue rows for a table
+
+        Args:
+            table (str): Table to insert into
+            rows (list): Rows as dicts; queued copies get an idempotency_key if they have none
+        """
+        rows = [{IDEMPOTENCY_KEY: str(uuid.uuid4()), **row} for row in rows]
+        if self._task is None:
+            await run_db(self.write, table, rows)
+            self._counts["written"] += len(rows)
+            self._counts["batches"] += 1
+            return
+
+        while self._size >= self.max_pending:
+            self._space.clear()
+            await self._space.wait()
+        self._pending.setdefault(table, []).extend(rows)
+        self._size += len(rows)
+        self._counts["queued"] += len(rows)
+        if len(self._pending[table]) >= self.batch_size:
+            self._wakeup.set()
+
+    async def flush(self, *tables):
+        """
+        Write the pending rows of the given tables now, for read-after-write
+
+        Also waits for a background flush already writing them, so once this
+        returns every row queued before the call is in the database (or dropped
+        after its retries).
+        """
+        if self._task is None:
+            return
+        async with self._flush_lock:
+            for table in tables:
+                rows = self._pending.pop(table, [])
+                await self._write_rows(table, rows)
+
+    def stats(self):
+        return {"running": self._task is not None, "pending": self._size, **self._counts}
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self._flush()
+            if self._closing:
+                return
+
+    async def _flush(self):
+        async with self._flush_lock:
+            while self._pending:
+                table, rows = self._pending.popitem()
+                await self._write_rows(table, rows)
+
+    async def _write_rows(self, table, rows):
+        for start in range(0, len(rows), self.batch_size):
+            await self._write_batch(table, rows[start:start + self.batch_size])
+        self._size -= len(rows)
+        self._space.set()
+
+    async def _write_batch(self, table, rows):
+        for attempt in range(self.max_retries + 1):
+            try:
+                await run_db(self.write, table, rows)
+                self._counts["written"] += len(rows)
+                self._counts["batches"] += 1
+                return
+            except Exception as e:
+                if attempt == self.max_retries:
+                    self._counts["dropped"] += len(rows)
+                    logger.error(f"Dropped {len(rows)} {table} rows after {attempt + 1} attempts: {str(e)}")
+                    return
+                self._counts["retries"] += 1
+                logger.warning(f"Error writing {len(rows)} {table} rows (retrying): {str(e)}")
+                await asyncio.sleep(min(0.5 * 2 ** attempt, 30))
+
+# Shared buffer for findings and action items, started in the app lifespan unless disabled
+write_behind = WriteBehindBuffer(
+    upsert_rows, WRITE_BEHIND_BATCH_SIZE, WRITE_BEHIND_FLUSH_SECONDS,
+    WRITE_BEHIND_MAX_PENDING, WRITE_BEHIND_MAX_RETRIES, check=idempotency_keys_ready
+)
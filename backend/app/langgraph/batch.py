@@ -0,0 +1,61 @@
+import asyncio
+import time
+from typing import Dict, Any, List, Optional
+from app.core.settings import PIPELINE_BATCH_CONCURRENCY, PIPELINE_BATCH_MAX_CONCURRENCY
+from app.langgraph.pipeline import run_pipeline_coalesced
+
+async def run_pipeline_batch(entries: List[Dict[str, Any]], max_concurrency: Optional[int] = None):
+    """
+    Run the workflow over many regulations with bounded concurrency
+
+    Args:
+        entries (list): Items with a "regulation" dict, plus an optional
+            "regulation_diff_id". Items whose regulation is None are reported
+            as not found instead of being run.
+        max_concurrency (int): Maximum simultaneous pipeline runs
+
+    Returns:
+        dict: Per-item results and errors, with batch throughput
+    """
+    concurrency = max(1, min(max_concurrency or PIPELINE_BATCH_CONCURRENCY, PIPELINE_BATCH_MAX_CONCURRENCY))
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run_one(index, entry):
+        item = {"index": index, "regulation_diff_id": entry.get("regulation_diff_id")}
+        regulation = entry.get("regulation")
+        if regulation is None:
+            return {**item, "status": "error", "error": "Regulation diff not found"}
+
+        async with semaphore:
+            started = time.perf_counter()
+            result = await run_pipeline_coalesced(regulation=regulation)
+            item["duration_seconds"] = round(time.perf_counter() - started, 3)
+        item["run_id"] = result.get("run_id")
+
+        if result.get("error"):
+            return {**item, "status": "error", "error": result["error"], "partial_results": result}
+        return {
+            **item,
+            "status": "success",
+            "data": {
+                "regulation": result.get("regulation", {}),
+                "action_items": result.get("action_plan", {}).get("action_items", []),
+                "final_report": result.get("final_report", {})
+            }
+        }
+
+    print(f"Running pipeline batch of {len(entries)} regulations with concurrency {concurrency}...")
+    started = time.perf_counter()
+    items = await asyncio.gather(*(run_one(index, entry) for index, entry in enumerate(entries)))
+    elapsed = time.perf_counter() - started
+
+    succeeded = sum(1 for item in items if item["status"] == "success")
+    return {
+        "items": items,
+        "total": len(items),
+        "succeeded": succeeded,
+        "failed": len(items) - succeeded,
+        "concurrency": concurrency,
+        "elapsed_seconds": round(elapsed, 3),
+        "regulations_per_minute": round(len(items) / elapsed * 60, 2) if elapsed > 0 else None
+    }
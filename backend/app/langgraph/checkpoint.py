@@ -0,0 +1,75 @@
+import os
+import logging
+import aiosqlite
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+from app.core.settings import PIPELINE_CHECKPOINTS_ENABLED, PIPELINE_CHECKPOINT_PATH, PIPELINE_CHECKPOINT_MAX_RUNS
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Durable checkpointer shared by compiled graphs, opened in the app lifespan
+_connection = None
+_checkpointer = None
+# Runs finished since the last prune
+_finished_runs = 0
+
+async def open_checkpointer(path=PIPELINE_CHECKPOINT_PATH):
+    """Open the SQLite checkpoint store; a no-op when checkpoints are disabled"""
+    global _connection, _checkpointer
+    if not PIPELINE_CHECKPOINTS_ENABLED or _checkpointer is not None:
+        return _checkpointer
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    _connection = await aiosqlite.connect(path)
+    _checkpointer = AsyncSqliteSaver(_connection)
+    await _checkpointer.setup()
+    logger.info(f"Pipeline checkpoints stored at {path}")
+    await prune_checkpoints()
+    return _checkpointer
+
+async def close_checkpointer():
+    global _connection, _checkpointer
+    if _connection is not None:
+        await _connection.close()
+    _connection = None
+    _checkpointer = None
+
+def get_checkpointer():
+    """The open checkpointer, or None when runs are not being checkpointed"""
+    return _checkpointer
+
+async def prune_checkpoints(max_runs=PIPELINE_CHECKPOINT_MAX_RUNS):
+    """
+    Delete the checkpoints of all but the max_runs most recent runs
+
+    Checkpoint ids are time-ordered, so a run's newest checkpoint id orders
+    runs by when they last made progress. Returns how many runs were deleted.
+    """
+    global _finished_runs
+    _finished_runs = 0
+    if _checkpointer is None:
+        return 0
+    try:
+        async with _connection.execute(
+            "SELECT thread_id FROM checkpoints GROUP BY thread_id ORDER BY MAX(checkpoint_id) DESC LIMIT -1 OFFSET ?",
+            (max_runs,)
+        ) as cursor:
+            stale = [row[0] for row in await cursor.fetchall()]
+        for thread_id in stale:
+            await _checkpointer.adelete_thread(thread_id)
+    except Exception as e:
+        logger.error(f"Error pruning pipeline checkpoints: {str(e)}")
+        return 0
+    if stale:
+        logger.info(f"Pruned checkpoints of {len(stale)} old pipeline runs")
+    return len(stale)
+
+async def run_finished():
+    """Count a finished run; prunes old runs once a tenth of max runs have finished since the last prune"""
+    global _finished_runs
+    _finished_runs += 1
+    if _finished_runs >= max(1, PIPELINE_CHECKPOINT_MAX_RUNS // 10):
+        await prune_checkpoints()
@@ -0,0 +1,325 @@
+from typing import Dict, Any, List, TypedDict, Annotated
+from langgraph.graph import END
+from langgraph.types import Send
+from app.core.llm import ainvoke_llm
+from app.core.settings import PIPELINE_MAX_BRANCHES
+import operator
+import json
+
+# Define the state structure as a TypedDict
+class WorkflowState(TypedDict, total=False):
+    """State structure for the workflow"""
+    regulation: Dict[str, str]
+    privacy_policy: str
+    analysis: Dict[str, List[str]]
+    # Per-branch results, merged by the reducer as parallel branches finish
+    requirement_impacts: Annotated[List[Dict[str, Any]], operator.add]
+    requirement_plans: Annotated[List[Dict[str, Any]], operator.add]
+    impact: Dict[str, Any]
+    action_plan: Dict[str, List[Dict[str, str]]]
+    final_report: Dict[str, Any]
+    error: str
+
+# Static regulation example, used when a run is started without a regulation
+DEFAULT_REGULATION = {
+    "title": "Align Data Handling with Singapore PDPA Updates",
+    "description": "Adapt data retention policies to comply with new PDPA amendments on data breach notification timelines.",
+    "priority": "high",
+    "dueDate": "May 30, 2025",
+    "potentialFine": "Up to SGD 1 million (approx. USD 740,000)"
+}
+
+# Static privacy policy
+DEFAULT_PRIVACY_POLICY = """Privacy Policy
+    Last Updated: January 1, 2024
+
+    1. Data Collection and Use
+    We collect personal information from users for specific business purposes.
+
+    2. Data Retention
+    We retain personal data for as long as necessary to provide our services.
+
+    3. Data Breach Notification
+    In the event of a data breach, we will notify affected users within 72 hours.
+
+    4. User Rights
+    Users have the right to access, correct, and delete their personal data.
+
+    5. International Data Transfers
+    We may transfer data internationally in compliance with applicable laws.
+    """
+
+def normalize_regulation(regulation: Dict[str, Any]) -> Dict[str, str]:
+    """Map a regulation dict (pipeline or regulation_diffs shaped) to the fields the prompts use"""
+    return {
+        "title": regulation.get("title") or "Untitled Regulation",
+        "description": regulation.get("description") or regulation.get("summary") or regulation.get("content") or "",
+        "priority": regulation.get("priority") or "medium",
+        "dueDate": regulation.get("dueDate") or regulation.get("due_date") or "Not specified",
+        "potentialFine": regulation.get("potentialFine") or regulation.get("potential_fine") or "Not specified"
+    }
+
+def requirement_groups(requirements: List[str]) -> List[List[str]]:
+    """Split key requirements into at most PIPELINE_MAX_BRANCHES contiguous groups"""
+    if not requirements:
+        return [[]]
+    branch_count = max(1, min(len(requirements), PIPELINE_MAX_BRANCHES))
+    size, remainder = divmod(len(requirements), branch_count)
+    groups = []
+    start = 0
+    for index in range(branch_count):
+        end = start + size + (1 if index < remainder else 0)
+        groups.append(requirements[start:end])
+        start = end
+    return groups
+
+def merge_unique(lists: List[List[str]]) -> List[str]:
+    """Concatenate lists in order, dropping repeated entries"""
+    merged = []
+    for items in lists:
+        for item in items:
+            if item not in merged:
+                merged.append(item)
+    return merged
+
+async def regulatory_analysis(state: WorkflowState) -> WorkflowState:
+    """Analyze regulatory information and extract key insights"""
+    # Use the regulation and policy supplied with the run, or the static examples
+    regulation = state.get("regulation") or DEFAULT_REGULATION
+    privacy_policy = state.get("privacy_policy") or DEFAULT_PRIVACY_POLICY
+
+    # Create prompt for the LLM
+    prompt = f"""Analyze this regulatory requirement:
+
+    Title: {regulation['title']}
+    Description: {regulation['description']}
+    Priority: {regulation['priority']}
+    Due Date: {regulation['dueDate']}
+    Potential Fine: {regulation['potentialFine']}
+
+    Current Privacy Policy:
+    {privacy_policy}
+
+    Extract the key requirements and policy sections that need updates.
+
+    Your response MUST be a valid JSON object with these exact fields:
+    {{
+        "key_requirements": ["requirement1", "requirement2", ...],
+        "policy_updates": ["section1", "section2", ...]
+    }}
+
+    Make sure your output is properly formatted JSON without any additional text before or after.
+    """
+    try:
+        # Get analysis from LLM
+        print("Sending request to regulatory analysis agent...")
+        response = await ainvoke_llm(prompt)
+        print(f"Received response from LLM: {response.content}...")
+
+        # Try to parse as JSON
+        try:
+            analysis = json.loads(response.content)
+        except:
+            print("Failed to parse JSON, using structured content")
+            # Extract content in a more forgiving way
+            analysis = {
+                "key_requirements": [response.content],
+                "policy_updates": ["Data Breach Notification section"]
+            }
+
+        # Update state with analysis results
+        return {
+            "regulation": regulation,
+            "privacy_policy": privacy_policy,
+            "analysis": analysis
+        }
+
+    except Exception as e:
+        print(f"Error in regulatory analysis: {str(e)}")
+        return {"error": f"Regulatory analysis failed: {str(e)}"}
+
+def fan_out_impact(state: WorkflowState):
+    """Send each requirement group to its own impact assessment branch"""
+    if "error" in state:
+        return END
+    analysis = state["analysis"]
+    return [
+        Send("assess_requirement", {
+            "branch": index,
+            "regulation": state["regulation"],
+            "requirements": group,
+            "policy_updates": analysis.get("policy_updates", [])
+        })
+        for index, group in enumerate(requirement_groups(analysis.get("key_requirements", [])))
+    ]
+
+async def assess_requirement(branch: Dict[str, Any]) -> WorkflowState:
+    """
+    Assess the business impact of one group of requirements
+
+    Runs as a parallel branch. Exceptions are not swallowed here: a failed
+    branch fails the superstep, so the run can be retried without losing the
+    branches that did finish.
+    """
+    regulation = branch["regulation"]
+
+    # Create prompt for impact assessment
+    prompt = f"""Based on this regulation and analysis:
+
+    Regulation: {regulation['title']} - {regulation['description']}
+    Key Requirements: {json.dumps(branch['requirements'])}
+    Policy Updates: {json.dumps(branch['policy_updates'])}
+
+    Assess the business impact:
+    1. What operational changes are needed?
+    2. What are the main compliance risks?
+    3. What is the resource impact?
+
+    Your response MUST be a valid JSON object with these exact fields:
+    {{
+        "operational_changes": ["change1", "change2", ...],
+        "compliance_risks": ["risk1", "risk2", ...],
+        "resource_impact": "brief description"
+    }}
+
+    Make sure your output is properly formatted JSON without any additional text before or after.
+    """
+
+    # Get impact assessment from LLM
+    print(f"Sending request to impact assessment agent (branch {branch['branch']})...")
+    response = await ainvoke_llm(prompt)
+    print(f"Received impact assessment: {response.content[:100]}...")
+
+    # Try to parse as JSON
+    try:
+        impact = json.loads(response.content)
+    except:
+        print("Failed to parse JSON, using structured content")
+        impact = {
+            "operational_changes": ["Update notification processes"],
+            "compliance_risks": ["Missing notification deadlines"],
+            "resource_impact": "Medium - requires policy updates and staff training"
+        }
+
+    return {"requirement_impacts": [{"branch": branch["branch"], "requirements": branch["requirements"], **impact}]}
+
+async def impact_assessment(state: WorkflowState) -> WorkflowState:
+    """Merge the per-requirement impact branches into one assessment"""
+    branches = sorted(state.get("requirement_impacts", []), key=lambda item: item["branch"])
+    resource_impacts = merge_unique([[item["resource_impact"]] for item in branches if item.get("resource_impact")])
+    impact = {
+        "operational_changes": merge_unique([item.get("operational_changes", []) for item in branches]),
+        "compliance_risks": merge_unique([item.get("compliance_risks", []) for item in branches]),
+        "resource_impact": "; ".join(resource_impacts)
+    }
+    return {"impact": impact}
+
+def fan_out_planning(state: WorkflowState):
+    """Send each assessed requirement group to its own planning branch"""
+    branches = sorted(state.get("requirement_impacts", []), key=lambda item: item["branch"])
+    return [
+        Send("plan_requirement", {
+            "branch": item["branch"],
+            "branch_count": len(branches),
+            "regulation": state["regulation"],
+            "requirements": item["requirements"],
+            "impact": item
+        })
+        for item in branches
+    ]
+
+async def plan_requirement(branch: Dict[str, Any]) -> WorkflowState:
+    """Create action items for one group of requirements (runs as a parallel branch)"""
+    regulation = branch["regulation"]
+    impact = branch["impact"]
+    # A single branch covers the whole regulation; split plans stay smaller
+    item_count = "3-5" if branch["branch_count"] == 1 else "1-3"
+
+    # Create prompt for action planning
+    prompt = f"""Create an action plan:
+
+    Regulation: {regulation['title']} - Due by {regulation['dueDate']}
+    Requirements: {json.dumps(branch['requirements'])}
+    Operational Changes: {json.dumps(impact.get('operational_changes', []))}
+    Compliance Risks: {json.dumps(impact.get('compliance_risks', []))}
+
+Create {item_count} specific action items with:
+- title
+- description
+- priority (high/medium/low)
+- assigned_to (role/department)
+- deadline
+
+Your response MUST be a valid JSON object with these exact fields:
+{{
+    "action_items": [
+        {{
+            "title": "...",
+            "description": "...",
+            "priority": "high|medium|low",
+            "assigned_to": "...",
+            "deadline": "YYYY-MM-DD"
+        }},
+        ...
+    ]
+}}
+
+    """
+
+    # Get action plan from LLM
+    print(f"Sending request to action planning agent (branch {branch['branch']})...")
+    response = await ainvoke_llm(prompt)
+    print(f"Received action plan: {response.content[:100]}...")
+
+    # Try to parse as JSON
+    try:
+        action_plan = json.loads(response.content)
+    except:
+        print("Failed to parse JSON, using structured content")
+        action_plan = {
+            "action_items": [
+                {
+                    "title": "Update Privacy Policy",
+                    "description": "Revise data breach notification section",
+                    "priority": "high",
+                    "assigned_to": "Legal Department",
+                    "deadline": "May 1, 2025"
+                },
+                {
+                    "title": "Staff Training",
+                    "description": "Train staff on new notification procedures",
+                    "priority": "medium",
+                    "assigned_to": "HR Department",
+                    "deadline": "May 15, 2025"
+                }
+            ]
+        }
+
+    return {"requirement_plans": [{"branch": branch["branch"], "action_items": action_plan.get("action_items", [])}]}
+
+async def action_planning(state: WorkflowState) -> WorkflowState:
+    """Merge the per-requirement plans into the action plan and final report"""
+    regulation = state["regulation"]
+    analysis = state["analysis"]
+    impact = state["impact"]
+
+    branches = sorted(state.get("requirement_plans", []), key=lambda item: item["branch"])
+    action_plan = {"action_items": [item for branch in branches for item in branch["action_items"]]}
+
+    # Generate summary report
+    final_report = {
+        "title": f"Compliance Report: {regulation['title']}",
+        "due_date": regulation['dueDate'],
+        "key_requirements": analysis.get('key_requirements', []),
+        "compliance_risks": impact.get('compliance_risks', []),
+        "action_items_count": len(action_plan.get('action_items', [])),
+        "high_priority_actions": len([a for a in action_plan.get('action_items', []) if a.get('priority') == 'high'])
+    }
+
+    return {"action_plan": action_plan, "final_report": final_report}
+
+def should_end(state: WorkflowState) -> str:
+    """Determine if workflow should end"""
+    # action_planning is the last node: whether it produced a report or an
+    # error, the run is finished
+    return END
@@ -1,261 +1,22 @@
-from typing import Dict, Any, List, TypedDict
+from typing import Dict, Any
 from langgraph.graph import StateGraph, END
-from langchain_openai import ChatOpenAI
+from app.langgraph.registry import graph_registry
+from app.langgraph.checkpoint import get_checkpointer, run_finished
+from app.core.singleflight import request_coalescer, request_key
+from app.langgraph.nodes import (
+    WorkflowState,
+    normalize_regulation,
+    regulatory_analysis,
+    fan_out_impact,
+    assess_requirement,
+    impact_assessment,
+    fan_out_planning,
+    plan_requirement,
+    action_planning,
+    should_end,
+)
 import json
-import os
-
-# Define a simple state structure
-# Define the state structure as a TypedDict
-class WorkflowState(TypedDict, total=False):
-    """State structure for the workflow"""
-    regulation: Dict[str, str]
-    privacy_policy: str
-    analysis: Dict[str, List[str]]
-    impact: Dict[str, Any]
-    action_plan: Dict[str, List[Dict[str, str]]]
-    final_report: Dict[str, Any]
-    error: str
-
-# Initialize the LLM
-api_key = os.environ.get("OPENAI_API_KEY")
-if not api_key:
-    raise ValueError("OPENAI_API_KEY is not set in environment variables")
-
-llm = ChatOpenAI(api_key=api_key, model="gpt-4o-mini")
-
-def regulatory_analysis(state: WorkflowState) -> WorkflowState:
-    """Analyze regulatory information and extract key insights"""
-    # Define static regulation example
-    regulation = {
-        "title": "Align Data Handling with Singapore PDPA Updates",
-        "description": "Adapt data retention policies to comply with new PDPA amendments on data breach notification timelines.",
-        "priority": "high",
-        "dueDate": "May 30, 2025",
-        "potentialFine": "Up to SGD 1 million (approx. USD 740,000)"
-    }
-    
-    # Define static privacy policy
-    privacy_policy = """Privacy Policy
-    Last Updated: January 1, 2024
-
-    1. Data Collection and Use
-    We collect personal information from users for specific business purposes.
-
-    2. Data Retention
-    We retain personal data for as long as necessary to provide our services.
-
-    3. Data Breach Notification
-    In the event of a data breach, we will notify affected users within 72 hours.
-
-    4. User Rights
-    Users have the right to access, correct, and delete their personal data.
-
-    5. International Data Transfers
-    We may transfer data internationally in compliance with applicable laws.
-    """
-    
-    # Create prompt for the LLM
-    prompt = f"""Analyze this regulatory requirement:
-    
-    Title: {regulation['title']}
-    Description: {regulation['description']}
-    Priority: {regulation['priority']}
-    Due Date: {regulation['dueDate']}
-    Potential Fine: {regulation['potentialFine']}
-    
-    Current Privacy Policy:
-    {privacy_policy}
-    
-    Extract the key requirements and policy sections that need updates.
-    
-    Your response MUST be a valid JSON object with these exact fields:
-    {{
-        "key_requirements": ["requirement1", "requirement2", ...],
-        "policy_updates": ["section1", "section2", ...]
-    }}
-    
-    Make sure your output is properly formatted JSON without any additional text before or after.
-    """
-    try:
-        # Get analysis from LLM
-        print("Sending request to regulatory analysis agent...")
-        response = llm.invoke(prompt)
-        print(f"Received response from LLM: {response.content}...")
-        
-        # Try to parse as JSON
-        try:
-            analysis = json.loads(response.content)
-        except:
-            print("Failed to parse JSON, using structured content")
-            # Extract content in a more forgiving way
-            analysis = {
-                "key_requirements": [response.content],
-                "policy_updates": ["Data Breach Notification section"]
-            }
-        
-        # Update state with analysis results
-        state["regulation"] = regulation
-        state["privacy_policy"] = privacy_policy
-        state["analysis"] = analysis
-        
-        return state
-        
-    except Exception as e:
-        print(f"Error in regulatory analysis: {str(e)}")
-        state["error"] = f"Regulatory analysis failed: {str(e)}"
-        return state
-
-def impact_assessment(state: WorkflowState) -> WorkflowState:
-    """Assess the impact of the regulatory requirements"""
-    if "error" in state:
-        return state
-        
-    regulation = state["regulation"]
-    analysis = state["analysis"]
-    
-    # Create prompt for impact assessment
-    prompt = f"""Based on this regulation and analysis:
-    
-    Regulation: {regulation['title']} - {regulation['description']}
-    Key Requirements: {json.dumps(analysis.get('key_requirements', []))}
-    Policy Updates: {json.dumps(analysis.get('policy_updates', []))}
-    
-    Assess the business impact:
-    1. What operational changes are needed?
-    2. What are the main compliance risks?
-    3. What is the resource impact?
-    
-    Your response MUST be a valid JSON object with these exact fields:
-    {{
-        "operational_changes": ["change1", "change2", ...],
-        "compliance_risks": ["risk1", "risk2", ...],
-        "resource_impact": "brief description"
-    }}
-
-    Make sure your output is properly formatted JSON without any additional text before or after.
-    """
-    
-    try:
-        # Get impact assessment from LLM
-        print("Sending request to impact assessment agent...")
-        response = llm.invoke(prompt)
-        print(f"Received impact assessment: {response.content[:100]}...")
-        
-        # Try to parse as JSON
-        try:
-            impact = json.loads(response.content)
-        except:
-            print("Failed to parse JSON, using structured content")
-            impact = {
-                "operational_changes": ["Update notification processes"],
-                "compliance_risks": ["Missing notification deadlines"],
-                "resource_impact": "Medium - requires policy updates and staff training"
-            }
-        
-        # Update state with impact results
-        state["impact"] = impact
-        return state
-        
-    except Exception as e:
-        print(f"Error in impact assessment: {str(e)}")
-        state["error"] = f"Impact assessment failed: {str(e)}"
-        return state
-
-def action_planning(state: WorkflowState) -> WorkflowState:
-    """Create action plan based on analysis and impact assessment"""
-    if "error" in state:
-        return state
-        
-    regulation = state["regulation"]
-    analysis = state["analysis"]
-    impact = state["impact"]
-    
-    # Create prompt for action planning
-    prompt = f"""Create an action plan:
-    
-    Regulation: {regulation['title']} - Due by {regulation['dueDate']}
-    Requirements: {json.dumps(analysis.get('key_requirements', []))}
-    Operational Changes: {json.dumps(impact.get('operational_changes', []))}
-    Compliance Risks: {json.dumps(impact.get('compliance_risks', []))}
-
-Create 3-5 specific action items with:
-- title
-- description
-- priority (high/medium/low)
-- assigned_to (role/department)
-- deadline
-
-Your response MUST be a valid JSON object with these exact fields:
-{{
-    "action_items": [
-        {{
-            "title": "...",
-            "description": "...",
-            "priority": "high|medium|low",
-            "assigned_to": "...",
-            "deadline": "YYYY-MM-DD"
-        }},
-        ...
-    ]
-}}
-
-    """
-    
-    try:
-        # Get action plan from LLM
-        print("Sending request to action planning agent...")
-        response = llm.invoke(prompt)
-        print(f"Received action plan: {response.content[:100]}...")
-        
-        # Try to parse as JSON
-        try:
-            action_plan = json.loads(response.content)
-        except:
-            print("Failed to parse JSON, using structured content")
-            action_plan = {
-                "action_items": [
-                    {
-                        "title": "Update Privacy Policy",
-                        "description": "Revise data breach notification section",
-                        "priority": "high",
-                        "assigned_to": "Legal Department",
-                        "deadline": "May 1, 2025"
-                    },
-                    {
-                        "title": "Staff Training",
-                        "description": "Train staff on new notification procedures",
-                        "priority": "medium",
-                        "assigned_to": "HR Department",
-                        "deadline": "May 15, 2025"
-                    }
-                ]
-            }
-        
-        # Update state with action plan
-        state["action_plan"] = action_plan
-        
-        # Generate summary report
-        state["final_report"] = {
-            "title": f"Compliance Report: {regulation['title']}",
-            "due_date": regulation['dueDate'],
-            "key_requirements": analysis.get('key_requirements', []),
-            "compliance_risks": impact.get('compliance_risks', []),
-            "action_items_count": len(action_plan.get('action_items', [])),
-            "high_priority_actions": len([a for a in action_plan.get('action_items', []) if a.get('priority') == 'high'])
-        }
-        
-        return state
-        
-    except Exception as e:
-        print(f"Error in action planning: {str(e)}")
-        state["error"] = f"Action planning failed: {str(e)}"
-        return state
-
-def should_end(state: WorkflowState) -> tuple[bool, str]:
-    """Determine if workflow should end"""
-    if "error" in state or "final_report" in state:
-        return True, END
-    return False, "continue"
+import uuid
 
 # Create the workflow graph
 def create_workflow():
@@ -264,12 +25,18 @@ def create_workflow():
     
     # Add nodes
     workflow.add_node("regulatory_analysis", regulatory_analysis)
+    workflow.add_node("assess_requirement", assess_requirement)
     workflow.add_node("impact_assessment", impact_assessment)
+    workflow.add_node("plan_requirement", plan_requirement)
     workflow.add_node("action_planning", action_planning)
     
-    # Add edges for sequential flow
-    workflow.add_edge("regulatory_analysis", "impact_assessment")
-    workflow.add_edge("impact_assessment", "action_planning")
+    # Fan out one impact branch per requirement group, then merge
+    workflow.add_conditional_edges("regulatory_analysis", fan_out_impact, ["assess_requirement", END])
+    workflow.add_edge("assess_requirement", "impact_assessment")
+    
+    # Fan out one planning branch per requirement group, then merge
+    workflow.add_conditional_edges("impact_assessment", fan_out_planning, ["plan_requirement"])
+    workflow.add_edge("plan_requirement", "action_planning")
     
     # Add conditional edge from action_planning 
     workflow.add_conditional_edges("action_planning", should_end)
@@ -277,23 +44,47 @@ def create_workflow():
     # Set entry point
     workflow.set_entry_point("regulatory_analysis")
     
-    # Compile graph
-    return workflow.compile()
+    # Compile graph, checkpointing every step when a checkpoint store is open
+    return workflow.compile(checkpointer=get_checkpointer())
+
+# Compiled once on first use and shared by all requests
+graph_registry.register("compliance", create_workflow)
+
+# State keys each node contributes, in the order they are streamed to clients
+NODE_OUTPUTS = {
+    "regulatory_analysis": ["analysis"],
+    "assess_requirement": ["requirement_impacts"],
+    "impact_assessment": ["impact"],
+    "plan_requirement": ["requirement_plans"],
+    "action_planning": ["action_plan", "final_report"]
+}
+
+def run_config(run_id: str) -> Dict[str, Any]:
+    """Graph config that checkpoints a run under its run id"""
+    return {"configurable": {"thread_id": run_id}}
+
+def build_initial_state(regulation: Dict[str, Any] = None, privacy_policy: str = None) -> WorkflowState:
+    """Initialize state, seeded with the regulation to analyze if one was given"""
+    initial_state = WorkflowState()
+    if regulation:
+        initial_state["regulation"] = normalize_regulation(regulation)
+    if privacy_policy:
+        initial_state["privacy_policy"] = privacy_policy
+    return initial_state
 
 # Run the workflow
-async def run_pipeline():
-    """Run the full workflow and return results"""
+async def run_pipeline(regulation: Dict[str, Any] = None, privacy_policy: str = None, run_id: str = None):
+    """Run the full workflow and return results, tagged with the run id used for checkpoints"""
+    run_id = run_id or str(uuid.uuid4())
     try:
-        # Create workflow
-        print("Creating workflow...")
-        workflow = create_workflow()
+        # Get the shared compiled workflow
+        workflow = graph_registry.get("compliance")
         
-        # Initialize empty state
-        initial_state = WorkflowState()
+        initial_state = build_initial_state(regulation, privacy_policy)
         
-        # Run the workflow
-        print("Running workflow...")
-        final_state = workflow.invoke(initial_state)
+        # Run the workflow without blocking the event loop
+        print(f"Running workflow {run_id}...")
+        final_state = await workflow.ainvoke(initial_state, run_config(run_id))
         
         # Check for errors
         if "error" in final_state:
@@ -302,11 +93,125 @@ async def run_pipeline():
             print("Workflow completed successfully!")
             print(f"Generated {len(final_state.get('action_plan', {}).get('action_items', []))} action items")
         
-        return final_state
+        return {**final_state, "run_id": run_id}
     
     except Exception as e:
         print(f"Workflow execution error: {str(e)}")
-        return {"error": f"Workflow execution failed: {str(e)}"}
+        return {"error": f"Workflow execution failed: {str(e)}", "run_id": run_id}
+    finally:
+        await run_finished()
+
+async def run_pipeline_coalesced(regulation: Dict[str, Any] = None, privacy_policy: str = None):
+    """
+    Run the workflow, sharing one execution among concurrent identical requests
+
+    Requests are identical when their normalized regulation and privacy policy
+    match and they come from the same tenant at the same priority; they then
+    share the same result and run id.
+    """
+    key = request_key(
+        "run-pipeline",
+        regulation=normalize_regulation(regulation) if regulation else None,
+        privacy_policy=privacy_policy
+    )
+    return await request_coalescer.do(
+        key,
+        lambda: run_pipeline(regulation, privacy_policy),
+        memoize=lambda result: not result.get("error")
+    )
+
+async def resume_pipeline(run_id: str, from_stage: str = None):
+    """
+    Resume a checkpointed run instead of starting over
+
+    Without from_stage, execution continues from the last checkpoint that
+    completed without error, so only the failed or interrupted work runs again.
+    With from_stage, the run is forked from the checkpoint just before that
+    node, e.g. "plan_requirement" to redo only planning.
+    """
+    workflow = graph_registry.get("compliance")
+    if workflow.checkpointer is None:
+        raise ValueError("Pipeline checkpoints are not enabled")
+    if from_stage and from_stage not in NODE_OUTPUTS:
+        raise ValueError(f"Unknown pipeline stage '{from_stage}'")
+
+    target = None
+    latest = None
+    async for snapshot in workflow.aget_state_history(run_config(run_id)):
+        latest = latest or snapshot
+        if from_stage:
+            if from_stage in snapshot.next:
+                target = snapshot
+                break
+        elif "error" not in snapshot.values:
+            target = snapshot
+            break
+
+    if latest is None:
+        raise KeyError(f"No checkpoints found for run {run_id}")
+    if target is None:
+        raise ValueError(f"No checkpoint to resume run {run_id} from")
+    if not target.next:
+        # Already finished cleanly, nothing to redo
+        return {**target.values, "run_id": run_id}
+
+    try:
+        print(f"Resuming workflow {run_id} at {', '.join(target.next)}...")
+        final_state = await workflow.ainvoke(None, target.config)
+        return {**final_state, "run_id": run_id}
+    except Exception as e:
+        print(f"Workflow execution error: {str(e)}")
+        return {"error": f"Workflow execution failed: {str(e)}", "run_id": run_id}
+
+async def get_pipeline_run(run_id: str):
+    """Latest checkpointed state of a run and the nodes still pending"""
+    workflow = graph_registry.get("compliance")
+    if workflow.checkpointer is None:
+        raise ValueError("Pipeline checkpoints are not enabled")
+    snapshot = await workflow.aget_state(run_config(run_id))
+    if not snapshot.values:
+        raise KeyError(f"No checkpoints found for run {run_id}")
+    return {
+        "run_id": run_id,
+        "next": list(snapshot.next),
+        "completed": not snapshot.next and "error" not in snapshot.values,
+        "values": snapshot.values
+    }
+
+async def stream_pipeline(regulation: Dict[str, Any] = None, privacy_policy: str = None, include_tokens: bool = True):
+    """
+    Run the workflow and yield (event, data) pairs as soon as each node completes
+
+    The first event is "run" with the run id. Then come "analysis", "impact",
+    "action_plan" and "final_report", with "requirement_impacts" and
+    "requirement_plans" as each parallel branch finishes, "token" for partial
+    LLM output when include_tokens is set, and "error" if a node fails.
+    """
+    workflow = graph_registry.get("compliance")
+    run_id = str(uuid.uuid4())
+    yield "run", {"run_id": run_id}
+    initial_state = build_initial_state(regulation, privacy_policy)
+    stream_modes = ["updates", "messages"] if include_tokens else ["updates"]
+    failed = False
+
+    async for mode, chunk in workflow.astream(initial_state, run_config(run_id), stream_mode=stream_modes):
+        if mode == "messages":
+            message, metadata = chunk
+            if message.content:
+                yield "token", {"node": metadata.get("langgraph_node"), "content": message.content}
+            continue
+
+        for node_name, update in chunk.items():
+            if not update or failed:
+                continue
+            if update.get("error"):
+                failed = True
+                yield "error", {"node": node_name, "message": update["error"]}
+                continue
+            for key in NODE_OUTPUTS.get(node_name, []):
+                if key in update:
+                    yield key, update[key]
+    await run_finished()
 
 # # Run the workflow if this script is executed directly
 # if __name__ == "__main__":
@@ -1,13 +1,39 @@
-from fastapi import FastAPI, HTTPException
+from contextlib import asynccontextmanager
+from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import Dict, Any, Optional
 
 # Import API routers
-from app.api import reg_intel, impact, planner, report, example_direct_db
-from app.langgraph.pipeline import run_pipeline
+from app.api import reg_intel, impact, planner, report, example_direct_db, pipeline, jobs, matching
+from app.langgraph.checkpoint import open_checkpointer, close_checkpointer
+from app.langgraph.registry import graph_registry
+from app.core import async_db
+from app.core.jobs import job_manager
+from app.core.llm import close_llm_clients
+from app.core.llm_scheduler import llm_scheduler
+from app.core.write_behind import write_behind
+from app.core.settings import WRITE_BEHIND_ENABLED
 
-app = FastAPI(title="Compliance AI API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Open the checkpoint store, then recompile graphs so they use it
+    await open_checkpointer()
+    graph_registry.swap_all()
+    # Database connections open in the background so startup does not wait on them
+    async_db.start_pool()
+    if WRITE_BEHIND_ENABLED:
+        await write_behind.start()
+    await job_manager.start()
+    yield
+    await job_manager.stop()
+    # Flush queued findings and action items before the process exits
+    await write_behind.stop()
+    await close_checkpointer()
+    if llm_scheduler is not None:
+        await llm_scheduler.close()
+    await close_llm_clients()
+    await async_db.close_pool()
+
+app = FastAPI(title="Compliance AI API", lifespan=lifespan)
 
 # Configure CORS - expanded to allow various development ports
 app.add_middleware(
@@ -27,15 +53,6 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-class PipelineRequest(BaseModel):
-    regulation: Dict[str, Any]
-    source: Optional[str] = None
-    priority: Optional[str] = None
-
-class TestPipelineRequest(BaseModel):
-    mock_regulation: Dict[str, Any]
-    use_mock_company_data: bool = True
-
 @app.get("/")
 async def root():
     return {"message": "Compliance AI API - Welcome!"}
@@ -46,92 +63,9 @@ app.include_router(impact.router, tags=["Impact Assessment"])
 app.include_router(planner.router, tags=["Implementation Planning"])
 app.include_router(report.router, tags=["Report Generation"])
 app.include_router(example_direct_db.router, tags=["Direct Database Access"])
-
-@app.post("/test-compliance-pipeline")
-async def test_compliance_pipeline(request: TestPipelineRequest):
-    """
-    Test the full compliance pipeline with mock data
-    This endpoint uploads mock regulatory data, tests it against mock company data,
-    and returns the complete analysis
-    """
-    try:
-        # Step 1: Upload the mock regulation
-        # Create MockRegulation instance from the dictionary
-        from app.api.reg_intel import MockRegulation
-        mock_regulation = MockRegulation(**request.mock_regulation)
-        reg_response = await reg_intel.upload_mock_regulation(mock_regulation)
-        regulation_diff_id = reg_response.get("regulation_diff_id")
-        
-        if not regulation_diff_id:
-            raise HTTPException(status_code=500, detail="Failed to upload mock regulation")
-            
-        # Step 2: Run compliance assessment with the uploaded regulation against mock company data
-        compliance_request = impact.ComplianceAssessmentRequest(
-            regulation_diff_id=regulation_diff_id,
-            use_mock_data=request.use_mock_company_data
-        )
-        impact_assessment = await impact.assess_compliance(compliance_request)
-        
-        # Step 3: Generate implementation plan from the findings
-        implementation_plan = await planner.generate_plan(regulation_diff_id)
-        
-        # Step 4: Generate a report (optional)
-        report_request = report.ReportRequest(
-            regulation_diff_id=regulation_diff_id,
-            include_findings=True,
-            include_action_items=True
-        )
-        compliance_report = await report.generate_report(report_request)
-        
-        # Return the full pipeline results
-        return {
-            "status": "success",
-            "message": "Full compliance pipeline executed with mock data",
-            "steps_completed": [
-                "regulatory_intelligence",
-                "impact_assessment",
-                "implementation_planning",
-                "report_generation"
-            ],
-            "results": {
-                "regulation": reg_response,
-                "impact_assessment": impact_assessment,
-                "implementation_plan": implementation_plan,
-                "report": compliance_report
-            }
-        }
-    except Exception as e:
-        return {"status": "error", "message": str(e)}
-
-@app.post("/run-pipeline")
-async def run_full_pipeline(request: PipelineRequest = None):
-    """Run the complete compliance pipeline from regulatory scraping to report generation"""
-    try:
-        # Run the LangGraph pipeline
-        result = await run_pipeline()
-        
-        # Check for errors
-        if result.get("errors"):
-            return {
-                "status": "error",
-                "message": "Pipeline completed with errors",
-                "errors": result["errors"],
-                "partial_results": result
-            }
-            
-        # Return successful result
-        return {
-            "status": "success",
-            "message": "Pipeline execution completed",
-            "data": {
-                "regulation": result.get("regulation", {}),
-                "findings": result.get("findings", []),
-                "action_items": result.get("action_items", []),
-                "final_report": result.get("final_report", {})
-            }
-        }
-    except Exception as e:
-        return {"status": "error", "message": f"Pipeline execution failed: {str(e)}"}
+app.include_router(pipeline.router, tags=["Compliance Pipeline"])
+app.include_router(jobs.router, tags=["Background Jobs"])
+app.include_router(matching.router, tags=["Requirement Matching"])
 
 if __name__ == "__main__":
     import uvicorn
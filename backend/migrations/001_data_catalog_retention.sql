@@ -0,0 +1,19 @@
+-- Structured retention columns for the data catalog
+--
+-- retention_period stays the source text; these columns are derived from it at
+-- ingest (app/core/retention.py) so retention rules run as numeric range checks.
+-- Rows inserted before this migration keep NULLs and are parsed when read.
+
+ALTER TABLE data_catalog ADD COLUMN IF NOT EXISTS retention_days INTEGER;
+ALTER TABLE data_catalog ADD COLUMN IF NOT EXISTS retention_anchor TEXT;
+ALTER TABLE data_catalog ADD COLUMN IF NOT EXISTS retention_indefinite BOOLEAN NOT NULL DEFAULT FALSE;
+
+-- Range queries such as "retained for at least 5 years"
+CREATE INDEX IF NOT EXISTS idx_data_catalog_retention_days
+    ON data_catalog (retention_days)
+    WHERE retention_days IS NOT NULL;
+
+-- Indefinite retention is rare; a partial index keeps it small
+CREATE INDEX IF NOT EXISTS idx_data_catalog_retention_indefinite
+    ON data_catalog (id)
+    WHERE retention_indefinite;
@@ -0,0 +1,12 @@
+-- Idempotency keys for write-behind persistence
+--
+-- app/core/write_behind.py assigns every queued findings / action_items row a
+-- key and upserts batches on it, so a retried batch cannot insert duplicates.
+
+ALTER TABLE findings ADD COLUMN IF NOT EXISTS idempotency_key TEXT;
+CREATE UNIQUE INDEX IF NOT EXISTS idx_findings_idempotency_key
+    ON findings (idempotency_key);
+
+ALTER TABLE action_items ADD COLUMN IF NOT EXISTS idempotency_key TEXT;
+CREATE UNIQUE INDEX IF NOT EXISTS idx_action_items_idempotency_key
+    ON action_items (idempotency_key);
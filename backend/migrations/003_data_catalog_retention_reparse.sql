@@ -0,0 +1,11 @@
+-- Re-derive retention_days for rows ingested before durations were parsed as the
+-- longest mention instead of a sum ("7 years (2555 days)" was stored as 5110).
+--
+-- Clearing the derived columns makes app/core/retention.py parse these rows again
+-- when they are read; new inserts are already normalized correctly.
+
+UPDATE data_catalog
+SET retention_days = NULL,
+    retention_anchor = NULL,
+    retention_indefinite = FALSE
+WHERE retention_period IS NOT NULL;
@@ -0,0 +1,11 @@
+-- Re-derive retention_days for periods stated in months, which used to count as
+-- 30 days each ("60 months" was stored as 1800 days, "5 years" as 1825).
+--
+-- Clearing the derived columns makes app/core/retention.py parse these rows again
+-- when they are read; new inserts are already normalized correctly.
+
+UPDATE data_catalog
+SET retention_days = NULL,
+    retention_anchor = NULL,
+    retention_indefinite = FALSE
+WHERE retention_period ~* 'month';
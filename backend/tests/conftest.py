@@ -0,0 +1,11 @@
+import os
+import sys
+import tempfile
+
+# Make the app package importable when pytest is run from any directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Settings are read at import time: run offline and keep every store out of the working tree
+os.environ["DATA_DIR"] = tempfile.mkdtemp(prefix="compliance-tests-")
+os.environ["LLM_PROVIDER"] = "fake"
+os.environ["WRITE_BEHIND_ENABLED"] = "False"
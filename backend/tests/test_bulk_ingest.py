@@ -0,0 +1,120 @@
+import asyncio
+import psycopg2
+import pytest
+from app.core import bulk_ingest, db_client
+from app.core.bulk_ingest import insert_rows, iter_records
+
+def records(body, body_format, chunk_size=5):
+    """iter_records over body sent in chunk_size-byte chunks"""
+    async def chunks():
+        for start in range(0, len(body), chunk_size):
+            yield body[start:start + chunk_size]
+
+    async def collect():
+        return [record async for record in iter_records(chunks(), body_format)]
+
+    return asyncio.run(collect())
+
+def test_ndjson_records_and_bad_lines():
+    body = '{"name": "Café"}\n\n[1, 2]\n{"name": \n{"name": "Last"}'.encode("utf-8")
+    # Seven-byte chunks split the "é" across two chunks
+    parsed = records(body, "ndjson", chunk_size=7)
+    assert parsed[0] == (1, {"name": "Café"})
+    assert parsed[1] == (3, "Each line must be a JSON object")
+    assert parsed[2][0] == 4 and parsed[2][1].startswith("Invalid JSON")
+    assert parsed[3] == (5, {"name": "Last"})
+
+def test_csv_records_span_quoted_lines_and_report_bad_rows():
+    body = (
+        'name,description,retention_period\r\n'
+        'Orders,"Line one\nline two, with a comma",\r\n'
+        '\r\n'
+        'Payments,"Said ""hi""",7 years\n'
+        'Short,row\n'
+        'Open,"never closed,2 years\n'
+    ).encode("utf-8")
+    assert records(body, "csv", chunk_size=7) == [
+        (2, {"name": "Orders", "description": "Line one\nline two, with a comma", "retention_period": None}),
+        (5, {"name": "Payments", "description": 'Said "hi"', "retention_period": "7 years"}),
+        (6, "Expected 3 columns, got 2"),
+        (7, "Unterminated quoted field"),
+    ]
+    with pytest.raises(ValueError):
+        records(body, "xml")
+
+class IngestConnection:
+    """Connection whose INSERTs fail for rows named in bad"""
+
+    def __init__(self, bad=()):
+        self.bad = set(bad)
+        self.statements = []
+        self.commits = 0
+        self.rollbacks = 0
+
+    def cursor(self):
+        conn = self
+
+        class Cursor:
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc_info):
+                pass
+
+            def execute(self, query, params=None):
+                conn.statements.append((query, params))
+
+        return Cursor()
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+class SingleConnectionPool:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def getconn(self):
+        return self.conn
+
+    def putconn(self, conn):
+        pass
+
+def use_connection(monkeypatch, conn):
+    def execute_values(cur, query, values, page_size=None, fetch=False):
+        conn.statements.append(("INSERT", [row[0] for row in values]))
+        if conn.bad.intersection(row[0] for row in values):
+            raise psycopg2.IntegrityError("violates check constraint")
+        return [(f"id-{row[0]}",) for row in values]
+
+    monkeypatch.setattr(db_client, "pool", SingleConnectionPool(conn))
+    monkeypatch.setattr(bulk_ingest, "execute_values", execute_values)
+
+def test_batches_go_in_with_one_insert_under_a_statement_timeout(monkeypatch):
+    conn = IngestConnection()
+    use_connection(monkeypatch, conn)
+
+    ids, errors = insert_rows("data_catalog", [{"name": "a"}, {"name": "b"}], timeout_seconds=2.5)
+    assert (ids, errors) == (["id-a", "id-b"], {})
+    assert conn.statements == [("SET LOCAL statement_timeout = %s", (2500,)), ("INSERT", ["a", "b"])]
+    assert conn.commits == 1
+
+def test_failed_batches_fall_back_to_rows_under_a_fresh_statement_timeout(monkeypatch):
+    conn = IngestConnection(bad={"b"})
+    use_connection(monkeypatch, conn)
+
+    ids, errors = insert_rows("data_catalog", [{"name": "a"}, {"name": "b"}, {"name": "c"}], timeout_seconds=2)
+    assert ids == ["id-a", None, "id-c"]
+    assert errors == {1: "violates check constraint"}
+    assert conn.rollbacks == 1 and conn.commits == 1
+    # The rollback ends the first transaction, so the fallback sets the bound again
+    timeouts = [index for index, (query, _) in enumerate(conn.statements) if "statement_timeout" in query]
+    assert len(timeouts) == 2
+    assert conn.statements[timeouts[1]] == ("SET LOCAL statement_timeout = %s", (2000,))
+    assert conn.statements[timeouts[1] + 1:] == [
+        ("SAVEPOINT bulk_row", None), ("INSERT", ["a"]), ("RELEASE SAVEPOINT bulk_row", None),
+        ("SAVEPOINT bulk_row", None), ("INSERT", ["b"]), ("ROLLBACK TO SAVEPOINT bulk_row", None),
+        ("SAVEPOINT bulk_row", None), ("INSERT", ["c"]), ("RELEASE SAVEPOINT bulk_row", None),
+    ]
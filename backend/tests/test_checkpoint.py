@@ -0,0 +1,28 @@
+import asyncio
+from app.langgraph import checkpoint
+from app.langgraph.pipeline import run_pipeline
+from app.langgraph.registry import graph_registry
+
+REGULATION = {"title": "Breach notification within 72 hours", "description": "Notify regulators of breaches within 72 hours."}
+
+def test_only_the_most_recent_runs_keep_checkpoints(tmp_path, monkeypatch):
+    async def scenario():
+        monkeypatch.setattr(checkpoint, "PIPELINE_CHECKPOINTS_ENABLED", True)
+        await checkpoint.open_checkpointer(str(tmp_path / "checkpoints.sqlite"))
+        # Recompile the graphs against this checkpointer, as the app lifespan does
+        graph_registry.swap_all()
+        try:
+            run_ids = [(await run_pipeline(REGULATION))["run_id"] for _ in range(4)]
+            assert await checkpoint.prune_checkpoints(max_runs=2) == 2
+            async with checkpoint._connection.execute("SELECT DISTINCT thread_id FROM checkpoints") as cursor:
+                kept = {row[0] for row in await cursor.fetchall()}
+            async with checkpoint._connection.execute("SELECT DISTINCT thread_id FROM writes") as cursor:
+                written = {row[0] for row in await cursor.fetchall()}
+        finally:
+            await checkpoint.close_checkpointer()
+            graph_registry.swap_all()
+        return run_ids, kept, written
+
+    run_ids, kept, written = asyncio.run(scenario())
+    assert kept == set(run_ids[2:])
+    assert written <= set(run_ids[2:])
@@ -0,0 +1,73 @@
+import base64
+import numpy as np
+import pytest
+from app.core import chunk_search, db_client
+from app.core.chunk_search import (
+    batch_search_sql, check_search, decode_base64_vectors, decode_vectors, search_document_chunks
+)
+
+def packed(vectors):
+    return np.asarray(vectors, dtype="<f4").tobytes()
+
+def test_vectors_decode_from_little_endian_float32():
+    vectors = [[0.5, -1.0, 2.0], [3.25, 0.0, -0.125]]
+    assert decode_vectors(packed(vectors), 3).tolist() == vectors
+    assert decode_base64_vectors(base64.b64encode(packed(vectors)).decode(), 3).tolist() == vectors
+    assert decode_vectors(packed(vectors), 6).shape == (1, 6)
+
+def test_bad_payloads_are_rejected(monkeypatch):
+    with pytest.raises(ValueError):
+        decode_vectors(b"", 3)
+    with pytest.raises(ValueError):
+        decode_vectors(packed([[1.0, 2.0, 3.0]])[:-1], 3)
+    with pytest.raises(ValueError):
+        decode_vectors(packed([[1.0]]), 0)
+    with pytest.raises(ValueError):
+        decode_vectors(packed([[1.0, float("nan")]]), 2)
+    with pytest.raises(ValueError, match="Invalid base64"):
+        decode_base64_vectors("not base64!", 2)
+    monkeypatch.setattr(chunk_search, "VECTOR_SEARCH_MAX_QUERIES", 2)
+    with pytest.raises(ValueError, match="At most 2"):
+        decode_vectors(packed([[1.0]] * 3), 1)
+
+def test_search_arguments_are_checked():
+    assert check_search(2, 5, None) == [None, None]
+    assert check_search(2, 5, [{"document_id": "d1"}, None]) == [{"document_id": "d1"}, None]
+    for k, filters in [(0, None), (chunk_search.VECTOR_SEARCH_MAX_K + 1, None), (5, [None]), (5, ["d1", None]), (5, [{"id; drop": 1}, None])]:
+        with pytest.raises(ValueError):
+            check_search(2, k, filters)
+
+def test_batched_sql_adds_one_condition_per_filter_column():
+    plain = batch_search_sql(())
+    assert "WHERE TRUE\n" in plain
+    assert "unnest(%(filters)s::jsonb[]) WITH ORDINALITY" in plain
+    assert "LIMIT %(k)s" in plain
+
+    filtered = batch_search_sql(("document_id", "section"))
+    assert filtered.count("NOT queries.filter ?") == 2
+    assert "c.\"document_id\"::text = queries.filter ->> 'document_id'" in filtered
+    assert "c.\"section\"::text = queries.filter ->> 'section'" in filtered
+    assert batch_search_sql(("document_id", "section")) is filtered
+
+def test_batch_runs_in_one_query_and_results_are_split_per_query(monkeypatch):
+    calls = []
+
+    def execute_query(query, params=None):
+        calls.append((query, params))
+        return [
+            {"query_index": 0, "id": "c1", "content": "first", "distance": 0.1},
+            {"query_index": 0, "id": "c2", "content": "second", "distance": 0.4},
+            {"query_index": 2, "id": "c3", "content": "third", "distance": 0.2},
+        ]
+
+    monkeypatch.setattr(db_client, "execute_query", execute_query)
+    vectors = np.array([[1.0, 0.0], [0.0, 1.0], [0.5, 0.5]], dtype=np.float32)
+    results = search_document_chunks(vectors, k=2, filters=[{"section": "Article 5"}, None, {"document_id": "d1"}])
+
+    assert [[hit["id"] for hit in hits] for hits in results] == [["c1", "c2"], [], ["c3"]]
+    assert results[0][0] == {"id": "c1", "content": "first", "distance": 0.1}
+    (query, params), = calls
+    assert query == batch_search_sql(("document_id", "section"))
+    assert params["vectors"] == [1.0, 0.0, 0.0, 1.0, 0.5, 0.5]
+    assert params["dim"] == 2 and params["k"] == 2
+    assert [json_filter.adapted for json_filter in params["filters"]] == [{"section": "Article 5"}, {}, {"document_id": "d1"}]
@@ -0,0 +1,79 @@
+import psycopg2
+import pytest
+from app.core import db_client, query_builder
+
+class StalePlan(psycopg2.errors.FeatureNotSupported):
+    pgcode = "0A000"
+
+class UniqueViolation(psycopg2.errors.UniqueViolation):
+    pgcode = "23505"
+
+class PreparingConnection:
+    """Connection whose first EXECUTE raises the given PostgreSQL error"""
+
+    def __init__(self, error):
+        self.prepared = set()
+        self.statements = []
+        self.error = error
+
+    def cursor(self, cursor_factory=None):
+        conn = self
+
+        class Cursor:
+            rowcount = 1
+
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc_info):
+                pass
+
+            def execute(self, query, params=None):
+                conn.statements.append(query)
+                if query.startswith("EXECUTE") and conn.error:
+                    error, conn.error = conn.error, None
+                    raise error
+
+            def fetchall(self):
+                return [{"id": 1}]
+
+        return Cursor()
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+class SingleConnectionPool:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def getconn(self):
+        return self.conn
+
+    def putconn(self, conn):
+        pass
+
+def test_stale_prepared_plan_is_reprepared_once(monkeypatch):
+    conn = PreparingConnection(StalePlan("cached plan must not change result type"))
+    monkeypatch.setattr(db_client, "pool", SingleConnectionPool(conn))
+    monkeypatch.setattr(db_client, "DB_PREPARED_STATEMENTS", True)
+    statement, params = query_builder.select_query("data_catalog", {"id": 1})
+
+    assert db_client.execute_statement(statement, params) == [{"id": 1}]
+    prepares = [query for query in conn.statements if query.startswith("PREPARE")]
+    assert len(prepares) == 2
+    assert "DEALLOCATE ALL" in conn.statements
+    assert conn.prepared == {statement.name}
+
+def test_other_errors_keep_the_prepared_statements(monkeypatch):
+    conn = PreparingConnection(UniqueViolation("duplicate key value violates unique constraint"))
+    monkeypatch.setattr(db_client, "pool", SingleConnectionPool(conn))
+    monkeypatch.setattr(db_client, "DB_PREPARED_STATEMENTS", True)
+    statement, params = query_builder.insert_query("data_catalog", {"id": 1})
+
+    with pytest.raises(psycopg2.errors.UniqueViolation):
+        db_client.execute_statement(statement, params)
+    assert "DEALLOCATE ALL" not in conn.statements
+    assert conn.prepared == {statement.name}
@@ -0,0 +1,123 @@
+import threading
+import time
+import types
+import psycopg2
+import pytest
+from psycopg2 import extensions
+from app.core import db_pool
+from app.core.db_pool import ManagedPool, PoolTimeout
+
+class FakeConnection:
+    """Just enough of a psycopg2 connection for the pool"""
+
+    def __init__(self):
+        self.closed = 0
+        self.opened_at = time.monotonic()
+        self.prepared = set()
+        self.fail_ping = False
+        self.info = types.SimpleNamespace(transaction_status=extensions.TRANSACTION_STATUS_IDLE)
+
+    def cursor(self):
+        conn = self
+
+        class Cursor:
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc_info):
+                pass
+
+            def execute(self, query):
+                if conn.fail_ping:
+                    raise psycopg2.OperationalError("server closed the connection")
+                conn.info.transaction_status = extensions.TRANSACTION_STATUS_INTRANS
+
+        return Cursor()
+
+    def rollback(self):
+        self.info.transaction_status = extensions.TRANSACTION_STATUS_IDLE
+
+    def close(self):
+        self.closed = 1
+
+@pytest.fixture
+def opened(monkeypatch):
+    connections = []
+
+    def connect(dsn, connection_factory):
+        connections.append(FakeConnection())
+        return connections[-1]
+
+    monkeypatch.setattr(db_pool.psycopg2, "connect", connect)
+    return connections
+
+def make_pool(minconn=1, maxconn=2, wait_seconds=0.3, validate_idle_seconds=60, idle_timeout_seconds=60):
+    return ManagedPool("postgresql://fake", minconn, maxconn, wait_seconds, validate_idle_seconds, idle_timeout_seconds, 3600)
+
+def test_opens_nothing_until_first_checkout(opened):
+    pool = make_pool()
+    assert opened == []
+    pool.putconn(pool.getconn())
+    assert len(opened) == 1
+
+def test_warm_opens_minconn_connections(opened):
+    pool = make_pool(minconn=5, maxconn=10)
+    assert pool.warm() == 5
+    assert len(opened) == 5
+    assert pool.stats()["idle"] == 5
+    assert pool.warm() == 0
+
+def test_warm_counts_connections_in_use(opened):
+    pool = make_pool(minconn=3, maxconn=5)
+    conn = pool.getconn()
+    assert pool.warm() == 2
+    pool.putconn(conn)
+    assert pool.stats()["idle"] == 3
+
+def test_full_pool_waits_then_times_out(opened):
+    pool = make_pool(maxconn=2, wait_seconds=0.2)
+    first, second = pool.getconn(), pool.getconn()
+    with pytest.raises(PoolTimeout):
+        pool.getconn()
+    threading.Timer(0.05, pool.putconn, args=(first,)).start()
+    assert pool.getconn() is first
+    stats = pool.stats()
+    assert stats["timeouts"] == 1
+    assert stats["waits"] == 1
+    pool.putconn(second)
+
+def test_returned_connection_is_rolled_back(opened):
+    pool = make_pool()
+    conn = pool.getconn()
+    conn.info.transaction_status = extensions.TRANSACTION_STATUS_INTRANS
+    pool.putconn(conn)
+    assert conn.info.transaction_status == extensions.TRANSACTION_STATUS_IDLE
+    assert pool.getconn() is conn
+
+def test_stale_idle_connection_is_replaced(opened):
+    pool = make_pool(validate_idle_seconds=0.01)
+    conn = pool.getconn()
+    pool.putconn(conn)
+    time.sleep(0.02)
+    conn.fail_ping = True
+    replacement = pool.getconn()
+    assert replacement is not conn
+    assert conn.closed
+    assert pool.stats()["closed_stale"] == 1
+
+def test_idle_connections_above_minconn_are_recycled(opened):
+    pool = make_pool(minconn=1, maxconn=3, idle_timeout_seconds=0.01)
+    first, second = pool.getconn(), pool.getconn()
+    pool.putconn(first)
+    time.sleep(0.02)
+    pool.putconn(second)
+    assert first.closed
+    assert pool.stats()["idle"] == 1
+
+def test_closed_pool_refuses_checkouts_until_reopened(opened):
+    pool = make_pool()
+    pool.closeall()
+    with pytest.raises(psycopg2.pool.PoolError):
+        pool.getconn()
+    pool.open()
+    pool.putconn(pool.getconn())
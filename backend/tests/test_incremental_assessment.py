@@ -0,0 +1,85 @@
+from app.core.compliance import MOCK_DATA_CATALOG
+from app.core.incremental_assessment import AssessmentStore, IncrementalAssessment, field_rows
+from app.core.retention import fill_retention, normalize_retention
+from app.core.rule_engine import rule_engine
+
+RETENTION = ["30 days", "2 years", "7 years", "indefinitely", None]
+
+def catalog(count):
+    """Entries cycling through the mock catalog with varied retention, so rules flag some of them"""
+    entries = [
+        {**MOCK_DATA_CATALOG[index % len(MOCK_DATA_CATALOG)], "id": f"e{index}", "retention_period": RETENTION[index % len(RETENTION)]}
+        for index in range(count)
+    ]
+    return fill_retention(entries)
+
+def assess(store, rule_set, entries, page_size=7):
+    assessment = IncrementalAssessment(store, rule_set, "diff-1")
+    rows = field_rows(entries, rule_set.fields)
+    for start in range(0, len(rows), page_size):
+        assessment.add_page(rows[start:start + page_size])
+    return assessment.finish()
+
+def test_paged_assessment_equals_a_full_evaluation_and_keeps_no_rows(tmp_path):
+    rule_set = rule_engine.rule_sets["GDPR"]
+    store = AssessmentStore(str(tmp_path / "assessments.sqlite"), 4)
+    entries = catalog(50)
+
+    findings, summary = assess(store, rule_set, entries)
+    assert findings == rule_set.evaluate(entries)
+    assert findings
+    assert summary["evaluated"] == 50
+
+    state = store.get("diff-1", "GDPR")
+    assert not hasattr(state, "rows")
+    assert list(state.fingerprints) == [entry["id"] for entry in entries]
+
+def edit(entries):
+    """Remove, change and add entries, in rule fields and in fields no rule reads"""
+    edited = [dict(entry) for index, entry in enumerate(entries) if index % 10 != 3]
+    for entry in edited[::6]:
+        entry["retention_period"] = "indefinitely"
+        normalize_retention(entry)
+    for entry in edited[1::8]:
+        entry["processing_purpose"] = None
+    for entry in edited[2::8]:
+        entry["description"] = "Updated description"
+    added = catalog(60)[50:]
+    return edited[:20] + added + edited[20:]
+
+def test_reassessment_after_edits_equals_a_full_evaluation(tmp_path):
+    for regulation in ("GDPR", "CCPA"):
+        rule_set = rule_engine.rule_sets[regulation]
+        store = AssessmentStore(str(tmp_path / f"{regulation}.sqlite"), 4)
+        entries = catalog(50)
+        assess(store, rule_set, entries)
+
+        edited = edit(entries)
+        findings, summary = assess(store, rule_set, edited)
+        assert findings == rule_set.evaluate([dict(entry) for entry in edited])
+        assert summary["removed"] == 5
+        assert summary["evaluated"] < len(edited)
+
+        # Unchanged again: nothing is evaluated
+        findings, summary = assess(store, rule_set, edited)
+        assert findings == rule_set.evaluate([dict(entry) for entry in edited])
+        assert summary["evaluated"] == 0 and summary["removed"] == 0
+
+def test_reassessment_after_a_restart_reads_previous_results_from_sqlite(tmp_path):
+    rule_set = rule_engine.rule_sets["GDPR"]
+    path = str(tmp_path / "assessments.sqlite")
+    entries = catalog(50)
+    assess(AssessmentStore(path, 4), rule_set, entries)
+
+    # A new store has nothing in memory, as after a restart
+    restarted = AssessmentStore(path, 4)
+    assert restarted.get("diff-1", "GDPR") is None
+    findings, summary = assess(restarted, rule_set, entries)
+    assert findings == rule_set.evaluate([dict(entry) for entry in entries])
+    # Entries with findings are reused from disk; only those without any are evaluated again
+    flagged = {finding["data_catalog_id"] for finding in findings}
+    assert summary["evaluated"] == len(entries) - len(flagged)
+
+    edited = edit(entries)
+    findings, summary = assess(AssessmentStore(path, 4), rule_set, edited)
+    assert findings == rule_set.evaluate([dict(entry) for entry in edited])
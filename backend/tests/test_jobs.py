@@ -0,0 +1,99 @@
+import asyncio
+import sqlite3
+import time
+from app.api import jobs as jobs_api, pipeline
+from app.core import llm_scheduler
+from app.core.jobs import JobManager, JobStore
+
+def make_managers(path, count, runs):
+    async def handler(payload, job):
+        runs.append(payload["n"])
+        await asyncio.sleep(0.3)
+        return {"status": "error", "message": "boom"} if payload.get("fail") else {"status": "success"}
+
+    managers = [JobManager(JobStore(path), 2, lease_seconds=0.2) for _ in range(count)]
+    for manager in managers:
+        manager.register("work", handler)
+    return managers
+
+def test_job_queued_in_two_processes_runs_once(tmp_path):
+    async def scenario():
+        runs = []
+        first, second = make_managers(str(tmp_path / "jobs.sqlite"), 2, runs)
+        await first.start()
+        running = await first.submit("work", {"n": 1})
+        await asyncio.sleep(0.05)
+        # A second worker process starting up must leave the first one's running job alone
+        await second.start()
+        assert (await first.get(running))["status"] == "running"
+
+        shared = await first.submit("work", {"n": 2})
+        second._enqueue(shared, None)
+        await asyncio.sleep(0.8)
+        statuses = [(await first.get(job_id))["status"] for job_id in (running, shared)]
+        await first.stop()
+        await second.stop()
+        return runs, statuses
+
+    runs, statuses = asyncio.run(scenario())
+    assert sorted(runs) == [1, 2]
+    assert statuses == ["succeeded", "succeeded"]
+
+def test_expired_lease_and_error_result_mark_jobs_failed(tmp_path):
+    path = str(tmp_path / "jobs.sqlite")
+
+    async def scenario():
+        runs = []
+        (manager,) = make_managers(path, 1, runs)
+        await manager.start()
+        conn = sqlite3.connect(path)
+        conn.execute(
+            "INSERT INTO jobs (id, kind, status, owner, heartbeat_at) VALUES ('orphan', 'work', 'running', 'gone', ?)",
+            (time.time() - 10,)
+        )
+        conn.commit()
+        failing = await manager.submit("work", {"n": 1, "fail": True})
+        await asyncio.sleep(0.5)
+        jobs = [await manager.get(job_id) for job_id in ("orphan", failing)]
+        await manager.stop()
+        return jobs
+
+    orphan, failing = asyncio.run(scenario())
+    assert orphan["status"] == "failed"
+    assert failing["status"] == "failed"
+    assert failing["error"] == "boom"
+
+def test_pipeline_jobs_reach_the_scheduler_with_their_tenant_and_priority(tmp_path, monkeypatch):
+    contexts = []
+
+    async def run_pipeline_coalesced(regulation=None):
+        contexts.append(("run", llm_scheduler._request_context.get()))
+        return {"action_plan": {"action_items": []}}
+
+    async def run_pipeline_batch(entries, max_concurrency):
+        contexts.append(("batch", llm_scheduler._request_context.get()))
+        return {"succeeded": len(entries), "failed": 0, "results": []}
+
+    monkeypatch.setattr(pipeline, "run_pipeline_coalesced", run_pipeline_coalesced)
+    monkeypatch.setattr(pipeline, "run_pipeline_batch", run_pipeline_batch)
+
+    async def scenario():
+        manager = JobManager(JobStore(str(tmp_path / "jobs.sqlite")), 1)
+        for kind in ("run-pipeline", "run-pipeline-batch"):
+            manager.register(kind, jobs_api.job_manager._handlers[kind])
+        await manager.start()
+        job_ids = [
+            await manager.submit("run-pipeline", {"regulation": {"title": "T"}}, "urgent", "acme"),
+            await manager.submit("run-pipeline", {}, "urgent", "acme"),
+            await manager.submit("run-pipeline-batch", {"regulations": [{"title": "T"}]}, None, "globex")
+        ]
+        await asyncio.sleep(0.2)
+        statuses = [(await manager.get(job_id))["status"] for job_id in job_ids]
+        await manager.stop()
+        return statuses
+
+    # A payload the endpoint's request model rejects fails its job
+    assert asyncio.run(scenario()) == ["succeeded", "failed", "succeeded"]
+    urgent, low = llm_scheduler.PRIORITY_LEVELS["urgent"], llm_scheduler.PRIORITY_LEVELS["low"]
+    # A job without its own priority keeps the one in its payload (batch requests default to low)
+    assert contexts == [("run", (urgent, "acme")), ("batch", (low, "globex"))]
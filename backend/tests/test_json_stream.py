@@ -0,0 +1,61 @@
+import asyncio
+import json
+import uuid
+from datetime import date, datetime
+from decimal import Decimal
+import pytest
+from app.core.json_stream import rows_response
+
+ROW_ID = uuid.UUID("12345678-1234-5678-1234-567812345678")
+
+def body(batches, body_format="json"):
+    """The response body of rows_response over the given batches, and whether they were closed"""
+    closed = []
+
+    async def stream():
+        try:
+            for batch in batches:
+                if isinstance(batch, Exception):
+                    raise batch
+                yield batch
+        finally:
+            closed.append(True)
+
+    async def collect():
+        response = await rows_response(stream(), body_format)
+        assert response.media_type == ("application/json" if body_format == "json" else "application/x-ndjson")
+        return "".join([chunk async for chunk in response.body_iterator])
+
+    return asyncio.run(collect()), closed == [True]
+
+def test_json_arrays_join_batches_and_encode_database_types():
+    batches = [
+        [{"id": ROW_ID, "created_at": datetime(2026, 1, 2, 3, 4, 5), "due": date(2026, 2, 1)}],
+        [],
+        [{"cost": Decimal("12.50"), "tags": ["a"]}, {"cost": None, "tags": []}],
+    ]
+    text, closed = body(batches)
+    assert json.loads(text) == [
+        {"id": str(ROW_ID), "created_at": "2026-01-02T03:04:05", "due": "2026-02-01"},
+        {"cost": 12.5, "tags": ["a"]},
+        {"cost": None, "tags": []},
+    ]
+    assert closed
+    assert body([])[0] == "[]"
+    assert body([[], []])[0] == "[]"
+
+def test_ndjson_writes_one_object_per_line():
+    text, closed = body([[{"n": 1}, {"n": 2}], [{"n": 3}]], "ndjson")
+    assert text == '{"n": 1}\n{"n": 2}\n{"n": 3}\n'
+    assert [json.loads(line) for line in text.splitlines()] == [{"n": 1}, {"n": 2}, {"n": 3}]
+    assert body([], "ndjson")[0] == ""
+
+def test_errors_before_the_first_batch_raise_and_later_ones_cut_the_body_short():
+    with pytest.raises(RuntimeError):
+        body([RuntimeError("no pool")])
+    with pytest.raises(ValueError):
+        body([[{"n": 1}]], "csv")
+
+    text, closed = body([[{"n": 1}], RuntimeError("connection lost"), [{"n": 2}]])
+    assert text == '[{"n": 1}'
+    assert closed
@@ -0,0 +1,42 @@
+from app.core.llm_cache import LLMResponseCache, cache_key
+
+def open_cache(path, ttl_seconds=60, memory_size=2, max_entries=100):
+    return LLMResponseCache(str(path / "llm_cache.sqlite"), ttl_seconds, memory_size, max_entries)
+
+def test_keys_cover_model_prompt_params_and_provider():
+    key = cache_key("gpt-4o", "Summarise GDPR", {"temperature": 0, "top_p": 1})
+    assert key == cache_key("gpt-4o", "Summarise GDPR", {"top_p": 1, "temperature": 0})
+    assert cache_key("gpt-4o", "Summarise GDPR") == cache_key("gpt-4o", "Summarise GDPR", {})
+    assert len({
+        key,
+        cache_key("gpt-4o-mini", "Summarise GDPR", {"temperature": 0, "top_p": 1}),
+        cache_key("gpt-4o", "Summarise CCPA", {"temperature": 0, "top_p": 1}),
+        cache_key("gpt-4o", "Summarise GDPR", {"temperature": 1, "top_p": 1}),
+        cache_key("gpt-4o", "Summarise GDPR", {"temperature": 0, "top_p": 1}, "openai"),
+    }) == 5
+
+def test_misses_then_hits_from_memory_and_disk(tmp_path):
+    cache = open_cache(tmp_path)
+    assert cache.get("a") is None
+    cache.set("a", "gpt-4o", "first")
+    assert cache.get("a") == "first"
+
+    # A second process sharing the file misses in memory and hits on disk
+    other = open_cache(tmp_path)
+    assert other.get("a") == "first"
+    assert other.get("a") == "first"
+    assert cache.stats()["misses"] == 1 and cache.stats()["memory_hits"] == 1
+    assert other.stats()["disk_hits"] == 1 and other.stats()["memory_hits"] == 1
+
+def test_memory_tier_is_bounded_and_expired_entries_miss(tmp_path):
+    cache = open_cache(tmp_path, memory_size=2)
+    for key in ("a", "b", "c"):
+        cache.set(key, "gpt-4o", key.upper())
+    assert cache.stats()["memory_entries"] == 2
+    assert cache.get("a") == "A"
+    assert cache.stats()["disk_hits"] == 1
+
+    expired = open_cache(tmp_path, ttl_seconds=-1)
+    expired.set("d", "gpt-4o", "D")
+    assert expired.get("d") is None
+    assert open_cache(tmp_path).get("d") is None
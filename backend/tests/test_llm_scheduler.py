@@ -0,0 +1,54 @@
+import asyncio
+import pytest
+from app.core import llm_scheduler as llm_scheduler_module
+from app.core.llm_scheduler import LLMScheduler, TokenBucket, llm_request_context
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(llm_scheduler_module.time, "monotonic", lambda: now[0])
+    return now
+
+def test_token_bucket_refills_per_minute_and_caps_requests(clock):
+    bucket = TokenBucket(60)
+    assert bucket.wait_time(60) == 0.0
+    bucket.consume(60)
+    assert bucket.wait_time(1) == pytest.approx(1.0)
+
+    clock[0] += 30
+    assert bucket.wait_time(30) == 0.0
+    # A request larger than the bucket only waits for a full bucket
+    assert bucket.wait_time(600) == pytest.approx(30.0)
+
+    # Corrections can drive it negative; the debt is waited off
+    bucket.consume(30)
+    bucket.consume(20)
+    assert bucket.tokens == pytest.approx(-20)
+    assert bucket.wait_time(10) == pytest.approx(30.0)
+
+def test_waiters_are_admitted_by_priority_then_round_robin_by_tenant():
+    # 100 requests per second, starting empty, so every call queues
+    scheduler = LLMScheduler(6000, 10 ** 9)
+    scheduler.requests.tokens = 0
+    admitted = []
+
+    async def call(name, priority, tenant):
+        with llm_request_context(priority, tenant):
+            await scheduler.acquire(10)
+        admitted.append(name)
+
+    async def scenario():
+        await asyncio.gather(
+            call("bulk", "low", "acme"),
+            call("acme-1", "urgent", "acme"),
+            call("acme-2", "urgent", "acme"),
+            call("acme-3", "urgent", "acme"),
+            call("globex-1", "urgent", "globex"),
+            call("globex-2", "urgent", "globex"),
+            call("normal", None, "acme"),
+        )
+        await scheduler.close()
+
+    asyncio.run(scenario())
+    assert admitted == ["acme-1", "globex-1", "acme-2", "globex-2", "acme-3", "normal", "bulk"]
+    assert scheduler.stats()["admitted"] == 7
@@ -0,0 +1,20 @@
+from fastapi.testclient import TestClient
+from app.main import app
+
+REGULATION = {
+    "title": "Retention limits for customer records",
+    "description": "Customer personal data must be deleted within 30 days after the account is closed.",
+    "priority": "high"
+}
+
+def test_run_pipeline_returns_the_planned_action_items():
+    with TestClient(app) as client:
+        response = client.post("/run-pipeline", json={"regulation": REGULATION})
+
+    body = response.json()
+    assert response.status_code == 200
+    assert body["status"] == "success"
+    action_items = body["data"]["action_items"]
+    assert len(action_items) > 0
+    assert all("title" in item for item in action_items)
+    assert body["data"]["impact"]
@@ -0,0 +1,24 @@
+import pytest
+from app.core.retention import parse_retention
+
+@pytest.mark.parametrize("text, days", [
+    ("7 years after last activity", 2555),
+    ("7 years (2555 days)", 2555),
+    ("3 to 5 years", 1825),
+    ("3-5 years", 1825),
+    ("6 months to 2 years", 730),
+    ("Up to 2 years; backups 90 days", 730),
+    ("ninety days", None),
+    ("two weeks", 14),
+])
+def test_retention_days_is_the_longest_mention(text, days):
+    assert parse_retention(text)[0] == days
+
+def test_anchor_and_indefinite():
+    assert parse_retention("7 years after contract termination") == (2555, "contract termination", False)
+    assert parse_retention("Indefinitely") == (None, None, True)
+    assert parse_retention(None) == (None, None, False)
+
+@pytest.mark.parametrize("months, years", [("12 months", "1 year"), ("60 months", "5 years"), ("84 months", "7 years")])
+def test_months_and_years_give_the_same_period(months, years):
+    assert parse_retention(months)[0] == parse_retention(years)[0]
@@ -0,0 +1,82 @@
+from app.core.compliance import MOCK_DATA_CATALOG
+from app.core.retention import fill_retention
+from app.core.rule_engine import rule_engine
+
+def baseline_findings(regulation, data_catalog):
+    """The hand-coded GDPR/CCPA checks assess_compliance ran before the rule engine"""
+    findings = []
+    if regulation == "GDPR":
+        for data_item in data_catalog:
+            if (data_item.get("retention_period") and
+                ("indefinite" in data_item.get("retention_period").lower() or
+                 "permanent" in data_item.get("retention_period").lower() or
+                 "years" in data_item.get("retention_period").lower() and "5 years" in data_item.get("retention_period"))):
+                findings.append({
+                    "id": f"finding-{len(findings)+1}",
+                    "title": f"Excessive retention period for {data_item.get('name')}",
+                    "description": f"Data is kept for {data_item.get('retention_period')} which exceeds GDPR's data minimization principles",
+                    "regulation_section": "Article 5(1)(e)",
+                    "confidence": 0.88,
+                    "data_catalog_id": data_item.get("id"),
+                    "remediation": "Review and implement shorter retention periods based on actual business needs"
+                })
+            if not data_item.get("processing_purpose") or data_item.get("processing_purpose") == "":
+                findings.append({
+                    "id": f"finding-{len(findings)+1}",
+                    "title": f"Missing purpose specification for {data_item.get('name')}",
+                    "description": "Processing purpose is not clearly defined, violating GDPR purpose limitation principle",
+                    "regulation_section": "Article 5(1)(b)",
+                    "confidence": 0.92,
+                    "data_catalog_id": data_item.get("id"),
+                    "remediation": "Clearly define and document the specific purposes for processing this data"
+                })
+            if not data_item.get("access_controls") or data_item.get("access_controls") == "":
+                findings.append({
+                    "id": f"finding-{len(findings)+1}",
+                    "title": f"Inadequate access controls for {data_item.get('name')}",
+                    "description": "No defined access controls, violating GDPR security requirements",
+                    "regulation_section": "Article 32",
+                    "confidence": 0.85,
+                    "data_catalog_id": data_item.get("id"),
+                    "remediation": "Implement appropriate access controls based on least privilege principle"
+                })
+    elif regulation == "CCPA":
+        for data_item in data_catalog:
+            if not data_item.get("retention_period"):
+                findings.append({
+                    "id": f"finding-{len(findings)+1}",
+                    "title": f"Missing retention period for {data_item.get('name')}",
+                    "description": "CCPA requires clear disclosure of retention periods for each category of personal information",
+                    "regulation_section": "1798.130(a)(5)(B)",
+                    "confidence": 0.87,
+                    "data_catalog_id": data_item.get("id"),
+                    "remediation": "Define and document retention periods for this data category"
+                })
+    return findings
+
+def mock_catalog():
+    """The mock catalog, plus copies with the fields the checks look at removed or changed"""
+    entries = [dict(entry) for entry in MOCK_DATA_CATALOG]
+    variants = [
+        {"processing_purpose": ""},
+        {"access_controls": None},
+        {"retention_period": None},
+        {"retention_period": "Indefinitely"},
+        {"retention_period": "permanent archive", "processing_purpose": None, "access_controls": ""},
+    ]
+    for index, changes in enumerate(variants):
+        entry = MOCK_DATA_CATALOG[index % len(MOCK_DATA_CATALOG)]
+        entries.append({**entry, **changes, "id": f"variant-{index}", "name": f"{entry['name']} {index}"})
+    return fill_retention(entries)
+
+def test_rule_engine_findings_equal_the_hand_coded_checks_on_the_mock_catalog():
+    for regulation in ("GDPR", "CCPA"):
+        catalog = fill_retention([dict(entry) for entry in MOCK_DATA_CATALOG])
+        assert rule_engine.evaluate(regulation, catalog) == baseline_findings(regulation, MOCK_DATA_CATALOG)
+        entries = mock_catalog()
+        expected = baseline_findings(regulation, entries)
+        assert expected
+        assert rule_engine.evaluate(regulation, entries) == expected
+
+def test_unknown_regulations_have_no_findings():
+    assert rule_engine.evaluate("HIPAA", mock_catalog()) == []
@@ -0,0 +1,53 @@
+import asyncio
+from app.core.llm_scheduler import llm_request_context
+from app.core.singleflight import SingleFlight, request_key
+
+def counting_work(calls, delay=0.05):
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(delay)
+        return {"items": [len(calls)]}
+    return work
+
+def test_concurrent_identical_requests_share_one_execution():
+    flight = SingleFlight()
+    calls = []
+
+    async def scenario():
+        key = request_key("work", value=1)
+        return await asyncio.gather(*(flight.do(key, counting_work(calls)) for _ in range(5)))
+
+    results = asyncio.run(scenario())
+    assert len(calls) == 1
+    assert results == [{"items": [1]}] * 5
+    # Each caller has its own copy of the shared result
+    results[0]["items"].append("changed")
+    assert results[1] == {"items": [1]}
+    assert flight.stats()["coalesced"] == 4
+
+def test_results_are_memoized_as_copies_when_allowed():
+    flight = SingleFlight(memo_ttl_seconds=60)
+    calls = []
+
+    async def scenario():
+        first = await flight.do("key", counting_work(calls, 0), memoize=lambda result: True)
+        first["items"].clear()
+        second = await flight.do("key", counting_work(calls, 0), memoize=lambda result: True)
+        await flight.do("other", counting_work(calls, 0), memoize=lambda result: False)
+        await flight.do("other", counting_work(calls, 0), memoize=lambda result: False)
+        return second
+
+    assert asyncio.run(scenario()) == {"items": [1]}
+    assert len(calls) == 3
+    assert flight.stats()["memo_hits"] == 1
+
+def test_keys_differ_by_inputs_tenant_and_priority():
+    assert request_key("work", a=1, b=2) == request_key("work", b=2, a=1)
+    assert request_key("work", a=1) != request_key("work", a=2)
+    with llm_request_context("low", "acme"):
+        low_acme = request_key("work", a=1)
+    with llm_request_context("urgent", "acme"):
+        urgent_acme = request_key("work", a=1)
+    with llm_request_context("low", "globex"):
+        low_globex = request_key("work", a=1)
+    assert len({low_acme, urgent_acme, low_globex, request_key("work", a=1)}) == 4
@@ -0,0 +1,70 @@
+import json
+import numpy as np
+from app.core.vector_index import VectorIndex
+
+DIM = 16
+
+def unit_vectors(count, seed):
+    vectors = np.random.default_rng(seed).normal(size=(count, DIM)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+def open_index(path, train_size=64):
+    return VectorIndex(str(path), DIM, nprobe=4, train_size=train_size)
+
+def test_adds_append_to_the_id_log_and_survive_reopening(tmp_path):
+    index = open_index(tmp_path)
+    vectors = unit_vectors(100, 0)
+    for start in range(0, 100, 10):
+        index.add([f"e{row}" for row in range(start, start + 10)], vectors[start:start + 10])
+    index.add(["e5"], vectors[50:51])
+
+    with open(tmp_path / "ids.log") as ids_file:
+        assert len(ids_file.readlines()) == 100
+    assert "ids" not in json.loads((tmp_path / "meta.json").read_text())
+
+    reopened = open_index(tmp_path)
+    assert len(reopened) == 100
+    assert reopened.stats()["clusters"] > 0
+    assert reopened.search(vectors[50], 1)[0][0][0] in ("e5", "e50")
+    assert reopened.search(vectors[7], 1)[0][0][0] == "e7"
+
+def test_writers_sharing_a_directory_do_not_overwrite_each_other(tmp_path):
+    first, second = open_index(tmp_path), open_index(tmp_path)
+    vectors = unit_vectors(20, 1)
+    first.add([f"a{row}" for row in range(10)], vectors[:10])
+    second.add([f"b{row}" for row in range(10)], vectors[10:])
+
+    assert len(first.search(vectors[0], 1)[0]) == 1
+    assert first.search(vectors[15], 1)[0][0][0] == "b5"
+    assert second.search(vectors[3], 1)[0][0][0] == "a3"
+    assert len(open_index(tmp_path)) == 20
+
+def test_retain_drops_stale_ids(tmp_path):
+    index = open_index(tmp_path, train_size=32)
+    vectors = unit_vectors(40, 2)
+    index.add([f"e{row}" for row in range(40)], vectors)
+
+    assert index.retain({f"e{row}" for row in range(0, 40, 2)}) == 20
+    assert index.retain({f"e{row}" for row in range(0, 40, 2)}) == 0
+    reopened = open_index(tmp_path, train_size=32)
+    assert len(reopened) == 20
+    assert reopened.stats()["clusters"] == 0
+    assert reopened.search(vectors[6], 1)[0][0][0] == "e6"
+    assert all(entry_id != "e7" for entry_id, _ in reopened.search(vectors[7], 20)[0])
+
+def test_readers_leave_a_crashed_writers_ids_for_the_next_writer_to_drop(tmp_path):
+    index = open_index(tmp_path)
+    vectors = unit_vectors(3, 3)
+    index.add(["e0", "e1"], vectors[:2])
+    with open(tmp_path / "ids.log", "a") as ids_file:
+        ids_file.write('"orphan"\n')
+    size = (tmp_path / "ids.log").stat().st_size
+
+    reader = open_index(tmp_path)
+    assert reader.ids == ["e0", "e1"]
+    assert len(reader.search(vectors[0], 5)[0]) == 2
+    assert (tmp_path / "ids.log").stat().st_size == size
+
+    reader.add(["e2"], vectors[2:])
+    assert (tmp_path / "ids.log").read_text().split() == ['"e0"', '"e1"', '"e2"']
+    assert open_index(tmp_path).ids == ["e0", "e1", "e2"]
@@ -0,0 +1,88 @@
+import asyncio
+import pytest
+from app.core import write_behind as write_behind_module
+from app.core.write_behind import IDEMPOTENCY_KEY, WriteBehindBuffer
+
+class Recorder:
+    """write(table, rows) that records batches and fails the first `failures` calls"""
+
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.batches = []
+        self.attempts = []
+
+    def __call__(self, table, rows):
+        self.attempts.append([row[IDEMPOTENCY_KEY] for row in rows])
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("database unavailable")
+        self.batches.append((table, [dict(row) for row in rows]))
+
+def make_buffer(write, batch_size=2, max_retries=2, check=None):
+    return WriteBehindBuffer(write, batch_size, flush_seconds=60, max_pending=100, max_retries=max_retries, check=check)
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    async def sleep(seconds):
+        pass
+    monkeypatch.setattr(write_behind_module.asyncio, "sleep", sleep)
+
+def test_rows_are_batched_per_table_and_flushed_on_read_and_stop():
+    write = Recorder()
+    buffer = make_buffer(write, batch_size=10)
+    rows = [{"n": 1}, {"n": 2}, {"n": 3}]
+
+    async def scenario():
+        assert await buffer.start()
+        await buffer.put("findings", rows[:1])
+        await buffer.put("action_items", rows[1:])
+        queued = list(write.batches)
+        await buffer.flush("findings")
+        flushed = list(write.batches)
+        await buffer.stop()
+        return queued, flushed
+
+    queued, flushed = asyncio.run(scenario())
+    assert queued == []
+    assert [(table, [row["n"] for row in batch]) for table, batch in flushed] == [("findings", [1])]
+    assert [(table, [row["n"] for row in batch]) for table, batch in write.batches] == [
+        ("findings", [1]), ("action_items", [2, 3])
+    ]
+    # Queued copies carry the key; the caller's rows are untouched
+    assert all(IDEMPOTENCY_KEY in row for _, batch in write.batches for row in batch)
+    assert rows == [{"n": 1}, {"n": 2}, {"n": 3}]
+    assert buffer.stats()["written"] == 3 and buffer.stats()["pending"] == 0
+
+def test_failed_batches_are_retried_with_the_same_keys_then_dropped():
+    retried, dropped = Recorder(failures=2), Recorder(failures=10)
+
+    async def scenario(write):
+        buffer = make_buffer(write)
+        await buffer.start()
+        await buffer.put("findings", [{"n": 1}])
+        await buffer.stop()
+        return buffer.stats()
+
+    stats = asyncio.run(scenario(retried))
+    assert stats["retries"] == 2 and stats["written"] == 1 and stats["dropped"] == 0
+    assert len(retried.attempts) == 3 and all(keys == retried.attempts[0] for keys in retried.attempts)
+    stats = asyncio.run(scenario(dropped))
+    assert stats["retries"] == 2 and stats["written"] == 0 and stats["dropped"] == 1
+    assert dropped.batches == []
+
+def test_buffer_stays_off_without_the_idempotency_index():
+    write = Recorder()
+    buffer = make_buffer(write, check=lambda: False)
+
+    async def scenario():
+        started = await buffer.start()
+        # Not running: rows are written at once, and errors reach the caller
+        await buffer.put("findings", [{"n": 1}])
+        write.failures = 1
+        with pytest.raises(RuntimeError):
+            await buffer.put("findings", [{"n": 2}])
+        return started
+
+    assert asyncio.run(scenario()) is False
+    assert buffer.stats()["running"] is False
+    assert [row["n"] for _, batch in write.batches for row in batch] == [1]
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Benchmark of concurrent request throughput with blocking vs offloaded database calls.
+
+Serves two in-process endpoints that make the same database call: one runs it
+directly inside the async handler (the old pattern), the other through
+app.core.async_db. Fires N concurrent requests at each while probing a cheap
+endpoint, so the numbers show both throughput and how long the event loop
+stalls. Uses "SELECT pg_sleep(...)" when DATABASE_URL is set, otherwise a
+blocking sleep of the same length stands in for the driver call.
+
+Usage:
+    python scripts/benchmark_db_access.py --requests 200 --concurrency 50 --query-ms 20
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), "backend")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark blocking vs offloaded database access")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--query-ms", type=float, default=20)
+    return parser.parse_args()
+
+
+def build_app(query_ms):
+    from fastapi import FastAPI
+    from app.core import async_db, db_client
+
+    def database_call():
+        if db_client.pool is not None:
+            return db_client.execute_query("SELECT pg_sleep(%s)", (query_ms / 1000,))
+        time.sleep(query_ms / 1000)
+
+    app = FastAPI()
+
+    @app.get("/blocking")
+    async def blocking():
+        database_call()
+        return {"status": "success"}
+
+    @app.get("/offloaded")
+    async def offloaded():
+        await async_db.run_db(database_call)
+        return {"status": "success"}
+
+    @app.get("/health")
+    async def health():
+        return {"status": "success"}
+
+    return app, "pg_sleep" if db_client.pool is not None else "time.sleep"
+
+
+async def run_mode(client, path, total, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    probe_latencies = []
+    done = asyncio.Event()
+
+    async def request():
+        async with semaphore:
+            await client.get(path)
+
+    async def probe():
+        while not done.is_set():
+            started = time.perf_counter()
+            await client.get("/health")
+            probe_latencies.append(time.perf_counter() - started)
+            await asyncio.sleep(0.005)
+
+    prober = asyncio.create_task(probe())
+    started = time.perf_counter()
+    await asyncio.gather(*(request() for _ in range(total)))
+    wall_time = time.perf_counter() - started
+    done.set()
+    await prober
+
+    return {
+        "mode": path.strip("/"),
+        "requests_per_second": round(total / wall_time, 1),
+        "wall_time_s": round(wall_time, 2),
+        # A stalled event loop shows up as few probes getting through at all
+        "probe_samples": len(probe_latencies),
+        "probe_p50_ms": round(statistics.median(probe_latencies) * 1000, 2),
+        "probe_max_ms": round(max(probe_latencies) * 1000, 2)
+    }
+
+
+async def main():
+    args = parse_args()
+    sys.path.insert(0, BACKEND_DIR)
+    import httpx
+    # One log line per request would dominate the run
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    app, backend = build_app(args.query_ms)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=None) as client:
+        for path in ("/blocking", "/offloaded"):
+            result = await run_mode(client, path, args.requests, args.concurrency)
+            result.update({"query_ms": args.query_ms, "backend": backend, "concurrency": args.concurrency})
+            print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
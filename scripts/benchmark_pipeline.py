@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Offline, reproducible benchmark of the LangGraph compliance pipeline.
+
+Runs the graph in-process against the fake or replay LLM provider, so no API
+key or network access is needed. Synthetic latency stands in for provider
+round trips; jitter is derived from each prompt, so repeated runs match.
+
+Usage:
+    python scripts/benchmark_pipeline.py --provider fake --runs 50 --concurrency 10 --latency-ms 800
+    python scripts/benchmark_pipeline.py --provider replay --fixtures backend/fixtures/llm
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), "backend")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the compliance pipeline offline")
+    parser.add_argument("--provider", choices=["fake", "replay"], default="fake")
+    parser.add_argument("--fixtures", default=None, help="Fixture directory for the replay provider")
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=5)
+    parser.add_argument("--latency-ms", type=float, default=500)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--cache", action="store_true", help="Keep the LLM response cache enabled")
+    parser.add_argument("--same-regulation", action="store_true",
+                        help="Run the same regulation every time instead of distinct ones")
+    return parser.parse_args()
+
+
+def configure_environment(args):
+    """Settings are read at import time, so set them before importing the app"""
+    os.environ["LLM_PROVIDER"] = args.provider
+    os.environ["LLM_REPLAY_LATENCY_MS"] = str(args.latency_ms)
+    os.environ["LLM_REPLAY_JITTER_MS"] = str(args.jitter_ms)
+    os.environ["LLM_CACHE_ENABLED"] = "true" if args.cache else "false"
+    # Keep benchmark state out of the real data directory
+    os.environ.setdefault("DATA_DIR", tempfile.mkdtemp(prefix="pipeline-bench-"))
+    os.environ["PIPELINE_CHECKPOINTS_ENABLED"] = "false"
+    if args.fixtures:
+        os.environ["LLM_FIXTURES_DIR"] = os.path.abspath(args.fixtures)
+    sys.path.insert(0, BACKEND_DIR)
+
+
+async def run_benchmark(args):
+    from app.langgraph.batch import run_pipeline_batch
+
+    entries = [
+        {"regulation": {
+            "title": "Benchmark Regulation" if args.same_regulation else f"Benchmark Regulation {index}",
+            "summary": "Synthetic regulation used for offline pipeline benchmarking",
+            "priority": "medium"
+        }}
+        for index in range(args.runs)
+    ]
+    batch = await run_pipeline_batch(entries, args.concurrency)
+    durations = sorted(item["duration_seconds"] for item in batch["items"] if "duration_seconds" in item)
+
+    return {
+        "provider": args.provider,
+        "runs": batch["total"],
+        "succeeded": batch["succeeded"],
+        "failed": batch["failed"],
+        "concurrency": batch["concurrency"],
+        "latency_ms": args.latency_ms,
+        "elapsed_seconds": batch["elapsed_seconds"],
+        "regulations_per_minute": batch["regulations_per_minute"],
+        "run_p50_seconds": round(statistics.median(durations), 3) if durations else None,
+        "run_p95_seconds": round(durations[round(0.95 * (len(durations) - 1))], 3) if durations else None,
+        "errors": sorted({item["error"] for item in batch["items"] if item.get("error")})
+    }
+
+
+def main():
+    args = parse_args()
+    configure_environment(args)
+    print(json.dumps(asyncio.run(run_benchmark(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
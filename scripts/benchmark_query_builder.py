@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the cached query builder against per-call f-string SQL.
+
+Always times SQL generation: the old f-string assembly of insert_data and
+get_records against app.core.query_builder lookups. When DATABASE_URL is set
+it also times a repeated read-only get_records lookup on regulation_diffs,
+sent as plain SQL text (parsed and planned every time) and as a prepared
+statement (planned once per pooled connection).
+
+Usage:
+    python scripts/benchmark_query_builder.py --iterations 20000 --queries 500
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), "backend")
+
+ROW = {
+    "source": "GDPR", "title": "Benchmark", "summary": "s", "url": "https://example.com", "published_date": "2024-01-01",
+    "content": "c", "previous_version": "p", "changes": {"added": []}, "jurisdiction": "EU"
+}
+CONDITIONS = {"source": "benchmark", "jurisdiction": "EU"}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark cached and prepared SQL against f-string SQL")
+    parser.add_argument("--iterations", type=int, default=20000, help="SQL generations per variant")
+    parser.add_argument("--queries", type=int, default=500, help="Database round trips per variant")
+    return parser.parse_args()
+
+
+def legacy_insert_sql(table, data):
+    """insert_data's SQL as it was built before the query builder"""
+    columns = ", ".join(data.keys())
+    placeholders = ", ".join([f"%({key})s" for key in data.keys()])
+    return f"INSERT INTO {table} ({columns}) VALUES ({placeholders}) RETURNING id", data
+
+
+def legacy_select_sql(table, conditions, limit):
+    """get_records' SQL as it was built before the query builder"""
+    query = f"SELECT * FROM {table}"
+    params = {}
+    where_clauses = []
+    for i, (key, value) in enumerate(conditions.items()):
+        param_name = f"param_{i}"
+        where_clauses.append(f"{key} = %({param_name})s")
+        params[param_name] = value
+    query += " WHERE " + " AND ".join(where_clauses)
+    query += f" LIMIT {limit}"
+    return query, params
+
+
+def per_call_us(function, iterations):
+    started = time.perf_counter()
+    for _ in range(iterations):
+        function()
+    return round((time.perf_counter() - started) / iterations * 1e6, 3)
+
+
+def main():
+    args = parse_args()
+    sys.path.insert(0, BACKEND_DIR)
+    from app.core import db_client, query_builder
+
+    print(json.dumps({
+        "benchmark": "sql_build",
+        "iterations": args.iterations,
+        "legacy_insert_us": per_call_us(lambda: legacy_insert_sql("regulation_diffs", ROW), args.iterations),
+        "cached_insert_us": per_call_us(lambda: query_builder.insert_query("regulation_diffs", ROW), args.iterations),
+        "legacy_select_us": per_call_us(lambda: legacy_select_sql("regulation_diffs", CONDITIONS, 1), args.iterations),
+        "cached_select_us": per_call_us(lambda: query_builder.select_query("regulation_diffs", CONDITIONS, 1), args.iterations)
+    }))
+
+    if db_client.pool is None:
+        print(json.dumps({"benchmark": "database", "skipped": "DATABASE_URL is not set"}))
+        return
+    statement, params = query_builder.select_query("regulation_diffs", CONDITIONS, 1)
+    # Warm up: every pooled connection used below prepares the statement once
+    db_client.execute_statement(statement, params)
+    print(json.dumps({
+        "benchmark": "database",
+        "queries": args.queries,
+        "plain_sql_ms": round(per_call_us(
+            lambda: db_client.execute_query(*legacy_select_sql("regulation_diffs", CONDITIONS, 1)), args.queries
+        ) / 1000, 3),
+        "prepared_ms": round(per_call_us(
+            lambda: db_client.execute_statement(*query_builder.select_query("regulation_diffs", CONDITIONS, 1)), args.queries
+        ) / 1000, 3)
+    }))
+
+
+if __name__ == "__main__":
+    main()
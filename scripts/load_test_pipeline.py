@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Load test for /run-pipeline against a running API server.
+
+Fires N concurrent pipeline runs while probing the root endpoint, so we can
+see both whether pipeline throughput scales with concurrency and whether the
+rest of the API stays responsive while pipelines are in flight.
+
+Every request carries a different regulation (tagged with a per-invocation
+nonce), so runs are not merged by request coalescing or served from the LLM
+response cache. Pass --identical to send one shared regulation instead and
+measure how much coalescing and caching save.
+
+Usage:
+    python scripts/load_test_pipeline.py --url http://localhost:8000 --concurrency 1 4 8
+"""
+import argparse
+import json
+import statistics
+import threading
+import time
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+
+def post_json(url, payload, timeout):
+    request = urllib.request.Request(
+        url,
+        data=json.dumps(payload).encode("utf-8"),
+        headers={"Content-Type": "application/json"},
+        method="POST",
+    )
+    started = time.perf_counter()
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        response.read()
+    return time.perf_counter() - started
+
+
+def regulation_payload(nonce, index):
+    """A distinct regulation per request, so each one is a real pipeline run"""
+    return {
+        "regulation": {
+            "title": f"Load test regulation {nonce}-{index}",
+            "description": (
+                f"Synthetic regulation {index} of load test {nonce}: organizations must document the lawful "
+                "basis for processing personal data, honour deletion requests within 30 days and report "
+                "breaches to the supervisory authority within 72 hours."
+            ),
+            "priority": "medium"
+        }
+    }
+
+
+def probe_root(base_url, stop_event, latencies):
+    """Hit the cheap root endpoint until stopped, recording latencies"""
+    while not stop_event.is_set():
+        started = time.perf_counter()
+        try:
+            with urllib.request.urlopen(f"{base_url}/", timeout=60) as response:
+                response.read()
+            latencies.append(time.perf_counter() - started)
+        except Exception as e:
+            print(f"Probe failed: {str(e)}")
+        time.sleep(0.05)
+
+
+def run_level(base_url, concurrency, timeout, identical):
+    stop_event = threading.Event()
+    probe_latencies = []
+    prober = threading.Thread(target=probe_root, args=(base_url, stop_event, probe_latencies))
+    prober.start()
+
+    nonce = uuid.uuid4().hex[:8]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = [
+            executor.submit(
+                post_json, f"{base_url}/run-pipeline", regulation_payload(nonce, 0 if identical else index), timeout
+            )
+            for index in range(concurrency)
+        ]
+        run_latencies = [future.result() for future in futures]
+    wall_time = time.perf_counter() - started
+
+    stop_event.set()
+    prober.join()
+
+    return {
+        "concurrency": concurrency,
+        "wall_time_s": round(wall_time, 2),
+        "mean_run_latency_s": round(statistics.mean(run_latencies), 2),
+        "runs_per_minute": round(concurrency / wall_time * 60, 1),
+        "probe_p50_ms": round(statistics.median(probe_latencies) * 1000, 1) if probe_latencies else None,
+        "probe_max_ms": round(max(probe_latencies) * 1000, 1) if probe_latencies else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the /run-pipeline endpoint")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--timeout", type=float, default=300)
+    parser.add_argument("--identical", action="store_true",
+                        help="Send the same regulation in every request of a level (exercises coalescing and caching)")
+    args = parser.parse_args()
+
+    baseline = None
+    for level in args.concurrency:
+        result = run_level(args.url, level, args.timeout, args.identical)
+        result["identical_payloads"] = args.identical
+        if baseline is None:
+            baseline = result
+        # 1.0 means throughput grew linearly with concurrency
+        speedup = result["runs_per_minute"] / baseline["runs_per_minute"]
+        result["scaling_efficiency"] = round(speedup / (level / baseline["concurrency"]), 2)
+        print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()